@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Eager vs. accelerated CPU decoding report for Qwen2.5-0.5B-Instruct
+Measures steady-state decode tokens/sec with a dynamic cache in eager mode and with
+a static KV cache plus a compiled decode step, and how many responses pay for compilation
+"""
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+import torch
+
+from perf_stats import summarize
+from qwen_accelerated import ATTN_IMPLEMENTATIONS, AcceleratedGenerator, configure_threads, timed_generate
+from qwen_determinism import DETERMINISTIC_PROMPTS, first_divergence
+from qwen_model_loader import MODEL_NAME, load_model_and_tokenizer
+
+
+def encode(tokenizer, prompt):
+    formatted_prompt = tokenizer.apply_chat_template(
+        [{"role": "user", "content": prompt}],
+        tokenize=False,
+        add_generation_prompt=True
+    )
+    return tokenizer(formatted_prompt, return_tensors="pt")
+
+
+def measure(generate, prompts_inputs, iterations):
+    """Run ``generate(inputs) -> (token_ids, metrics)`` over every prompt"""
+    runs = []
+    for inputs in prompts_inputs:
+        for _ in range(iterations):
+            token_ids, metrics = generate(inputs)
+            runs.append({"token_ids": token_ids, **metrics})
+    return runs
+
+
+def summarize_runs(runs):
+    return {
+        "decode_tokens_per_second": summarize(
+            [r["decode_tokens_per_second"] for r in runs if r["decode_tokens_per_second"]], percentiles=(50,)),
+        "prefill_seconds": summarize([r["prefill_seconds"] for r in runs if r["prefill_seconds"] is not None],
+                                     percentiles=(50,)),
+        "total_seconds": summarize([r["total_seconds"] for r in runs], percentiles=(50,)),
+        "completion_tokens": summarize([r["completion_tokens"] for r in runs], percentiles=(50,)),
+    }
+
+
+def run_report(max_new_tokens_values, iterations=2, attn_implementation="sdpa", compile_mode=None,
+               model_name=MODEL_NAME):
+    tokenizer, model = load_model_and_tokenizer(model_name, attn_implementation=attn_implementation)
+    prompts_inputs = [encode(tokenizer, prompt) for prompt in DETERMINISTIC_PROMPTS]
+    prompt_length = prompts_inputs[0]["input_ids"].shape[1]
+
+    def eager(max_new_tokens):
+        def generate(inputs):
+            outputs, metrics = timed_generate(model, inputs, max_new_tokens=max_new_tokens, do_sample=False,
+                                              pad_token_id=tokenizer.eos_token_id)
+            return outputs[0, inputs["input_ids"].shape[1]:].tolist(), metrics
+        return generate
+
+    results = []
+    for max_new_tokens in max_new_tokens_values:
+        print(f"\n▶️ max_new_tokens={max_new_tokens}")
+        # Warm eager mode too so both sides are measured in steady state
+        eager(max_new_tokens)(prompts_inputs[0])
+        eager_runs = measure(eager(max_new_tokens), prompts_inputs, iterations)
+        print("  ✅ eager")
+
+        accelerator = AcceleratedGenerator(model, tokenizer, max_new_tokens=max_new_tokens,
+                                           compile_mode=compile_mode)
+        warmup_seconds = accelerator.warmup(prompts_inputs[0])
+        print(f"  ✅ warm-up (compile) {warmup_seconds:.1f}s")
+
+        def accelerated(inputs):
+            metrics = {}
+            outputs = accelerator.generate(inputs, metrics=metrics)
+            return outputs[0, inputs["input_ids"].shape[1]:].tolist(), metrics
+
+        accelerated_runs = measure(accelerated, prompts_inputs, iterations)
+        print("  ✅ accelerated")
+
+        eager_summary, accelerated_summary = summarize_runs(eager_runs), summarize_runs(accelerated_runs)
+        eager_seconds = eager_summary["total_seconds"]["p50"]
+        accelerated_seconds = accelerated_summary["total_seconds"]["p50"]
+        saving = eager_seconds - accelerated_seconds
+        results.append({
+            "max_new_tokens": max_new_tokens,
+            "eager": eager_summary,
+            "accelerated": accelerated_summary,
+            "warmup_seconds": warmup_seconds,
+            "static_cache_length": accelerator.cache_length,
+            "decode_speedup": (accelerated_summary["decode_tokens_per_second"]["p50"]
+                               / eager_summary["decode_tokens_per_second"]["p50"]),
+            # Responses needed before the one-off compile cost is recovered (None: never)
+            "break_even_responses": (warmup_seconds - accelerated_seconds) / saving if saving > 0 else None,
+            "identical_outputs": all(
+                first_divergence(e["token_ids"], a["token_ids"]) is None
+                for e, a in zip(eager_runs, accelerated_runs)
+            ),
+        })
+
+    return {"prompt_tokens": prompt_length, "cases": results}
+
+
+def print_report(report):
+    print("\n📊 Steady-state decode tokens/s (p50)")
+    print(f"  {'max_new':>7} {'eager':>9} {'accel':>9} {'speedup':>8} {'warm-up s':>10} {'break-even':>11} {'same':>5}")
+    for case in report["cases"]:
+        break_even = case["break_even_responses"]
+        print(f"  {case['max_new_tokens']:>7} "
+              f"{case['eager']['decode_tokens_per_second']['p50']:>9.1f} "
+              f"{case['accelerated']['decode_tokens_per_second']['p50']:>9.1f} "
+              f"{case['decode_speedup']:>7.2f}x {case['warmup_seconds']:>10.1f} "
+              f"{'never' if break_even is None else f'{break_even:.1f}':>11} "
+              f"{'✅' if case['identical_outputs'] else '⚠️':>5}")
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare eager and accelerated (static cache + compile) decoding")
+    parser.add_argument("--output", default="acceleration_report.json")
+    parser.add_argument("--max-new-tokens", type=parse_int_list, default=[300, 400])
+    parser.add_argument("--iterations", type=int, default=2)
+    parser.add_argument("--attn", choices=ATTN_IMPLEMENTATIONS, default="sdpa")
+    parser.add_argument("--compile-mode", default=None, help="torch.compile mode, e.g. max-autotune")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads")
+    parser.add_argument("--interop-threads", type=int, default=None, help="Inter-op threads")
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    print("🚀 Qwen2.5-0.5B-Instruct Accelerated Decoding Report")
+    print("=" * 60)
+    threads = configure_threads(args.threads, args.interop_threads)
+    print(f"Threads: intra-op {threads['intra_op']}, inter-op {threads['inter_op']}")
+
+    try:
+        report = run_report(args.max_new_tokens, args.iterations, args.attn, args.compile_mode, args.model)
+    except Exception as e:
+        print(f"❌ Error during acceleration report: {str(e)}")
+        return False
+
+    print_report(report)
+    report.update({
+        "model": args.model,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "torch": torch.__version__,
+        "attn_implementation": args.attn,
+        "compile_mode": args.compile_mode,
+        "threads": threads,
+    })
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report saved to {args.output}")
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Precompressed gzip/brotli variants of static assets for the WebLLM launcher
+Variants are built once per (file, size, mtime), kept on disk and in a byte-bounded LRU
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Text-like assets that shrink well; weight shards are already dense and are skipped
+COMPRESSIBLE_EXTENSIONS = {
+    '.html', '.htm', '.js', '.mjs', '.css', '.json', '.txt', '.md', '.svg', '.wasm', '.model',
+}
+MIN_COMPRESS_BYTES = 1024
+MAX_COMPRESS_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+# Variants are built on the request thread the first time they are asked for, so the
+# levels trade a little ratio for speed: brotli 11 takes seconds per MB of .wasm
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+
+def available_encodings():
+    return tuple(encoding for encoding in ENCODING_PREFERENCE if encoding != 'br' or brotli is not None)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the gzip bytes (and so the ETag) stable across rebuilds
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def negotiate(accept_encoding, encodings=None):
+    """Pick the best encoding from an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    encodings = encodings if encodings is not None else available_encodings()
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(path, size):
+    extension = os.path.splitext(path)[1].lower()
+    return extension in COMPRESSIBLE_EXTENSIONS and MIN_COMPRESS_BYTES <= size <= MAX_COMPRESS_BYTES
+
+
+class AssetCompressionCache:
+    """On-disk + in-memory cache of compressed asset variants
+
+    A variant is identified by the source path, its size and mtime_ns and the
+    encoding, so editing a file transparently triggers a rebuild. The memory
+    tier evicts least-recently-used variants once ``memory_budget`` is exceeded.
+    """
+
+    def __init__(self, cache_dir, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        self.build_locks = {}
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'builds': 0, 'evictions': 0}
+
+    def _variant_path(self, path, stat_result, encoding):
+        path_hash = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        name = f"{path_hash}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}.{encoding}"
+        return os.path.join(self.cache_dir, path_hash[:2], name), path_hash
+
+    def get(self, path, stat_result, encoding):
+        """Return the compressed bytes of ``path`` for ``encoding``, building them if needed"""
+        variant_path, path_hash = self._variant_path(path, stat_result, encoding)
+
+        with self.lock:
+            data = self.memory.get(variant_path)
+            if data is not None:
+                self.memory.move_to_end(variant_path)
+                self.stats['memory_hits'] += 1
+                return data
+            build_lock = self.build_locks.setdefault(variant_path, threading.Lock())
+
+        # One thread builds a variant; concurrent requests for it wait instead of recompressing
+        with build_lock:
+            with self.lock:
+                data = self.memory.get(variant_path)
+            if data is None:
+                data = self._load_or_build(path, variant_path, path_hash, encoding)
+                self._remember(variant_path, data)
+
+        with self.lock:
+            self.build_locks.pop(variant_path, None)
+        return data
+
+    def _load_or_build(self, path, variant_path, path_hash, encoding):
+        try:
+            with open(variant_path, 'rb') as f:
+                data = f.read()
+            self.stats['disk_hits'] += 1
+            return data
+        except OSError:
+            pass
+
+        with open(path, 'rb') as f:
+            data = compress(f.read(), encoding)
+        self.stats['builds'] += 1
+
+        variant_dir = os.path.dirname(variant_path)
+        os.makedirs(variant_dir, exist_ok=True)
+        # Drop variants built from older versions of the same file
+        for name in os.listdir(variant_dir):
+            if name.startswith(path_hash) and name.endswith('.' + encoding):
+                try:
+                    os.unlink(os.path.join(variant_dir, name))
+                except OSError:
+                    pass
+        fd, tmp_path = tempfile.mkstemp(dir=variant_dir, prefix='.variant-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, variant_path)
+        return data
+
+    def _remember(self, variant_path, data):
+        if len(data) > self.memory_budget:
+            return
+        with self.lock:
+            if variant_path in self.memory:
+                return
+            self.memory[variant_path] = data
+            self.memory_bytes += len(data)
+            while self.memory_bytes > self.memory_budget:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_bytes -= len(evicted)
+                self.stats['evictions'] += 1
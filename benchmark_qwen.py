@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Reproducible CPU benchmark for Qwen2.5-0.5B-Instruct using Transformers
+Runs a fixed matrix of prompt length, max_new_tokens, batch size and thread count
+Writes results as JSON extending the webllm_results.json format from test_webllm.js
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import time
+from datetime import datetime, timezone
+
+import torch
+import transformers
+
+from perf_stats import summarize
+from qwen_batch_inference import generate_batch
+from qwen_model_loader import (
+    MODEL_NAME, QUANTIZATION_MODES, current_rss_bytes, get_cache_report, load_model_and_tokenizer, peak_rss_bytes
+)
+from qwen_streaming import stream_generate
+
+# Fixed prompts so every run measures the same work
+BENCHMARK_PROMPTS = {
+    "short": "Hello! How are you today?",
+    "medium": "Explain what artificial intelligence is in simple terms.",
+    "long": (
+        "Write a detailed explanation of machine learning, including its types, "
+        "applications, and future prospects. Cover supervised, unsupervised and "
+        "reinforcement learning, give two real-world examples of each, and finish "
+        "with the main open research problems and how they might affect industry "
+        "over the next decade."
+    ),
+}
+
+# The max_new_tokens values the test scripts use today
+DEFAULT_MAX_NEW_TOKENS = [100, 300, 400]
+DEFAULT_BATCH_SIZES = [1, 4]
+
+
+def default_thread_counts():
+    cores = os.cpu_count() or 1
+    return sorted({1, max(1, cores // 2), cores})
+
+
+def throughput(completion_tokens, latency_seconds, ttft_seconds):
+    """Decode and end-to-end tokens/s, defined exactly as in test_webllm.js
+
+    Decode throughput counts the tokens after the first over the time after the
+    first token; end-to-end throughput counts every token over the whole request.
+    """
+    decode_seconds = latency_seconds - ttft_seconds if ttft_seconds is not None else 0
+    return {
+        "decode_tokens_per_second": (completion_tokens - 1) / decode_seconds
+                                    if completion_tokens > 1 and decode_seconds > 0 else None,
+        "end_to_end_tokens_per_second": completion_tokens / latency_seconds if latency_seconds > 0 else None,
+    }
+
+
+def run_case(model, tokenizer, prompt, batch_size, max_new_tokens):
+    """Run one benchmark iteration and return its measurements"""
+    formatted_prompt = tokenizer.apply_chat_template(
+        [{"role": "user", "content": prompt}],
+        tokenize=False,
+        add_generation_prompt=True
+    )
+
+    inputs = tokenizer(formatted_prompt, return_tensors="pt")
+    prompt_tokens = int(inputs["input_ids"].shape[1])
+
+    if batch_size == 1:
+        if torch.cuda.is_available() and hasattr(model, 'device'):
+            inputs = {k: v.to(model.device) for k, v in inputs.items()}
+        metrics = {}
+        for _ in stream_generate(model, tokenizer, inputs, max_new_tokens=max_new_tokens,
+                                 metrics=metrics, use_prefix_cache=False):
+            pass
+        return {
+            "prompt_tokens": prompt_tokens,
+            "latency_seconds": metrics["total_seconds"],
+            "ttft_seconds": metrics["ttft_seconds"],
+            "completion_tokens": metrics["completion_tokens"],
+            **throughput(metrics["completion_tokens"], metrics["total_seconds"], metrics["ttft_seconds"]),
+        }
+
+    # Batched runs go through generate_batch; TTFT (and so decode throughput) is not observable there
+    batch = [{"record": {"id": i, "prompt": prompt}, "formatted_prompt": formatted_prompt, "length": prompt_tokens}
+             for i in range(batch_size)]
+    start = time.perf_counter()
+    results = generate_batch(model, tokenizer, batch, max_new_tokens)
+    elapsed = time.perf_counter() - start
+    completion_tokens = sum(r["completion_tokens"] for r in results)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "latency_seconds": elapsed,
+        "ttft_seconds": None,
+        "completion_tokens": completion_tokens,
+        **throughput(completion_tokens, elapsed, None),
+    }
+
+
+def run_benchmark(prompt_lengths=None, max_new_tokens_values=None, batch_sizes=None,
+                  thread_counts=None, warmup=1, iterations=3, model_name=MODEL_NAME, quantization=None):
+    """Run the full benchmark matrix and return a results dict"""
+    prompt_lengths = prompt_lengths or list(BENCHMARK_PROMPTS)
+    max_new_tokens_values = max_new_tokens_values or DEFAULT_MAX_NEW_TOKENS
+    batch_sizes = batch_sizes or DEFAULT_BATCH_SIZES
+    thread_counts = thread_counts or default_thread_counts()
+
+    torch.manual_seed(0)
+    tokenizer, model = load_model_and_tokenizer(model_name, quantization=quantization)
+    load_info = next(entry for entry in get_cache_report()
+                     if entry["model"] == model_name and entry["quantization"] == (quantization or "none"))
+    original_threads = torch.get_num_threads()
+
+    cases = []
+    try:
+        for threads, prompt_length, max_new_tokens, batch_size in itertools.product(
+                thread_counts, prompt_lengths, max_new_tokens_values, batch_sizes):
+            torch.set_num_threads(threads)
+            prompt = BENCHMARK_PROMPTS[prompt_length]
+            label = f"threads={threads} prompt={prompt_length} max_new_tokens={max_new_tokens} batch={batch_size}"
+            print(f"  ▶️ {label}", end=" ", flush=True)
+
+            for _ in range(warmup):
+                run_case(model, tokenizer, prompt, batch_size, max_new_tokens)
+
+            rss_before = current_rss_bytes()
+            runs = [run_case(model, tokenizer, prompt, batch_size, max_new_tokens)
+                    for _ in range(iterations)]
+            latencies = [r["latency_seconds"] for r in runs]
+            ttfts = [r["ttft_seconds"] for r in runs if r["ttft_seconds"] is not None]
+            decode_tps = [r["decode_tokens_per_second"] for r in runs if r["decode_tokens_per_second"] is not None]
+            end_to_end_tps = [r["end_to_end_tokens_per_second"] for r in runs
+                              if r["end_to_end_tokens_per_second"] is not None]
+
+            case = {
+                "threads": threads,
+                "prompt_length": prompt_length,
+                "prompt_tokens": runs[0]["prompt_tokens"],
+                "max_new_tokens": max_new_tokens,
+                "batch_size": batch_size,
+                "warmup_iterations": warmup,
+                "measured_iterations": iterations,
+                "completion_tokens": [r["completion_tokens"] for r in runs],
+                "latency_seconds": summarize(latencies, percentiles=(50, 95, 99)),
+                "ttft_seconds": summarize(ttfts, percentiles=(50, 95, 99)),
+                "decode_tokens_per_second": summarize(decode_tps, percentiles=(50,)),
+                "end_to_end_tokens_per_second": summarize(end_to_end_tps, percentiles=(50,)),
+                # The peak is process-wide (ru_maxrss never drops); the delta is this case's
+                "rss_delta_bytes": current_rss_bytes() - rss_before,
+                "process_peak_rss_bytes": peak_rss_bytes(),
+            }
+            cases.append(case)
+            print(f"✅ p50 {case['latency_seconds']['p50']:.2f}s, "
+                  f"{case['end_to_end_tokens_per_second']['p50']:.1f} tokens/s end-to-end")
+    finally:
+        torch.set_num_threads(original_threads)
+
+    return {
+        # Fields shared with webllm_results.json (see test_webllm.js)
+        "success": True,
+        "model": model_name,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        # Benchmark extension
+        "backend": "transformers",
+        "environment": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "cpu_count": os.cpu_count(),
+            "device": str(model.device),
+            "dtype": str(model.dtype).replace("torch.", ""),
+            "quantization": quantization,
+        },
+        "metrics": {
+            "load_seconds": load_info["load_seconds"],
+            "load_rss_delta_bytes": load_info["rss_delta_bytes"],
+            "rss_bytes": current_rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+        },
+        "cases": cases,
+    }
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Qwen2.5-0.5B-Instruct CPU inference")
+    parser.add_argument("--output", default="transformers_benchmark_results.json")
+    parser.add_argument("--prompt-lengths", default=",".join(BENCHMARK_PROMPTS),
+                        help="Comma-separated subset of: " + ", ".join(BENCHMARK_PROMPTS))
+    parser.add_argument("--max-new-tokens", type=parse_int_list,
+                        default=DEFAULT_MAX_NEW_TOKENS)
+    parser.add_argument("--batch-sizes", type=parse_int_list, default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--threads", type=parse_int_list, default=None)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default=None,
+                        help="Benchmark a quantized CPU model instead of the default dtype")
+    args = parser.parse_args()
+
+    print("📊 Qwen2.5-0.5B-Instruct Benchmark")
+    print("=" * 60)
+
+    try:
+        results = run_benchmark(
+            prompt_lengths=[p for p in args.prompt_lengths.split(",") if p],
+            max_new_tokens_values=args.max_new_tokens,
+            batch_sizes=args.batch_sizes,
+            thread_counts=args.threads,
+            warmup=args.warmup,
+            iterations=args.iterations,
+            model_name=args.model,
+            quantization=args.quantization
+        )
+    except Exception as e:
+        print(f"❌ Error during benchmark: {str(e)}")
+        with open(args.output, "w") as f:
+            json.dump({
+                "success": False,
+                "backend": "transformers",
+                "error": str(e),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }, f, indent=2)
+        return False
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n💾 Results saved to {args.output}")
+    print(f"⏱️ Load time: {results['metrics']['load_seconds']:.2f}s, "
+          f"peak RSS: {results['metrics']['peak_rss_bytes'] / 2**20:.0f} MiB")
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
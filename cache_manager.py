@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Inventory and budget-based eviction for the model caches WebLLM and Transformers use
+Covers the Hugging Face hub cache, MLC caches, the local artifact mirror and .webllm_cache
+"""
+
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import webllm_mirror
+
+LOCAL_CACHE_DIR = ".webllm_cache"
+LOCAL_MLC_CACHE_DIR = "mlc_cache"
+SCAN_WORKERS = 8
+DELETE_WORKERS = 4
+
+# Byte budget the stop scripts enforce on every cleanup (e.g. "20G"); unset means no eviction
+BUDGET_ENV = "WEBLLM_CACHE_BUDGET"
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value):
+    """Parse sizes like ``500M``, ``20G`` or ``1.5GiB`` into bytes"""
+    text = value.strip().upper().removesuffix("IB").removesuffix("B")
+    unit = text[-1] if text and text[-1] in SIZE_UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+
+
+def configured_budget():
+    """The budget from ``WEBLLM_CACHE_BUDGET`` in bytes, or None when it is not set"""
+    value = os.environ.get(BUDGET_ENV, "").strip()
+    return parse_size(value) if value else None
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def hf_hub_cache_dir():
+    """The Hugging Face hub cache, honouring the same environment variables as huggingface_hub"""
+    for variable in ("HF_HUB_CACHE", "HUGGINGFACE_HUB_CACHE"):
+        if os.environ.get(variable):
+            return Path(os.environ[variable])
+    if os.environ.get("HF_HOME"):
+        return Path(os.environ["HF_HOME"]) / "hub"
+    cache_home = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return cache_home / "huggingface" / "hub"
+
+
+def mlc_cache_dirs():
+    home = os.environ.get("MLC_LLM_HOME")
+    dirs = [Path(home) if home else Path.home() / ".cache" / "mlc_llm", Path(LOCAL_MLC_CACHE_DIR)]
+    return [d for d in dirs if d.is_dir()]
+
+
+def scan_tree(path):
+    """Return ``(bytes, files, last_access)`` for a file or directory tree (symlinks not followed)"""
+    total, files, last_access = 0, 0, 0.0
+    try:
+        stat_result = os.lstat(path)
+    except OSError:
+        return 0, 0, 0.0
+    if not os.path.isdir(path) or os.path.islink(path):
+        return stat_result.st_size, 1, max(stat_result.st_atime, stat_result.st_mtime)
+
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                stat_result = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            total += stat_result.st_size
+            files += 1
+            last_access = max(last_access, stat_result.st_atime, stat_result.st_mtime)
+    return total, files, last_access
+
+
+def _directory_unit(store, name, path):
+    size, files, last_access = scan_tree(path)
+    return {"store": store, "name": name, "paths": [str(path)], "size": size, "files": files,
+            "last_access": last_access, "blobs": {}}
+
+
+def _hf_repo_units(repo_dir):
+    """One unit per snapshot (revision) of a hub repo, with the blobs each one references
+
+    Blobs are shared between revisions, so a unit's ``size`` is only what
+    evicting it alone would free; ``plan_eviction`` tracks the sharing.
+    """
+    snapshots_dir = repo_dir / "snapshots"
+    refs = {}
+    for ref_file in (repo_dir / "refs").glob("**/*"):
+        if ref_file.is_file():
+            refs.setdefault(ref_file.read_text().strip(), []).append(ref_file.relative_to(repo_dir / "refs").as_posix())
+
+    units = []
+    for snapshot in sorted(p for p in snapshots_dir.iterdir() if p.is_dir()) if snapshots_dir.is_dir() else []:
+        blobs, last_access, files = {}, 0.0, 0
+        for root, _, names in os.walk(snapshot):
+            for name in names:
+                link = os.path.join(root, name)
+                target = os.path.realpath(link)
+                try:
+                    stat_result = os.stat(target)
+                except OSError:
+                    continue
+                blobs[target] = stat_result.st_size
+                files += 1
+                last_access = max(last_access, stat_result.st_atime, stat_result.st_mtime)
+        repo_name = repo_dir.name.split("--", 1)[-1].replace("--", "/")
+        units.append({
+            "store": "huggingface",
+            "name": f"{repo_name}@{'/'.join(refs.get(snapshot.name, [])) or snapshot.name[:12]}",
+            "repo_dir": str(repo_dir),
+            "paths": [str(snapshot)],
+            "refs": refs.get(snapshot.name, []),
+            "size": sum(blobs.values()),
+            "files": files,
+            "last_access": last_access,
+            "blobs": blobs,
+        })
+    return units
+
+
+def inventory(hf_cache=None, mirror_dir=webllm_mirror.MIRROR_DIR_NAME, local_cache=LOCAL_CACHE_DIR,
+              include_hf=True):
+    """List every evictable unit in the known caches, scanning them in parallel"""
+    jobs = []
+    hf_cache = Path(hf_cache) if hf_cache else hf_hub_cache_dir()
+    if include_hf and hf_cache.is_dir():
+        for repo_dir in sorted(hf_cache.iterdir()):
+            if repo_dir.is_dir() and repo_dir.name.startswith(("models--", "datasets--", "spaces--")):
+                jobs.append((_hf_repo_units, (repo_dir,)))
+
+    def mirror_unit(name, path, relpath):
+        # The manifest entries under ``relpath`` are dropped when the unit is evicted
+        return [dict(_directory_unit("mirror", name, path), mirror_dir=str(mirror_dir), relpath=relpath)]
+
+    mirror = Path(mirror_dir)
+    if (mirror / "models").is_dir():
+        for model_dir in sorted((mirror / "models").iterdir()):
+            jobs.append((mirror_unit, (model_dir.name, model_dir, f"models/{model_dir.name}")))
+    if (mirror / "libs").is_dir():
+        jobs.append((mirror_unit, ("libs", mirror / "libs", "libs")))
+
+    for mlc_dir in mlc_cache_dirs():
+        for entry in sorted(mlc_dir.iterdir()):
+            jobs.append((lambda *args: [_directory_unit(*args)], ("mlc", f"{mlc_dir.name}/{entry.name}", entry)))
+
+    local = Path(local_cache)
+    if local.is_dir():
+        for entry in sorted(local.iterdir()):
+            jobs.append((lambda *args: [_directory_unit(*args)], ("webllm_cache", entry.name, entry)))
+
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        results = executor.map(lambda job: job[0](*job[1]), jobs)
+        return [unit for units in results for unit in units]
+
+
+def total_usage(units):
+    """Bytes on disk, counting blobs shared between revisions once"""
+    shared = {}
+    plain = 0
+    for unit in units:
+        if unit["blobs"]:
+            shared.update(unit["blobs"])
+        else:
+            plain += unit["size"]
+    return plain + sum(shared.values())
+
+
+def plan_eviction(units, budget, keep=()):
+    """Choose least-recently-used units to evict until usage fits ``budget``
+
+    Units whose name contains any of the ``keep`` substrings are never
+    evicted. Each planned unit gets ``frees`` (bytes actually released) and
+    ``delete_blobs`` (hub blobs no remaining revision references).
+    """
+    references = {}
+    for unit in units:
+        for blob in unit["blobs"]:
+            references.setdefault(blob, set()).add(id(unit))
+
+    usage = total_usage(units)
+    plan = []
+    for unit in sorted(units, key=lambda u: u["last_access"]):
+        if usage <= budget:
+            break
+        if any(pattern in unit["name"] for pattern in keep):
+            continue
+
+        if unit["blobs"]:
+            delete_blobs = []
+            for blob, size in unit["blobs"].items():
+                references[blob].discard(id(unit))
+                if not references[blob]:
+                    delete_blobs.append(blob)
+            frees = sum(unit["blobs"][blob] for blob in delete_blobs)
+        else:
+            delete_blobs, frees = [], unit["size"]
+
+        plan.append(dict(unit, frees=frees, delete_blobs=delete_blobs))
+        usage -= frees
+    return plan, usage
+
+
+def _delete_unit(unit):
+    for path in unit["paths"]:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.lexists(path):
+            os.unlink(path)
+    for blob in unit.get("delete_blobs", []):
+        try:
+            os.unlink(blob)
+        except OSError:
+            pass
+
+    repo_dir = unit.get("repo_dir")
+    if repo_dir:
+        for ref in unit.get("refs", []):
+            try:
+                os.unlink(os.path.join(repo_dir, "refs", ref))
+            except OSError:
+                pass
+        snapshots = Path(repo_dir) / "snapshots"
+        if not snapshots.is_dir() or not any(snapshots.iterdir()):
+            shutil.rmtree(repo_dir, ignore_errors=True)
+    return unit
+
+
+def delete_paths(paths, workers=DELETE_WORKERS):
+    """Remove files and directory trees concurrently; returns ``{path: error or None}``"""
+    def remove(path):
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.unlink(path)
+            return path, None
+        except OSError as e:
+            return path, e
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(remove, paths))
+
+
+def evict(plan, workers=DELETE_WORKERS):
+    """Delete the planned units concurrently
+
+    Units of the same hub repo are deleted on one worker, in plan order, so
+    the check for an emptied repo never races with a sibling revision.
+    Mirror units are first removed from the mirror manifest (in one pass),
+    so the launcher never points a page at shards that are being deleted.
+    """
+    mirrored = {}
+    for unit in plan:
+        if unit.get("relpath"):
+            mirrored.setdefault(unit["mirror_dir"], []).append(unit["relpath"])
+    for mirror_dir, relpaths in mirrored.items():
+        webllm_mirror.forget_paths(mirror_dir, relpaths)
+
+    by_repo = {}
+    for unit in plan:
+        by_repo.setdefault(unit.get("repo_dir") or unit["paths"][0], []).append(unit)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda units: [_delete_unit(unit) for unit in units], by_repo.values()))
+    return plan
+
+
+def print_inventory(units):
+    now = time.time()
+    print(f"  {'store':<13} {'size':>10} {'files':>6} {'last used':>10}  name")
+    for unit in sorted(units, key=lambda u: u["last_access"], reverse=True):
+        age_days = (now - unit["last_access"]) / 86400 if unit["last_access"] else float("inf")
+        print(f"  {unit['store']:<13} {format_size(unit['size']):>10} {unit['files']:>6} "
+              f"{age_days:>8.1f}d  {unit['name']}")
+    print(f"  Total on disk: {format_size(total_usage(units))}")
+
+
+def enforce_budget(budget, dry_run=False, keep=(), **inventory_kwargs):
+    """Inventory the caches and evict LRU units until they fit ``budget`` bytes"""
+    units = inventory(**inventory_kwargs)
+    plan, usage_after = plan_eviction(units, budget, keep)
+    before = total_usage(units)
+
+    if not plan:
+        print(f"  ✅ {format_size(before)} in use, within the {format_size(budget)} budget")
+        return plan
+
+    verb = "Would evict" if dry_run else "Evicting"
+    print(f"  {verb} {len(plan)} unit(s) to go from {format_size(before)} to {format_size(usage_after)} "
+          f"(budget {format_size(budget)}):")
+    for unit in plan:
+        print(f"  🗑️ {unit['store']:<13} {format_size(unit['frees']):>10}  {unit['name']}")
+    if usage_after > budget:
+        print("  ⚠️ Still over budget: the remaining units are protected by --keep")
+    if not dry_run:
+        start = time.perf_counter()
+        evict(plan)
+        print(f"  ✅ Evicted in {time.perf_counter() - start:.2f}s")
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory and trim the WebLLM / Transformers model caches")
+    parser.add_argument("--hf-cache", default=None, help="Hugging Face hub cache (default: HF_HUB_CACHE etc.)")
+    parser.add_argument("--mirror-dir", default=webllm_mirror.MIRROR_DIR_NAME)
+    parser.add_argument("--local-cache", default=LOCAL_CACHE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("inventory", help="List cached model revisions and artifacts")
+    evict_parser = subparsers.add_parser("evict", help="Evict least-recently-used units down to a budget")
+    evict_parser.add_argument("--budget", type=parse_size, default=None,
+                              help=f"e.g. 500M, 20G (default: ${BUDGET_ENV})")
+    evict_parser.add_argument("--dry-run", action="store_true", help="Only report what would be evicted")
+    evict_parser.add_argument("--keep", action="append", default=[],
+                              help="Never evict units whose name contains this (repeatable)")
+
+    args = parser.parse_args()
+    locations = {"hf_cache": args.hf_cache, "mirror_dir": args.mirror_dir, "local_cache": args.local_cache}
+
+    print("🗄️ WebLLM Model Cache Manager")
+    print("=" * 50)
+    try:
+        if args.command == "inventory":
+            print_inventory(inventory(**locations))
+        else:
+            budget = args.budget if args.budget is not None else configured_budget()
+            if budget is None:
+                print(f"❌ No budget: pass --budget or set {BUDGET_ENV}")
+                return False
+            enforce_budget(budget, dry_run=args.dry_run, keep=args.keep, **locations)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cache manager error: {e}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
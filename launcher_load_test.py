@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Load test for the static file server in webllm_python_launcher.py
+Measures how request throughput scales with the number of concurrent keep-alive clients
+"""
+
+import argparse
+import functools
+import http.client
+import http.server
+import os
+import socketserver
+import tempfile
+import threading
+import time
+
+from perf_stats import summarize
+from webllm_python_launcher import DEFAULT_WORKERS, start_local_server
+
+
+class LegacyHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_legacy_server(directory):
+    """The pre-threading server: one connection at a time, HTTP/1.0"""
+    handler = functools.partial(LegacyHandler, directory=directory)
+    httpd = socketserver.TCPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, httpd.server_address[1]
+
+
+def client_loop(port, path, deadline, latencies, errors, keep_alive):
+    """Request ``path`` repeatedly until ``deadline``, recording each latency"""
+    connection = None
+    while time.perf_counter() < deadline:
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            start = time.perf_counter()
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            if not keep_alive or response.will_close:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            if connection is not None:
+                connection.close()
+            connection = None
+    if connection is not None:
+        connection.close()
+
+
+def run_level(port, path, clients, duration, keep_alive=True):
+    """Run ``clients`` concurrent clients for ``duration`` seconds"""
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=client_loop, args=(port, path, deadline, latencies, errors, keep_alive))
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latency_ms = summarize([latency * 1000 for latency in latencies], percentiles=(50, 99))
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_p50_ms": latency_ms.get("p50"),
+        "latency_p99_ms": latency_ms.get("p99"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the WebLLM launcher's static file server")
+    parser.add_argument("--clients", default="1,2,4,8,16,32",
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per concurrency level")
+    parser.add_argument("--file-size", type=int, default=256 * 1024, help="Bytes in the served test file")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--baseline", action="store_true",
+                        help="Also measure the old single-connection TCPServer for comparison")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.clients.split(",") if level]
+
+    print("🏋️ WebLLM Launcher Load Test")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "asset.bin"), "wb") as f:
+            f.write(os.urandom(args.file_size))
+
+        servers = [("threaded keep-alive", *start_local_server(0, workers=args.workers, directory=directory), True)]
+        if args.baseline:
+            servers.append(("legacy TCPServer", *start_legacy_server(directory), False))
+
+        for label, httpd, port, keep_alive in servers:
+            print(f"\n📊 {label} (file: {args.file_size} bytes)")
+            print(f"  {'clients':>7} {'req/s':>10} {'MB/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for clients in levels:
+                result = run_level(port, "/asset.bin", clients, args.duration, keep_alive)
+                mb_per_second = result["requests_per_second"] * args.file_size / 2**20
+                print(f"  {clients:>7} {result['requests_per_second']:>10.1f} {mb_per_second:>9.1f} "
+                      f"{result['latency_p50_ms'] or 0:>9.2f} {result['latency_p99_ms'] or 0:>9.2f} "
+                      f"{result['errors']:>7}")
+            httpd.shutdown()
+            httpd.server_close()
+
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Request metrics for webllm_python_launcher.py, exposed in Prometheus text format
+Each worker thread counts into its own shard, so recording a request takes no lock
+"""
+
+import bisect
+import os
+import threading
+import time
+
+# Fallback start time when the OS does not tell us: the launcher imports this module at startup
+_IMPORTED = time.time()
+
+METRICS_PATH = "/metrics"
+HEALTHZ_PATH = "/healthz"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# HELP text of the gauges the launcher reports alongside the request counters
+GAUGE_HELP = {
+    "process_start_time_seconds": "Start time of the launcher process since the Unix epoch in seconds.",
+    "webllm_launcher_pid": "Process ID of the launcher.",
+    "webllm_launcher_workers": "Maximum number of connections served concurrently.",
+    "webllm_launcher_uptime_seconds": "Seconds since the launcher started serving.",
+}
+
+# Distinct path labels per thread before further paths are folded into OTHER_PATH
+MAX_PATHS = 512
+OTHER_PATH = "(other)"
+UNMATCHED_PATH = "(unmatched)"
+
+
+def process_start_time():
+    """Start time of this process in seconds since the Unix epoch
+
+    Read from ``/proc`` on Linux, from psutil when it is installed, and
+    otherwise approximated by the time this module was imported.
+    """
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            # The command name may contain spaces; fields after it are fixed
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat", encoding="ascii") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime "))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().create_time()
+    except Exception:
+        return _IMPORTED
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class RequestMetrics:
+    """Per-path request counts, status codes, bytes served and latency histograms
+
+    Every thread gets a private shard on first use (the only locked step).
+    A shard is written only by its own thread and merged when ``/metrics`` is
+    scraped; copying a dict is atomic under the GIL, so a scrape sees each
+    shard at some consistent point without stopping the workers.
+    """
+
+    def __init__(self):
+        self.started = process_start_time()
+        self.local = threading.local()
+        self.shards = []
+        self.lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = {"requests": {}, "bytes": {}, "latency": {}}
+            self.local.shard = shard
+            with self.lock:
+                self.shards.append(shard)
+        return shard
+
+    def record(self, method, path, status, body_bytes, seconds):
+        shard = self._shard()
+        if status == 404 or not path:
+            path = UNMATCHED_PATH  # never let random 404 URLs grow the label set
+        elif path not in shard["bytes"] and len(shard["bytes"]) >= MAX_PATHS:
+            path = OTHER_PATH
+
+        requests = shard["requests"]
+        key = (method, path, status)
+        requests[key] = requests.get(key, 0) + 1
+        shard["bytes"][path] = shard["bytes"].get(path, 0) + body_bytes
+
+        histogram = shard["latency"].get(path)
+        if histogram is None:
+            # Per-bucket (non-cumulative) counts, then +Inf, then the sum
+            histogram = shard["latency"][path] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+    def snapshot(self):
+        """Merge every thread's shard into one ``{"requests", "bytes", "latency"}`` dict"""
+        with self.lock:
+            shards = list(self.shards)
+
+        merged = {"requests": {}, "bytes": {}, "latency": {}}
+        for shard in shards:
+            for name in ("requests", "bytes"):
+                for key, value in dict(shard[name]).items():
+                    merged[name][key] = merged[name].get(key, 0) + value
+            for path, histogram in dict(shard["latency"]).items():
+                total = merged["latency"].setdefault(path, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0])
+                for i, value in enumerate(list(histogram)):
+                    total[i] += value
+        return merged
+
+    def render(self, extra_gauges=None):
+        """Prometheus text exposition of the merged counters"""
+        data = self.snapshot()
+        lines = [
+            "# HELP webllm_http_requests_total HTTP requests served, by method, path and status.",
+            "# TYPE webllm_http_requests_total counter",
+        ]
+        for (method, path, status), count in sorted(data["requests"].items()):
+            lines.append(f'webllm_http_requests_total{{method="{method}",path="{_escape(path)}",'
+                         f'status="{status}"}} {count}')
+
+        lines += [
+            "# HELP webllm_http_response_bytes_total Response body bytes sent, by path.",
+            "# TYPE webllm_http_response_bytes_total counter",
+        ]
+        for path, count in sorted(data["bytes"].items()):
+            lines.append(f'webllm_http_response_bytes_total{{path="{_escape(path)}"}} {count}')
+
+        lines += [
+            "# HELP webllm_http_request_duration_seconds Time from request line to response sent, by path.",
+            "# TYPE webllm_http_request_duration_seconds histogram",
+        ]
+        for path, histogram in sorted(data["latency"].items()):
+            label = f'path="{_escape(path)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram):
+                cumulative += count
+                lines.append(f'webllm_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += histogram[len(LATENCY_BUCKETS)]
+            lines.append(f'webllm_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f'webllm_http_request_duration_seconds_sum{{{label}}} {histogram[-1]:.6f}')
+            lines.append(f'webllm_http_request_duration_seconds_count{{{label}}} {cumulative}')
+
+        gauges = {
+            "process_start_time_seconds": self.started,
+            "webllm_launcher_pid": os.getpid(),
+            **(extra_gauges or {}),
+        }
+        for name, value in gauges.items():
+            if name in GAUGE_HELP:
+                lines.append(f"# HELP {name} {GAUGE_HELP[name]}")
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
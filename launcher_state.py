@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+State file and control endpoint client for webllm_python_launcher.py
+Lets the stop scripts find and stop the launcher directly instead of scanning processes
+"""
+
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+STATE_FILE = ".webllm_launcher.json"
+
+# Control endpoints served by the launcher next to the static files
+CONTROL_PREFIX = "/__webllm"
+HEALTH_PATH = CONTROL_PREFIX + "/health"
+SHUTDOWN_PATH = CONTROL_PREFIX + "/shutdown"
+TOKEN_HEADER = "X-WebLLM-Token"
+
+
+def write_state(path, port, token, directory):
+    """Record this process as the running launcher (owner-only permissions: the file holds the token)"""
+    state = {
+        "pid": os.getpid(),
+        "port": port,
+        "token": token,
+        "directory": directory,
+        "started": time.time(),
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".launcher-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
+    return state
+
+
+def read_state(path=STATE_FILE):
+    """Return the recorded launcher state, or None if there is no (readable) state file"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or not {"pid", "port", "token", "started"} <= state.keys():
+        return None
+    return state
+
+
+def remove_state(path=STATE_FILE, pid=None):
+    """Delete the state file, but only if it still belongs to ``pid`` (default: this process)"""
+    state = read_state(path)
+    if state is not None and state["pid"] != (pid or os.getpid()):
+        return False
+    try:
+        os.unlink(path)
+        return True
+    except OSError:
+        return False
+
+
+def _control_url(state, path):
+    return f"http://127.0.0.1:{state['port']}{path}"
+
+
+def check_health(state, timeout=2):
+    """Return the launcher's health report, or None if it does not answer as this launcher"""
+    try:
+        with urllib.request.urlopen(_control_url(state, HEALTH_PATH), timeout=timeout) as response:
+            health = json.load(response)
+    except (OSError, ValueError, urllib.error.URLError):
+        return None
+    return health if health.get("pid") == state["pid"] else None
+
+
+def request_shutdown(state, timeout=2):
+    """Ask the launcher to shut down through its control endpoint; True if it accepted"""
+    request = urllib.request.Request(
+        _control_url(state, SHUTDOWN_PATH),
+        data=b"",
+        method="POST",
+        headers={TOKEN_HEADER: state["token"]},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status == 202
+    except (OSError, urllib.error.URLError):
+        return False
+
+
+def pid_alive(pid):
+    """True if a process with ``pid`` exists (it may belong to another user)"""
+    if os.name == "nt":
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def wait_for_exit(pid, timeout=5):
+    """Poll until ``pid`` is gone; True if it exited within ``timeout`` seconds"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not pid_alive(pid):
+            return True
+        time.sleep(0.05)
+    return not pid_alive(pid)
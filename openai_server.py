@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible /v1/chat/completions server for Qwen2.5-0.5B-Instruct on CPU
+Same request/response contract as engine.chat.completions.create() in WebLLM
+Async HTTP front end, generation on a worker thread pool, 429 when overloaded
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import torch
+
+from qwen_model_loader import MODEL_NAME, load_model_and_tokenizer
+from qwen_streaming import stream_generate
+
+SERVED_MODEL_ID = "Qwen2.5-0.5B-Instruct"
+MAX_BODY_BYTES = 1024 * 1024
+DEFAULT_MAX_TOKENS = 300
+
+
+class RequestError(Exception):
+    """Client error reported back as an OpenAI-style error object"""
+
+    def __init__(self, status, message, error_type="invalid_request_error"):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.error_type = error_type
+
+
+def number_param(body, name, default, minimum, maximum):
+    """Return ``body[name]`` as a float within [minimum, maximum], or raise a 400"""
+    value = body.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not minimum <= value <= maximum:
+        raise RequestError(400, f"'{name}' must be a number between {minimum} and {maximum}")
+    return float(value)
+
+
+def error_payload(message, error_type):
+    return {"error": {"message": message, "type": error_type, "param": None, "code": None}}
+
+
+class ChatCompletionServer:
+    """Serves chat completions from one loaded model
+
+    At most ``workers`` generations run at once; up to ``max_queue`` more may
+    wait for a worker. Anything beyond that is rejected with 429 so the queue
+    (and latency) stays bounded under overload.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, workers=2, max_queue=8):
+        self.tokenizer, self.model = self.load(model_name)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate")
+        self.capacity = workers + max_queue
+        self.in_flight = 0
+        self.sampling_lock = threading.Lock()
+        self.stats = {"requests": 0, "rejected": 0, "completed": 0, "errors": 0}
+
+    def load(self, model_name):
+        """Return ``(tokenizer, model)``; tests override this to skip loading weights"""
+        return load_model_and_tokenizer(model_name)
+
+    # ---- request parsing -------------------------------------------------
+
+    def build_generation(self, body):
+        """Validate a chat.completions request body and return generation settings"""
+        messages = body.get("messages")
+        if not isinstance(messages, list) or not messages:
+            raise RequestError(400, "'messages' must be a non-empty list")
+        for message in messages:
+            if not isinstance(message, dict) or "role" not in message or "content" not in message:
+                raise RequestError(400, "each message needs 'role' and 'content'")
+
+        max_tokens = body.get("max_tokens")
+        if max_tokens is None:
+            max_tokens = body.get("max_completion_tokens")
+        if max_tokens is None:
+            max_tokens = DEFAULT_MAX_TOKENS
+        if isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or max_tokens < 1:
+            raise RequestError(400, "'max_tokens' must be a positive integer")
+        # Same ranges as the OpenAI API
+        temperature = number_param(body, "temperature", 0.0, 0, 2)
+        top_p = number_param(body, "top_p", 1.0, 0, 1)
+        seed = body.get("seed")
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            raise RequestError(400, "'seed' must be an integer")
+
+        formatted_prompt = self.tokenizer.apply_chat_template(
+            messages,
+            tokenize=False,
+            add_generation_prompt=True
+        )
+        inputs = self.tokenizer(formatted_prompt, return_tensors="pt")
+        if torch.cuda.is_available() and hasattr(self.model, 'device'):
+            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+
+        sampling = {}
+        if temperature > 0:
+            sampling = {"do_sample": True, "temperature": temperature, "top_p": top_p}
+
+        return {
+            "inputs": inputs,
+            "max_tokens": max_tokens,
+            "sampling": sampling,
+            "seed": seed if sampling else None,
+            "prompt_tokens": int(inputs["input_ids"].shape[1]),
+        }
+
+    # ---- generation (runs on worker threads) -----------------------------
+
+    def run_generation(self, generation, on_text=None, stop_event=None):
+        """Generate a completion, calling ``on_text`` for each chunk if given
+
+        ``generate`` samples from torch's process-wide RNG and takes no
+        per-call generator, so sampled generations hold ``sampling_lock`` for
+        their whole run: a seeded request then reproduces regardless of
+        concurrent requests. The seed is applied inside ``fork_rng``, which
+        restores the global RNG state afterwards. Greedy generations never
+        touch the RNG and run in parallel.
+        """
+        metrics = {}
+        parts = []
+        with contextlib.ExitStack() as stack:
+            if generation["sampling"]:
+                stack.enter_context(self.sampling_lock)
+            if generation["seed"] is not None:
+                device = self.model.device
+                stack.enter_context(torch.random.fork_rng(
+                    devices=[device.index or 0] if device.type == "cuda" else []))
+                torch.manual_seed(generation["seed"])
+            for text in stream_generate(
+                    self.model, self.tokenizer, generation["inputs"],
+                    max_new_tokens=generation["max_tokens"], metrics=metrics,
+                    stop_event=stop_event, **generation["sampling"]):
+                parts.append(text)
+                if on_text is not None:
+                    on_text(text)
+
+        completion_tokens = metrics.get("completion_tokens", 0)
+        return {
+            "content": "".join(parts).strip(),
+            "finish_reason": metrics.get("finish_reason", "stop"),
+            "usage": {
+                "prompt_tokens": generation["prompt_tokens"],
+                "completion_tokens": completion_tokens,
+                "total_tokens": generation["prompt_tokens"] + completion_tokens,
+            },
+        }
+
+    # ---- HTTP layer --------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            keep_alive = True
+            while keep_alive:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                keep_alive = request["keep_alive"]
+                try:
+                    keep_alive = await self.dispatch(request, writer) and keep_alive
+                except RequestError as e:
+                    await send_json(writer, e.status, error_payload(e.message, e.error_type), keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except RequestError as e:
+            # Malformed request line/headers: answer once and drop the connection
+            await send_json(writer, e.status, error_payload(e.message, e.error_type), False)
+        finally:
+            writer.close()
+
+    async def dispatch(self, request, writer):
+        """Route one request; returns False when the connection must be closed"""
+        method, path = request["method"], request["path"].split("?", 1)[0]
+
+        if method == "OPTIONS":
+            await send_response(writer, 204, b"", "text/plain", request["keep_alive"])
+            return True
+        if method == "GET" and path == "/health":
+            await send_json(writer, 200, {"status": "ok", "in_flight": self.in_flight,
+                                          "capacity": self.capacity, **self.stats}, request["keep_alive"])
+            return True
+        if method == "GET" and path == "/v1/models":
+            await send_json(writer, 200, {"object": "list", "data": [
+                {"id": SERVED_MODEL_ID, "object": "model", "owned_by": "local"}]}, request["keep_alive"])
+            return True
+        if path != "/v1/chat/completions":
+            raise RequestError(404, f"Unknown path: {path}", "not_found_error")
+        if method != "POST":
+            raise RequestError(405, "Use POST for /v1/chat/completions")
+
+        try:
+            body = json.loads(request["body"] or b"{}")
+        except ValueError:
+            raise RequestError(400, "Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise RequestError(400, "Request body must be a JSON object")
+
+        self.stats["requests"] += 1
+        if self.in_flight >= self.capacity:
+            self.stats["rejected"] += 1
+            await send_json(writer, 429, error_payload(
+                "Server is at capacity, retry shortly", "rate_limit_error"),
+                request["keep_alive"], extra_headers={"Retry-After": "1"})
+            return True
+
+        self.in_flight += 1
+        try:
+            generation = self.build_generation(body)
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            model_id = body.get("model") or SERVED_MODEL_ID
+            if body.get("stream"):
+                await self.stream_completion(writer, generation, completion_id, model_id,
+                                             include_usage=bool((body.get("stream_options") or {}).get("include_usage")))
+                return False
+
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, self.run_generation, generation)
+            self.stats["completed"] += 1
+            await send_json(writer, 200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model_id,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": result["content"]},
+                    "finish_reason": result["finish_reason"],
+                }],
+                "usage": result["usage"],
+            }, request["keep_alive"])
+            return True
+        except RequestError:
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            raise RequestError(500, f"Generation failed: {e}", "server_error")
+        finally:
+            self.in_flight -= 1
+
+    async def stream_completion(self, writer, generation, completion_id, model_id, include_usage=False):
+        """Send a completion as server-sent events, one chunk per decoded piece"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop_event = threading.Event()
+        created = int(time.time())
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model_id,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        def on_text(text):
+            loop.call_soon_threadsafe(queue.put_nowait, text)
+
+        def worker():
+            try:
+                return self.run_generation(generation, on_text=on_text, stop_event=stop_event)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        future = loop.run_in_executor(self.executor, worker)
+
+        try:
+            await send_event(writer, chunk({"role": "assistant", "content": ""}))
+            while True:
+                text = await queue.get()
+                if text is None:
+                    break
+                await send_event(writer, chunk({"content": text}))
+
+            result = await future
+            await send_event(writer, chunk({}, result["finish_reason"]))
+            if include_usage:
+                await send_event(writer, {**chunk({}), "choices": [], "usage": result["usage"]})
+            writer.write(b"data: [DONE]\n\n")
+            await writer.drain()
+            self.stats["completed"] += 1
+        except ConnectionError:
+            # Client disconnected: stop decoding instead of finishing for nobody
+            stop_event.set()
+            try:
+                await future
+            except Exception:
+                pass
+            raise
+        except Exception as e:
+            # Headers are already sent, so report the failure as a final event
+            self.stats["errors"] += 1
+            await send_event(writer, error_payload(f"Generation failed: {e}", "server_error"))
+
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request; returns None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise RequestError(400, "Incomplete request")
+        return None
+    except asyncio.LimitOverrunError:
+        raise RequestError(431, "Request headers too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise RequestError(400, "Invalid Content-Length")
+    if length < 0:
+        raise RequestError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return {"method": method.upper(), "path": path, "headers": headers, "body": body,
+            "keep_alive": keep_alive}
+
+
+async def send_response(writer, status, body, content_type, keep_alive, extra_headers=None):
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    }
+    headers.update(extra_headers or {})
+    head = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+
+
+async def send_json(writer, status, payload, keep_alive, extra_headers=None):
+    body = json.dumps(payload).encode("utf-8")
+    await send_response(writer, status, body, "application/json", keep_alive, extra_headers)
+
+
+async def send_event(writer, payload):
+    writer.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+    await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8000, model_name=MODEL_NAME, workers=2, max_queue=8):
+    server = ChatCompletionServer(model_name, workers=workers, max_queue=max_queue)
+    httpd = await asyncio.start_server(server.handle_connection, host, port)
+
+    print(f"🌐 OpenAI-compatible server on http://{host}:{port}/v1/chat/completions")
+    print(f"⚙️ Workers: {workers}, queue: {max_queue} (extra requests get 429)")
+    print("❌ Press Ctrl+C to stop the server")
+    async with httpd:
+        await httpd.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible chat completions server for Qwen2.5-0.5B-Instruct")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent generations")
+    parser.add_argument("--max-queue", type=int, default=8, help="Requests allowed to wait for a worker")
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    print("🚀 Qwen2.5-0.5B-Instruct Chat Completions Server")
+    print("=" * 60)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.model, args.workers, args.max_queue))
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped")
+    except Exception as e:
+        print(f"❌ Error running server: {e}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Small latency statistics helpers shared by the benchmark and metrics tools
+Standard library only, so the launcher and stop tools can use it too
+"""
+
+import math
+
+
+def percentile(values, pct):
+    """Return the ``pct`` percentile of ``values`` using linear interpolation"""
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values, percentiles=(50, 90, 95, 99)):
+    """Return count, mean, min, max and the requested percentiles of ``values``"""
+    if not values:
+        return {"count": 0}
+
+    summary = {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "min": min(values),
+        "max": max(values),
+    }
+    for pct in percentiles:
+        summary[f"p{pct}"] = percentile(values, pct)
+    return summary
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Int8 dynamic quantization report for Qwen2.5-0.5B-Instruct on CPU
+Compares the int8 model against fp32 on latency, tokens/sec, memory footprint
+and agreement with the fp32 greedy output on the deterministic prompt set
+"""
+
+import argparse
+import io
+import json
+import time
+from datetime import datetime, timezone
+
+import torch
+
+from perf_stats import summarize
+from qwen_determinism import DETERMINISTIC_PROMPTS, first_divergence
+from qwen_model_loader import MODEL_NAME, get_cache_report, load_model_and_tokenizer
+
+MODES = {
+    "fp32": None,
+    "int8": "int8",
+}
+
+
+def serialized_size_bytes(model):
+    """Size of the model's state_dict as torch.save writes it
+
+    Dynamically quantized Linear layers keep their int8 weights in packed
+    params rather than parameters, so the serialized size is the comparable
+    footprint (RSS deltas depend on allocator reuse within one process).
+    """
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def greedy_generate(model, tokenizer, prompt, max_new_tokens):
+    """Greedy-generate ``prompt`` and return ``(token_ids, seconds)``"""
+    formatted_prompt = tokenizer.apply_chat_template(
+        [{"role": "user", "content": prompt}],
+        tokenize=False,
+        add_generation_prompt=True
+    )
+    inputs = tokenizer(formatted_prompt, return_tensors="pt")
+
+    start = time.perf_counter()
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            temperature=0.0,
+            pad_token_id=tokenizer.eos_token_id,
+            eos_token_id=tokenizer.eos_token_id
+        )
+    seconds = time.perf_counter() - start
+    return outputs[0, inputs["input_ids"].shape[1]:].tolist(), seconds
+
+
+def run_mode(mode, prompts, max_new_tokens, iterations, model_name=MODEL_NAME):
+    """Load one mode's model and generate every prompt ``iterations`` times"""
+    tokenizer, model = load_model_and_tokenizer(model_name, device="cpu", dtype=torch.float32,
+                                                quantization=MODES[mode])
+    load_info = next(entry for entry in get_cache_report()
+                     if entry["model"] == model_name and entry["quantization"] == (MODES[mode] or "none"))
+
+    # Warm-up so one-off kernel setup is not billed to the first prompt
+    greedy_generate(model, tokenizer, prompts[0], 8)
+
+    outputs = []
+    for prompt in prompts:
+        runs = [greedy_generate(model, tokenizer, prompt, max_new_tokens) for _ in range(iterations)]
+        token_ids = runs[0][0]
+        latencies = [seconds for _, seconds in runs]
+        outputs.append({
+            "prompt": prompt,
+            "token_ids": token_ids,
+            "latency_seconds": summarize(latencies, percentiles=(50,)),
+            "tokens_per_second": summarize([len(token_ids) / seconds for seconds in latencies],
+                                           percentiles=(50,)),
+        })
+        print(f"  ✅ {mode}: {len(token_ids)} tokens, p50 {outputs[-1]['latency_seconds']['p50']:.2f}s")
+
+    return {
+        "mode": mode,
+        "load_seconds": load_info["load_seconds"],
+        "load_rss_delta_bytes": load_info["rss_delta_bytes"],
+        "serialized_bytes": serialized_size_bytes(model),
+        "outputs": outputs,
+    }
+
+
+def compare(reference, candidate):
+    """Per-prompt greedy agreement of ``candidate`` with ``reference``"""
+    agreement = []
+    for expected, actual in zip(reference["outputs"], candidate["outputs"]):
+        position = first_divergence(expected["token_ids"], actual["token_ids"])
+        matched = len(expected["token_ids"]) if position is None else position
+        agreement.append({
+            "prompt": expected["prompt"],
+            "exact_match": position is None,
+            "first_divergence": position,
+            "matching_prefix_ratio": matched / max(1, len(expected["token_ids"])),
+            "speedup": expected["latency_seconds"]["p50"] / actual["latency_seconds"]["p50"],
+        })
+    return agreement
+
+
+def print_report(results, agreement):
+    fp32, int8 = results["fp32"], results["int8"]
+    print("\n📊 Int8 vs fp32")
+    print(f"  {'':<22} {'fp32':>12} {'int8':>12}")
+    print(f"  {'serialized size (MiB)':<22} {fp32['serialized_bytes'] / 2**20:>12.1f} "
+          f"{int8['serialized_bytes'] / 2**20:>12.1f}")
+    print(f"  {'load RSS delta (MiB)':<22} {fp32['load_rss_delta_bytes'] / 2**20:>12.1f} "
+          f"{int8['load_rss_delta_bytes'] / 2**20:>12.1f}")
+    for label, key in (("p50 latency (s)", "latency_seconds"), ("p50 tokens/s", "tokens_per_second")):
+        fp32_mean = sum(o[key]["p50"] for o in fp32["outputs"]) / len(fp32["outputs"])
+        int8_mean = sum(o[key]["p50"] for o in int8["outputs"]) / len(int8["outputs"])
+        print(f"  {label:<22} {fp32_mean:>12.2f} {int8_mean:>12.2f}")
+
+    print("\n🔬 Greedy agreement with fp32")
+    for i, entry in enumerate(agreement, 1):
+        status = "✅ identical" if entry["exact_match"] else f"⚠️ diverges at token {entry['first_divergence']}"
+        print(f"  Test {i}: {status} ({entry['matching_prefix_ratio']:.0%} matching prefix, "
+              f"{entry['speedup']:.2f}x speed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare int8 dynamic quantization against fp32 on CPU")
+    parser.add_argument("--output", default="quantization_report.json")
+    parser.add_argument("--max-new-tokens", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    print("🗜️ Qwen2.5-0.5B-Instruct Int8 Quantization Report")
+    print("=" * 60)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    try:
+        results = {mode: run_mode(mode, DETERMINISTIC_PROMPTS, args.max_new_tokens, args.iterations, args.model)
+                   for mode in MODES}
+    except Exception as e:
+        print(f"❌ Error during quantization report: {str(e)}")
+        return False
+
+    agreement = compare(results["fp32"], results["int8"])
+    print_report(results, agreement)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "model": args.model,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "torch": torch.__version__,
+            "threads": torch.get_num_threads(),
+            "max_new_tokens": args.max_new_tokens,
+            "modes": results,
+            "agreement": agreement,
+        }, f, indent=2)
+    print(f"\n💾 Report saved to {args.output}")
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Bulk offline inference for Qwen2.5-0.5B-Instruct over a JSONL prompt file
+Groups prompts by token length into left-padded batches and streams results to JSONL
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import torch
+
+from qwen_model_loader import MODEL_NAME, load_model_and_tokenizer, print_cache_report
+
+
+def read_prompts(input_path):
+    """Yield prompt records from a JSONL file
+
+    Each line is either ``{"prompt": "..."}`` or ``{"messages": [...]}`` and may
+    carry an ``"id"``; lines without one are identified by their line number.
+    """
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"prompt": record}
+            record.setdefault("id", line_number)
+            yield record
+
+
+def load_completed_ids(output_path):
+    """Return the ids already written to ``output_path`` so a run can resume
+
+    A crash can leave a half-written last line behind; it is truncated away so
+    the prompt is simply generated again.
+    """
+    output_path = Path(output_path)
+    if not output_path.exists():
+        return set()
+
+    completed = set()
+    valid_bytes = 0
+    with open(output_path, "rb") as f:
+        for raw_line in f:
+            if not raw_line.endswith(b"\n"):
+                break
+            try:
+                completed.add(json.loads(raw_line)["id"])
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(raw_line)
+
+    if valid_bytes != output_path.stat().st_size:
+        print(f"⚠️ Truncating incomplete tail of {output_path}")
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+
+    return completed
+
+
+def format_prompt(tokenizer, record):
+    """Apply the Qwen chat template to a prompt record"""
+    messages = record.get("messages") or [{"role": "user", "content": record["prompt"]}]
+    return tokenizer.apply_chat_template(
+        messages,
+        tokenize=False,
+        add_generation_prompt=True
+    )
+
+
+def bucket_by_length(items, batch_size):
+    """Split items (each with a ``"length"``) into batches of similar length"""
+    items = sorted(items, key=lambda item: item["length"])
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def count_completion_tokens(generated_ids, eos_token_id):
+    """Tokens up to and including the first EOS; everything after it is padding
+
+    Counting non-pad tokens instead drops the EOS whenever the pad token is
+    the EOS token (tokenizers without a pad token fall back to it).
+    """
+    if eos_token_id is None:
+        return len(generated_ids)
+    eos_positions = (generated_ids == eos_token_id).nonzero()
+    return int(eos_positions[0, 0]) + 1 if len(eos_positions) else len(generated_ids)
+
+
+def generate_batch(model, tokenizer, batch, max_new_tokens=300):
+    """Run one left-padded ``model.generate`` call for a batch of formatted prompts"""
+    previous_padding_side = tokenizer.padding_side
+    tokenizer.padding_side = "left"
+    try:
+        inputs = tokenizer(
+            [item["formatted_prompt"] for item in batch],
+            return_tensors="pt",
+            padding=True
+        )
+    finally:
+        tokenizer.padding_side = previous_padding_side
+
+    if torch.cuda.is_available() and hasattr(model, 'device'):
+        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+
+    # 0 is a valid pad token ID, so only a missing one falls back to EOS
+    pad_token_id = tokenizer.pad_token_id
+    if pad_token_id is None:
+        pad_token_id = tokenizer.eos_token_id
+
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            temperature=0.0,
+            pad_token_id=pad_token_id,
+            eos_token_id=tokenizer.eos_token_id
+        )
+
+    input_length = inputs["input_ids"].shape[1]
+    results = []
+    for item, output_ids in zip(batch, outputs):
+        generated_ids = output_ids[input_length:]
+        completion_tokens = count_completion_tokens(generated_ids, tokenizer.eos_token_id)
+        results.append({
+            "id": item["record"]["id"],
+            "prompt": item["record"].get("prompt"),
+            "response": tokenizer.decode(generated_ids, skip_special_tokens=True).strip(),
+            "prompt_tokens": item["length"],
+            "completion_tokens": completion_tokens,
+            "batch_size": len(batch),
+        })
+    return results
+
+
+def run_batch_inference(input_path, output_path, batch_size=8, window=64,
+                        max_new_tokens=300, model_name=MODEL_NAME):
+    """Stream prompts from ``input_path`` through the model into ``output_path``
+
+    Prompts are read ``window`` at a time, bucketed by token length into
+    batches of ``batch_size`` and written out as soon as each batch finishes.
+    Prompts whose id is already in ``output_path`` are skipped.
+    """
+    tokenizer, model = load_model_and_tokenizer(model_name)
+    completed = load_completed_ids(output_path)
+    if completed:
+        print(f"♻️  Resuming: {len(completed)} prompt(s) already done")
+
+    stats = {"prompts": 0, "batches": 0, "completion_tokens": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    def flush_window(pending, out):
+        for batch in bucket_by_length(pending, batch_size):
+            results = generate_batch(model, tokenizer, batch, max_new_tokens)
+            for result in results:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+            stats["batches"] += 1
+            stats["prompts"] += len(results)
+            stats["completion_tokens"] += sum(r["completion_tokens"] for r in results)
+            elapsed = time.perf_counter() - start
+            print(f"  ✅ Batch {stats['batches']}: {len(results)} prompt(s), "
+                  f"{stats['prompts'] / elapsed:.2f} prompts/s, "
+                  f"{stats['completion_tokens'] / elapsed:.1f} tokens/s")
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        pending = []
+        for record in read_prompts(input_path):
+            if record["id"] in completed:
+                stats["skipped"] += 1
+                continue
+
+            formatted_prompt = format_prompt(tokenizer, record)
+            pending.append({
+                "record": record,
+                "formatted_prompt": formatted_prompt,
+                "length": len(tokenizer(formatted_prompt)["input_ids"]),
+            })
+            if len(pending) >= window:
+                flush_window(pending, out)
+                pending = []
+
+        if pending:
+            flush_window(pending, out)
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk Qwen2.5-0.5B-Instruct inference over a JSONL prompt file")
+    parser.add_argument("input", help="JSONL file with one prompt per line")
+    parser.add_argument("output", help="JSONL file to append results to (resumed if it exists)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--window", type=int, default=64,
+                        help="Prompts read ahead and sorted by length before batching")
+    parser.add_argument("--max-new-tokens", type=int, default=300)
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    print("📚 Qwen2.5-0.5B-Instruct Batch Inference")
+    print("=" * 60)
+    print(f"Input: {args.input}  →  Output: {args.output}")
+    print(f"Batch size: {args.batch_size}, window: {args.window}, max_new_tokens: {args.max_new_tokens}")
+
+    try:
+        stats = run_batch_inference(
+            args.input,
+            args.output,
+            batch_size=args.batch_size,
+            window=max(args.window, args.batch_size),
+            max_new_tokens=args.max_new_tokens,
+            model_name=args.model
+        )
+    except Exception as e:
+        print(f"❌ Error during batch inference: {str(e)}")
+        return False
+
+    print(f"\n🎯 Done: {stats['prompts']} prompt(s) in {stats['batches']} batch(es), "
+          f"{stats['skipped']} skipped, {stats['seconds']}s")
+    print_cache_report()
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Cheap determinism checks for Qwen2.5-0.5B-Instruct
+Fingerprints a greedy generation and verifies it with one teacher-forced forward pass
+"""
+
+import hashlib
+
+import torch
+
+# The prompt set used by test_deterministic_qwen.py and the comparison reports
+DETERMINISTIC_PROMPTS = [
+    "Explain what artificial intelligence is in simple terms.",
+    "Write a short poem about the ocean.",
+    "What are the benefits of renewable energy?",
+    "Describe the process of photosynthesis.",
+]
+
+def _sha256_tensor(tensor):
+    return hashlib.sha256(tensor.detach().cpu().contiguous().numpy().tobytes()).hexdigest()
+
+
+def generate_with_fingerprint(model, tokenizer, inputs, max_new_tokens=300):
+    """Greedy-generate once and record the token IDs plus a fingerprint of every step
+
+    Returns a dict with the prompt length, generated token IDs, the per-step
+    argmax IDs and sha256 hashes of the argmax IDs and of their logit values.
+    """
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            temperature=0.0,
+            pad_token_id=tokenizer.eos_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+            output_logits=True,
+            return_dict_in_generate=True
+        )
+
+    prompt_length = inputs["input_ids"].shape[1]
+    generated_ids = outputs.sequences[0, prompt_length:]
+    step_logits = torch.stack([logits[0] for logits in outputs.logits]).float()
+    argmax_logits, argmax_ids = step_logits.max(dim=-1)
+
+    return {
+        "prompt_length": prompt_length,
+        "token_ids": generated_ids.tolist(),
+        "argmax_ids": argmax_ids.tolist(),
+        "argmax_hash": _sha256_tensor(argmax_ids),
+        "logits_hash": _sha256_tensor(argmax_logits),
+    }
+
+
+def teacher_forced_argmax(model, input_ids, generated_ids):
+    """Replay prompt + generated tokens in one forward pass
+
+    Returns ``(argmax_ids, margins)`` for every generated position, where the
+    margin is the gap between the top two logits (small margins explain
+    divergences caused by floating-point reordering rather than bugs).
+    """
+    generated = torch.as_tensor(generated_ids, dtype=input_ids.dtype, device=input_ids.device)
+    if generated.numel() == 0:
+        return [], []
+
+    sequence = torch.cat([input_ids[0], generated[:-1]]).unsqueeze(0)
+    prompt_length = input_ids.shape[1]
+
+    with torch.no_grad():
+        logits = model(input_ids=sequence).logits[0, prompt_length - 1:].float()
+
+    top2 = logits.topk(2, dim=-1).values
+    return logits.argmax(dim=-1).tolist(), (top2[:, 0] - top2[:, 1]).tolist()
+
+
+def first_divergence(expected, actual):
+    """Return the first index where two token sequences differ, or None"""
+    for position, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return position
+    if len(expected) != len(actual):
+        return min(len(expected), len(actual))
+    return None
+
+
+def verify_by_replay(model, inputs, fingerprint):
+    """Confirm a fingerprinted generation with one teacher-forced pass"""
+    replay_ids, margins = teacher_forced_argmax(model, inputs["input_ids"], fingerprint["token_ids"])
+    position = first_divergence(fingerprint["token_ids"], replay_ids)
+
+    result = {
+        "match": position is None,
+        "first_divergence": position,
+        "positions_checked": len(replay_ids),
+    }
+    if position is not None and position < len(replay_ids):
+        result["expected_token"] = fingerprint["token_ids"][position]
+        result["replayed_token"] = replay_ids[position]
+        result["logit_margin"] = margins[position]
+    return result
+
+
+def check_thread_invariance(model, inputs, fingerprint, thread_counts=None):
+    """Replay the sequence under several torch thread counts
+
+    Returns ``{thread_count: first_divergence}`` (``None`` means identical to
+    the fingerprint). The original thread count is restored afterwards.
+    """
+    original_threads = torch.get_num_threads()
+    if thread_counts is None:
+        thread_counts = sorted({1, max(1, original_threads // 2), original_threads})
+
+    results = {}
+    try:
+        for threads in thread_counts:
+            torch.set_num_threads(threads)
+            replay_ids, _ = teacher_forced_argmax(model, inputs["input_ids"], fingerprint["token_ids"])
+            results[threads] = first_divergence(fingerprint["token_ids"], replay_ids)
+    finally:
+        torch.set_num_threads(original_threads)
+
+    return results
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Golden token-ID store for Qwen2.5-0.5B-Instruct regression runs
+Unchanged entries are checked with one teacher-forced forward pass; only entries whose
+prompt, parameters or model fingerprint changed are regenerated
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import torch
+import transformers
+
+from qwen_determinism import DETERMINISTIC_PROMPTS, first_divergence, teacher_forced_argmax
+from qwen_model_loader import MODEL_NAME, describe_model, load_model_and_tokenizer
+
+DEFAULT_STORE = "golden_outputs.json"
+STORE_VERSION = 1
+
+EXTENDED_PROMPT = ("Write a detailed explanation of machine learning, including its types, "
+                   "applications, and future prospects.")
+
+# (prompt, generation parameters) pairs mirroring test_deterministic_qwen.py
+GOLDEN_SUITE = [(prompt, {"max_new_tokens": 300}) for prompt in DETERMINISTIC_PROMPTS] + [
+    (EXTENDED_PROMPT, {"max_new_tokens": 400}),
+]
+
+
+def _sha256_json(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def entry_id(prompt, params):
+    """Stable identity of a suite entry: the raw prompt and its generation parameters"""
+    return _sha256_json({"prompt": prompt, "params": params})[:16]
+
+
+def model_fingerprint(model):
+    """Hash of everything besides the prompt that can change greedy output"""
+    description = describe_model(model)
+    return _sha256_json({
+        **description,
+        "commit": getattr(model.config, "_commit_hash", None),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+    })[:16]
+
+
+def load_store(path):
+    if not os.path.exists(path):
+        return {"version": STORE_VERSION, "entries": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_store(path, store):
+    """Write the store atomically so an interrupted run never corrupts the goldens"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".golden-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(store, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def encode(tokenizer, model, prompt):
+    formatted_prompt = tokenizer.apply_chat_template(
+        [{"role": "user", "content": prompt}],
+        tokenize=False,
+        add_generation_prompt=True
+    )
+    inputs = tokenizer(formatted_prompt, return_tensors="pt")
+    if torch.cuda.is_available() and hasattr(model, 'device'):
+        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+    return inputs
+
+
+def generate_golden(model, tokenizer, inputs, params):
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            do_sample=False,
+            temperature=0.0,
+            pad_token_id=tokenizer.eos_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+            **params
+        )
+    return outputs[0, inputs["input_ids"].shape[1]:].tolist()
+
+
+def describe_divergence(tokenizer, expected, actual, position):
+    """Token-level detail of the first difference between two token sequences"""
+    return {
+        "first_divergence": position,
+        "expected_token": expected[position] if position < len(expected) else None,
+        "actual_token": actual[position] if position < len(actual) else None,
+        "context": tokenizer.decode(expected[max(0, position - 8):position], skip_special_tokens=True),
+        "expected_text": tokenizer.decode(expected[position:position + 8], skip_special_tokens=True),
+        "actual_text": tokenizer.decode(actual[position:position + 8], skip_special_tokens=True),
+    }
+
+
+def run_regression(store_path=DEFAULT_STORE, update=False, full=False, model_name=MODEL_NAME):
+    """Check every suite entry against the store and return one result per entry
+
+    * new entry: generated and recorded
+    * unchanged entry: verified by teacher-forced replay of the golden tokens
+      (one forward pass), or regenerated with ``full``; a replay mismatch is
+      confirmed by a real generation before the entry counts as diverged
+    * changed prompt tokens or model fingerprint: regenerated and diffed
+      against the previous golden, which is replaced only with ``update``
+      (or when the output is identical)
+    """
+    tokenizer, model = load_model_and_tokenizer(model_name)
+    store = load_store(store_path)
+    fingerprint = model_fingerprint(model)
+    results = []
+
+    for prompt, params in GOLDEN_SUITE:
+        key = entry_id(prompt, params)
+        inputs = encode(tokenizer, model, prompt)
+        prompt_ids = inputs["input_ids"][0].tolist()
+        prompt_hash = _sha256_json(prompt_ids)[:16]
+        golden = store["entries"].get(key)
+        result = {"id": key, "prompt": prompt, "params": params}
+        start = time.perf_counter()
+
+        if golden is not None and golden["model_fingerprint"] == fingerprint \
+                and golden["prompt_hash"] == prompt_hash and not full:
+            replay_ids, _ = teacher_forced_argmax(model, inputs["input_ids"], golden["token_ids"])
+            position = first_divergence(golden["token_ids"], replay_ids)
+            result["status"] = "verified"
+            actual = replay_ids
+            if position is not None:
+                # A replay mismatch can be a float near-tie in the batched forward pass;
+                # only a real generation decides whether the output actually changed
+                actual = generate_golden(model, tokenizer, inputs, params)
+                position = first_divergence(golden["token_ids"], actual)
+                if position is None:
+                    result["reason"] = "replay-only mismatch"
+                else:
+                    result["status"] = "diverged"
+                    if update:
+                        store["entries"][key] = dict(golden, token_ids=actual,
+                                                     text=tokenizer.decode(actual, skip_special_tokens=True).strip(),
+                                                     recorded=datetime.now(timezone.utc).isoformat())
+        else:
+            actual = generate_golden(model, tokenizer, inputs, params)
+            if golden is None:
+                result["status"] = "recorded"
+                position = None
+            else:
+                position = first_divergence(golden["token_ids"], actual)
+                result["status"] = "regenerated" if position is None else "diverged"
+                result["reason"] = ("model fingerprint changed" if golden["model_fingerprint"] != fingerprint
+                                    else "prompt tokens changed" if golden["prompt_hash"] != prompt_hash
+                                    else "full run")
+
+            if golden is None or position is None or update:
+                store["entries"][key] = {
+                    "prompt": prompt,
+                    "params": params,
+                    "prompt_hash": prompt_hash,
+                    "model_fingerprint": fingerprint,
+                    "model": describe_model(model),
+                    "token_ids": actual,
+                    "text": tokenizer.decode(actual, skip_special_tokens=True).strip(),
+                    "recorded": datetime.now(timezone.utc).isoformat(),
+                }
+
+        if position is not None:
+            result.update(describe_divergence(tokenizer, golden["token_ids"], actual, position))
+        result["seconds"] = time.perf_counter() - start
+        results.append(result)
+
+    suite_ids = {entry_id(prompt, params) for prompt, params in GOLDEN_SUITE}
+    stale = sorted(set(store["entries"]) - suite_ids)
+    if update:
+        for key in stale:
+            del store["entries"][key]
+    else:
+        results.extend({"id": key, "prompt": store["entries"][key]["prompt"], "status": "stale"}
+                       for key in stale)
+
+    store["version"] = STORE_VERSION
+    save_store(store_path, store)
+    return results
+
+
+def print_results(results):
+    icons = {"verified": "✅", "regenerated": "✅", "recorded": "🆕", "diverged": "❌", "stale": "🗑️"}
+    for result in results:
+        line = f"  {icons[result['status']]} {result['status']:<11} {result['prompt'][:50]}"
+        if "seconds" in result:
+            line += f" ({result['seconds']:.2f}s)"
+        if result.get("reason"):
+            line += f" [{result['reason']}]"
+        print(line)
+        if result["status"] == "diverged":
+            print(f"      first divergent token: {result['first_divergence']} "
+                  f"(golden {result['expected_token']}, now {result['actual_token']})")
+            print(f"      ...{result['context']!r} → golden {result['expected_text']!r} / now {result['actual_text']!r}")
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print("\n  " + ", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Qwen2.5-0.5B-Instruct output against stored goldens")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--update", action="store_true",
+                        help="Accept divergent outputs as the new goldens and drop stale entries")
+    parser.add_argument("--full", action="store_true",
+                        help="Regenerate every entry instead of verifying unchanged ones by replay")
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    print("🥇 Qwen2.5-0.5B-Instruct Golden Output Regression")
+    print("=" * 60)
+
+    try:
+        results = run_regression(args.store, update=args.update, full=args.full, model_name=args.model)
+    except Exception as e:
+        print(f"❌ Error during golden regression run: {str(e)}")
+        return False
+
+    print_results(results)
+    print(f"\n💾 Goldens: {args.store}")
+    return args.update or not any(result["status"] == "diverged" for result in results)
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Shared loader for the Qwen2.5-0.5B-Instruct model and tokenizer
+Keeps one copy of each (model, dtype, device, revision, quantization, attention) per process
+"""
+
+import os
+import sys
+import time
+
+from transformers import AutoTokenizer, AutoModelForCausalLM
+import torch
+
+MODEL_NAME = "Qwen/Qwen2.5-0.5B-Instruct"
+
+# Supported values for load_model_and_tokenizer(quantization=...)
+QUANTIZATION_MODES = ("int8",)
+
+# Process-wide cache: key -> {"tokenizer", "model", "load_seconds", ...}
+_MODEL_CACHE = {}
+
+
+def current_rss_bytes():
+    """Return the resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of this process in bytes (0 if unknown)"""
+    try:
+        import resource
+    except ImportError:
+        return current_rss_bytes()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def default_dtype():
+    """Pick the dtype the test scripts have always used"""
+    return torch.float16 if torch.cuda.is_available() else torch.float32
+
+
+def default_device():
+    """Pick the device the test scripts have always used"""
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _cache_key(model_name, dtype, device, revision, quantization=None, attn_implementation=None):
+    return (model_name, str(dtype).replace("torch.", ""), device, revision or "main", quantization or "none",
+            attn_implementation or "default")
+
+
+def quantize_int8(model):
+    """Dynamically quantize the decoder's nn.Linear layers to int8 (CPU only)
+
+    Weights are stored as int8 and activations are quantized on the fly.
+    ``lm_head`` stays in float32 so the final logits (and greedy argmax)
+    keep full precision.
+    """
+    qconfig_spec = {
+        name: torch.ao.quantization.default_dynamic_qconfig
+        for name, module in model.named_modules()
+        if isinstance(module, torch.nn.Linear) and name != "lm_head"
+    }
+    return torch.ao.quantization.quantize_dynamic(model, qconfig_spec, dtype=torch.qint8, inplace=True)
+
+
+def load_model_and_tokenizer(model_name=MODEL_NAME, dtype=None, device=None, revision=None,
+                             quantization=None, attn_implementation=None):
+    """Load (or reuse) the tokenizer and model for the given configuration
+
+    Returns a ``(tokenizer, model)`` tuple. The first call for a given
+    (model name, dtype, device, revision, quantization, attention
+    implementation) loads from Hugging Face; every later call in the same
+    process returns the same objects. ``quantization="int8"`` loads float32
+    weights on CPU and quantizes them; ``attn_implementation`` (e.g. "sdpa"
+    or "eager") is passed through to ``from_pretrained``.
+    """
+    if quantization is not None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATION_MODES}")
+        # Dynamic quantization runs on CPU kernels from float32 weights
+        dtype, device = torch.float32, "cpu"
+
+    dtype = dtype or default_dtype()
+    device = device or default_device()
+    key = _cache_key(model_name, dtype, device, revision, quantization, attn_implementation)
+    label = f"{model_name} ({key[1]}, {device}, quantization={key[4]}, attention={key[5]})"
+
+    entry = _MODEL_CACHE.get(key)
+    if entry is not None:
+        entry["hits"] += 1
+        print(f"♻️  Reusing cached model: {label}")
+        return entry["tokenizer"], entry["model"]
+
+    print(f"Loading tokenizer and model: {label}")
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+    extra_kwargs = {"attn_implementation": attn_implementation} if attn_implementation else {}
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        revision=revision,
+        torch_dtype=dtype,
+        device_map="auto" if device == "cuda" else None,
+        **extra_kwargs
+    )
+    model.eval()
+    if quantization == "int8":
+        model = quantize_int8(model)
+
+    load_seconds = time.perf_counter() - start
+    rss_after = current_rss_bytes()
+
+    _MODEL_CACHE[key] = {
+        "tokenizer": tokenizer,
+        "model": model,
+        "load_seconds": load_seconds,
+        "rss_before": rss_before,
+        "rss_after": rss_after,
+        "hits": 0,
+    }
+
+    print(f"✅ Loaded in {load_seconds:.2f}s (RSS +{(rss_after - rss_before) / 2**20:.1f} MiB)")
+    return tokenizer, model
+
+
+def get_cache_report():
+    """Return load time and resident memory for every cached entry"""
+    report = []
+    for (model_name, dtype, device, revision, quantization, attention), entry in _MODEL_CACHE.items():
+        report.append({
+            "model": model_name,
+            "dtype": dtype,
+            "device": device,
+            "revision": revision,
+            "quantization": quantization,
+            "attn_implementation": attention,
+            "load_seconds": round(entry["load_seconds"], 3),
+            "rss_delta_bytes": entry["rss_after"] - entry["rss_before"],
+            "rss_after_bytes": entry["rss_after"],
+            "hits": entry["hits"],
+        })
+    return report
+
+
+def print_cache_report():
+    """Print a short summary of the model cache"""
+    report = get_cache_report()
+    print("\n📦 Model cache:")
+    if not report:
+        print("  ℹ️ No models loaded")
+        return
+
+    for entry in report:
+        print(f"  • {entry['model']}@{entry['revision']} "
+              f"[{entry['dtype']}, {entry['device']}, quantization={entry['quantization']}, "
+              f"attention={entry['attn_implementation']}]")
+        print(f"    Load time: {entry['load_seconds']:.2f}s, "
+              f"RSS delta: {entry['rss_delta_bytes'] / 2**20:.1f} MiB, "
+              f"reuses: {entry['hits']}")
+    print(f"  Process RSS: {current_rss_bytes() / 2**20:.1f} MiB "
+          f"(peak {peak_rss_bytes() / 2**20:.1f} MiB)")
+
+
+def describe_model(model):
+    """Return the loader configuration a model object was loaded with
+
+    Models that did not come from ``load_model_and_tokenizer`` are described
+    from their config as far as possible.
+    """
+    for (model_name, dtype, device, revision, quantization, attention), entry in _MODEL_CACHE.items():
+        if entry["model"] is model:
+            return {"model": model_name, "dtype": dtype, "device": device, "revision": revision,
+                    "quantization": quantization, "attn_implementation": attention}
+    return {
+        "model": getattr(model.config, "_name_or_path", type(model).__name__),
+        "dtype": str(model.dtype).replace("torch.", ""),
+        "device": str(model.device),
+        "revision": getattr(model.config, "_commit_hash", None) or "main",
+        "quantization": "unknown",
+        "attn_implementation": getattr(model.config, "_attn_implementation", None) or "default",
+    }
+
+
+def clear_model_cache():
+    """Drop every cached model so its memory can be reclaimed"""
+    _MODEL_CACHE.clear()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+if __name__ == "__main__":
+    load_model_and_tokenizer()
+    load_model_and_tokenizer()
+    print_cache_report()
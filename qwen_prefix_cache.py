@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+KV-cache reuse for the chat-template prefix shared by every Qwen prompt
+The system-prompt prefix is prefilled once and its past_key_values copied into each generation
+"""
+
+import copy
+import threading
+import time
+import weakref
+
+import torch
+
+# One prefix cache per loaded model; entries go away with the model
+_PREFIX_CACHES = weakref.WeakKeyDictionary()
+_PREFIX_CACHES_LOCK = threading.Lock()
+
+
+def common_prefix_ids(tokenizer):
+    """Return the token IDs every single-turn chat prompt starts with
+
+    Two different user messages are run through the chat template; their
+    longest common token prefix is the system prompt plus the user header.
+    """
+    token_lists = []
+    for content in ("a", "Zebra 42?"):
+        formatted = tokenizer.apply_chat_template(
+            [{"role": "user", "content": content}],
+            tokenize=False,
+            add_generation_prompt=True
+        )
+        token_lists.append(tokenizer(formatted)["input_ids"])
+
+    prefix = []
+    for a, b in zip(*token_lists):
+        if a != b:
+            break
+        prefix.append(a)
+    return prefix
+
+
+class PrefixCache:
+    """Precomputed past_key_values for a fixed token prefix"""
+
+    def __init__(self, model, prefix_ids):
+        self.prefix_ids = torch.tensor([prefix_ids], dtype=torch.long, device=model.device)
+        self.past_key_values = None
+        self.prefill_seconds = 0.0
+        self.stats = {"hits": 0, "misses": 0, "saved_tokens": 0, "saved_seconds": 0.0}
+        self.lock = threading.Lock()
+
+        if prefix_ids:
+            start = time.perf_counter()
+            with torch.no_grad():
+                outputs = model(input_ids=self.prefix_ids, use_cache=True)
+            self.past_key_values = outputs.past_key_values
+            self.prefill_seconds = time.perf_counter() - start
+
+    @property
+    def length(self):
+        return self.prefix_ids.shape[1]
+
+    def matches(self, input_ids):
+        """True when a single prompt starts with (and extends past) the cached prefix"""
+        return (
+            self.past_key_values is not None
+            and input_ids.shape[0] == 1
+            and input_ids.shape[1] > self.length
+            and torch.equal(input_ids[:, :self.length], self.prefix_ids.to(input_ids.device))
+        )
+
+    def generate(self, model, inputs, **generate_kwargs):
+        """Drop-in replacement for ``model.generate(**inputs, ...)``
+
+        Prompts that start with the cached prefix only prefill their suffix;
+        anything else (batches, other templates) is generated normally.
+        """
+        if not self.matches(inputs["input_ids"]):
+            with self.lock:
+                self.stats["misses"] += 1
+            return model.generate(**inputs, **generate_kwargs)
+
+        start = time.perf_counter()
+        # generate() appends to the cache in place, so each call needs its own copy
+        past_key_values = copy.deepcopy(self.past_key_values)
+        copy_seconds = time.perf_counter() - start
+
+        with self.lock:
+            self.stats["hits"] += 1
+            self.stats["saved_tokens"] += self.length
+            self.stats["saved_seconds"] += self.prefill_seconds - copy_seconds
+        return model.generate(**inputs, past_key_values=past_key_values, **generate_kwargs)
+
+
+def get_prefix_cache(model, tokenizer):
+    """Return the process-wide prefix cache for ``model``, building it on first use
+
+    Safe to call from several threads: the prefix is prefilled only once.
+    """
+    with _PREFIX_CACHES_LOCK:
+        cache = _PREFIX_CACHES.get(model)
+        if cache is not None:
+            return cache
+        cache = PrefixCache(model, common_prefix_ids(tokenizer))
+        _PREFIX_CACHES[model] = cache
+    print(f"🧠 Cached chat-template prefix: {cache.length} tokens "
+          f"(prefill {cache.prefill_seconds * 1000:.1f} ms)")
+    return cache
+
+
+def print_prefix_cache_report():
+    """Print how much prefill work the prefix caches saved"""
+    print("\n🧠 Prefix KV cache:")
+    with _PREFIX_CACHES_LOCK:
+        caches = list(_PREFIX_CACHES.values())
+    if not caches:
+        print("  ℹ️ No prefix caches built")
+        return
+
+    for cache in caches:
+        with cache.lock:
+            stats = dict(cache.stats)
+        net_seconds = stats['saved_seconds'] - cache.prefill_seconds
+        print(f"  • Prefix length: {cache.length} tokens, "
+              f"hits: {stats['hits']}, misses: {stats['misses']}")
+        print(f"    Prefill tokens saved: {stats['saved_tokens']}, "
+              f"time saved: {stats['saved_seconds']:.3f}s "
+              f"({net_seconds:.3f}s net of the one-off prefix prefill)")
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of deterministic (temperature 0) Qwen2.5-0.5B-Instruct generations
+Keyed on a canonical hash of the model configuration, prompt tokens and generation
+parameters, with an in-memory LRU in front of a size-bounded on-disk store
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+import transformers
+
+from qwen_model_loader import describe_model
+
+
+def default_cache_dir():
+    """``$XDG_CACHE_HOME/webllm/responses`` (``~/.cache`` by default)
+
+    Kept outside ``.webllm_cache``, which the stop scripts treat as scratch
+    space, so entries survive across runs.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "webllm", "responses")
+
+
+DEFAULT_CACHE_DIR = default_cache_dir()
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BUDGET = 64 * 1024 * 1024
+
+# Bumped whenever the entry format or the key fields change
+CACHE_FORMAT_VERSION = 2
+
+_RESPONSE_CACHE = None
+
+
+def _canonical(value):
+    """Return ``value`` as plain JSON data, or raise TypeError if it has no stable form"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    raise TypeError(f"{type(value).__name__} is not cacheable")
+
+
+class ResponseCache:
+    """Disk-backed cache of greedy generations
+
+    An entry stores the generated token IDs for one (model, resolved commit, dtype,
+    quantization, attention implementation, prompt token IDs, generation
+    parameters, torch/transformers version) tuple. Library versions are part
+    of the key because kernel changes can legitimately change greedy output.
+    The disk store evicts least-recently-used entries (by mtime, refreshed on
+    every hit) once ``disk_budget`` bytes are exceeded.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 disk_budget=DEFAULT_DISK_BUDGET, enabled=True):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.disk_budget = disk_budget
+        self.enabled = enabled
+        self.memory = OrderedDict()
+        self.disk_bytes = None
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0,
+                      "evictions": 0, "write_errors": 0, "saved_seconds": 0.0}
+
+    @property
+    def hits(self):
+        return self.stats["memory_hits"] + self.stats["disk_hits"]
+
+    def key(self, model, input_ids, generate_kwargs):
+        """Canonical sha256 of everything that determines a greedy generation"""
+        description = describe_model(model)
+        payload = {
+            "version": CACHE_FORMAT_VERSION,
+            "model": description,
+            # The loader's revision is often just a ref ("main") that moves; the
+            # resolved commit pins the weights actually loaded
+            "commit": getattr(model.config, "_commit_hash", None) or description["revision"],
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "input_ids": input_ids[0].tolist(),
+            "generate_kwargs": _canonical(generate_kwargs),
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        """Return a cached entry (``{"token_ids", "seconds", ...}``) or None"""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # read-only store: the entry is still valid, only its LRU age is not refreshed
+
+        with self.lock:
+            self.stats["disk_hits"] += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry; returns False if the disk store could not be written
+
+        A read-only or full cache directory must not turn a finished
+        generation into an error, so failures are only counted in ``stats``.
+        """
+        self._remember(key, entry)
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".entry-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            tmp_path = None
+
+            with self.lock:
+                self.stats["stores"] += 1
+                if self.disk_bytes is not None:
+                    self.disk_bytes += os.path.getsize(path)
+            self._enforce_disk_budget()
+        except OSError:
+            with self.lock:
+                self.stats["write_errors"] += 1
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return False
+        return True
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def _disk_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat_result = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat_result.st_mtime, stat_result.st_size, path))
+        return entries
+
+    def _enforce_disk_budget(self):
+        with self.lock:
+            # The directory is only walked once per process, or again when over budget
+            if self.disk_bytes is not None and self.disk_bytes <= self.disk_budget:
+                return
+            entries = self._disk_entries()
+            self.disk_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if self.disk_bytes <= self.disk_budget:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                self.disk_bytes -= size
+                self.stats["evictions"] += 1
+                self.memory.pop(os.path.basename(path)[:-len(".json")], None)
+
+    def cacheable(self, inputs, generate_kwargs):
+        """True for enabled, single-prompt, greedy calls with plain-data parameters"""
+        if not self.enabled or inputs["input_ids"].shape[0] != 1 or generate_kwargs.get("do_sample"):
+            return False
+        try:
+            _canonical(generate_kwargs)
+        except TypeError:
+            return False
+        return True
+
+    def generate(self, model, inputs, generator=None, **generate_kwargs):
+        """Drop-in replacement for ``model.generate(**inputs, ...)``
+
+        Misses are generated by ``generator.generate(model, inputs, ...)``
+        (e.g. a PrefixCache) or by ``model.generate``. Sampling, batches and
+        calls with object arguments such as streamers bypass the cache.
+        """
+        def run():
+            if generator is not None:
+                return generator.generate(model, inputs, **generate_kwargs)
+            return model.generate(**inputs, **generate_kwargs)
+
+        if not self.cacheable(inputs, generate_kwargs):
+            self.stats["bypassed"] += 1
+            return run()
+
+        input_ids = inputs["input_ids"]
+        key = self.key(model, input_ids, generate_kwargs)
+        entry = self.get(key)
+        if entry is not None:
+            self.stats["saved_seconds"] += entry["seconds"]
+            completion = torch.tensor([entry["token_ids"]], dtype=input_ids.dtype, device=input_ids.device)
+            return torch.cat([input_ids, completion], dim=1)
+
+        self.stats["misses"] += 1
+        start = time.perf_counter()
+        outputs = run()
+        # put() reports a failed disk write in stats instead of raising, so the
+        # finished generation is returned either way
+        self.put(key, {
+            "token_ids": outputs[0, input_ids.shape[1]:].tolist(),
+            "seconds": time.perf_counter() - start,
+            "created": time.time(),
+        })
+        return outputs
+
+
+def get_response_cache():
+    """Return the process-wide response cache
+
+    Setting ``QWEN_RESPONSE_CACHE=off`` in the environment disables it. The
+    test scripts only consult it when asked to (``--response-cache``,
+    ``--cached``), so a plain run always exercises the model.
+    """
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None:
+        _RESPONSE_CACHE = ResponseCache(enabled=os.environ.get("QWEN_RESPONSE_CACHE", "on") != "off")
+    return _RESPONSE_CACHE
+
+
+def print_response_cache_report():
+    """Print hit/miss statistics of the response cache"""
+    print("\n💾 Response cache:")
+    if _RESPONSE_CACHE is None:
+        print("  ℹ️ Not used")
+        return
+    if not _RESPONSE_CACHE.enabled:
+        print("  ℹ️ Bypassed (QWEN_RESPONSE_CACHE=off)")
+        return
+
+    stats = _RESPONSE_CACHE.stats
+    hits = _RESPONSE_CACHE.hits
+    lookups = hits + stats["misses"]
+    print(f"  • Hits: {hits} (memory {stats['memory_hits']}, disk {stats['disk_hits']}), "
+          f"misses: {stats['misses']}, bypassed: {stats['bypassed']}"
+          + (f", hit rate {hits / lookups:.0%}" if lookups else ""))
+    print(f"    Generation time saved: {stats['saved_seconds']:.2f}s, "
+          f"stored: {stats['stores']}, evicted: {stats['evictions']} ({_RESPONSE_CACHE.cache_dir})")
+    if stats["write_errors"]:
+        print(f"    ⚠️ {stats['write_errors']} entr{'y' if stats['write_errors'] == 1 else 'ies'} "
+              f"could not be written to disk (kept in memory only)")
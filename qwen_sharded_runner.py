@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Multi-process sharded runner for Qwen2.5-0.5B-Instruct on many-core CPUs
+Loads the model once, forks workers that share its weights copy-on-write, pins each
+worker to its own cores and merges results in input order
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+import torch
+
+from qwen_batch_inference import format_prompt, read_prompts
+from qwen_determinism import DETERMINISTIC_PROMPTS
+from qwen_model_loader import MODEL_NAME, current_rss_bytes, load_model_and_tokenizer
+
+# Set in the parent before forking; children inherit the loaded model through fork
+_WORKER_STATE = {}
+
+
+def private_bytes():
+    """Bytes of memory private to this process (0 if unknown)
+
+    Pages still shared copy-on-write with the parent are excluded, so this
+    shows how much of the model a worker actually duplicated.
+    """
+    try:
+        total = 0
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    total += int(line.split()[1]) * 1024
+        return total
+    except (OSError, ValueError):
+        return 0
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(cores, workers):
+    """Give each worker a contiguous, equally sized slice of the available cores"""
+    per_worker = max(1, len(cores) // workers)
+    return [cores[(i * per_worker) % len(cores):(i * per_worker) % len(cores) + per_worker]
+            for i in range(workers)]
+
+
+def worker_main(worker_index, cores, threads, tasks, results):
+    """Pin to ``cores``, then generate prompts from ``tasks`` until a None sentinel"""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads or len(cores))
+
+    model = _WORKER_STATE["model"]
+    tokenizer = _WORKER_STATE["tokenizer"]
+    max_new_tokens = _WORKER_STATE["max_new_tokens"]
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        index, record, formatted_prompt = task
+        start = time.perf_counter()
+        inputs = tokenizer(formatted_prompt, return_tensors="pt")
+        with torch.no_grad():
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                temperature=0.0,
+                pad_token_id=tokenizer.eos_token_id,
+                eos_token_id=tokenizer.eos_token_id
+            )
+        generated_ids = outputs[0, inputs["input_ids"].shape[1]:]
+        results.put((index, {
+            "id": record["id"],
+            "prompt": record.get("prompt"),
+            "response": tokenizer.decode(generated_ids, skip_special_tokens=True).strip(),
+            "completion_tokens": len(generated_ids),
+            "worker": worker_index,
+            "seconds": time.perf_counter() - start,
+        }))
+
+    results.put(("done", {"worker": worker_index, "private_bytes": private_bytes(),
+                          "rss_bytes": current_rss_bytes()}))
+
+
+def run_sharded(records, workers, max_new_tokens=300, threads_per_worker=None, model_name=MODEL_NAME):
+    """Generate every record with ``workers`` forked processes
+
+    Returns ``(results, stats)``; results are in input order no matter which
+    worker finished first.
+    """
+    tokenizer, model = load_model_and_tokenizer(model_name, device="cpu")
+    _WORKER_STATE.update(model=model, tokenizer=tokenizer, max_new_tokens=max_new_tokens)
+
+    context = multiprocessing.get_context("fork")
+    tasks, results = context.Queue(), context.Queue()
+    for index, record in enumerate(records):
+        tasks.put((index, record, format_prompt(tokenizer, record)))
+    for _ in range(workers):
+        tasks.put(None)
+
+    core_sets = split_cores(available_cores(), workers)
+    start = time.perf_counter()
+    processes = [
+        context.Process(target=worker_main, args=(i, core_sets[i], threads_per_worker, tasks, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    merged, worker_stats = {}, []
+    while len(worker_stats) < workers:
+        try:
+            index, result = results.get(timeout=5)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                raise RuntimeError("all workers exited before finishing")
+            continue
+        if index == "done":
+            worker_stats.append(result)
+        else:
+            merged[index] = result
+    elapsed = time.perf_counter() - start
+
+    for process in processes:
+        process.join()
+    if len(merged) != len(records):
+        raise RuntimeError(f"only {len(merged)} of {len(records)} prompts completed")
+
+    ordered = [merged[index] for index in range(len(records))]
+    completion_tokens = sum(result["completion_tokens"] for result in ordered)
+    return ordered, {
+        "workers": workers,
+        "cores_per_worker": len(core_sets[0]),
+        "threads_per_worker": threads_per_worker or len(core_sets[0]),
+        "seconds": elapsed,
+        "prompts_per_second": len(ordered) / elapsed,
+        "tokens_per_second": completion_tokens / elapsed,
+        "parent_rss_bytes": current_rss_bytes(),
+        "worker_private_bytes": sorted(stats["private_bytes"] for stats in worker_stats),
+    }
+
+
+def default_records(repeat):
+    return [{"id": f"{i}-{j}", "prompt": prompt}
+            for i in range(repeat) for j, prompt in enumerate(DETERMINISTIC_PROMPTS)]
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shard Qwen2.5-0.5B-Instruct generation across forked workers")
+    parser.add_argument("--input", default=None, help="JSONL prompt file (default: the deterministic prompts)")
+    parser.add_argument("--output", default=None, help="JSONL file for the merged results of the last level")
+    parser.add_argument("--workers", type=parse_int_list, default=None,
+                        help="Comma-separated worker counts to measure (default: 1,2,4,... up to the cores)")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Torch threads per worker (default: its share of the cores)")
+    parser.add_argument("--repeat", type=int, default=4, help="Copies of the default prompt set")
+    parser.add_argument("--max-new-tokens", type=int, default=300)
+    parser.add_argument("--report", default="sharded_runner_report.json")
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    print("🧵 Qwen2.5-0.5B-Instruct Sharded Runner")
+    print("=" * 60)
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        print("❌ The sharded runner needs fork() to share weights copy-on-write (Linux/macOS)")
+        return False
+
+    cores = available_cores()
+    worker_counts = args.workers or [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= len(cores)]
+    records = list(read_prompts(args.input)) if args.input else default_records(args.repeat)
+    print(f"Cores: {len(cores)}, prompts: {len(records)}, worker counts: {worker_counts}")
+
+    levels, reference, results = [], None, []
+    try:
+        for workers in worker_counts:
+            results, stats = run_sharded(records, workers, args.max_new_tokens, args.threads_per_worker,
+                                         args.model)
+            responses = [result["response"] for result in results]
+            reference = reference or responses
+            stats["identical_to_first_level"] = responses == reference
+            levels.append(stats)
+    except Exception as e:
+        print(f"❌ Error during sharded run: {str(e)}")
+        return False
+
+    baseline = levels[0]["tokens_per_second"] / levels[0]["workers"]
+    print(f"\n📊 Scaling ({args.max_new_tokens} max new tokens)")
+    print(f"  {'workers':>7} {'cores/w':>7} {'prompts/s':>10} {'tokens/s':>9} {'speedup':>8} "
+          f"{'efficiency':>10} {'private MiB/w':>13} {'same':>5}")
+    for stats in levels:
+        stats["speedup"] = stats["tokens_per_second"] / levels[0]["tokens_per_second"]
+        stats["scaling_efficiency"] = stats["tokens_per_second"] / (baseline * stats["workers"])
+        private_mib = max(stats["worker_private_bytes"] or [0]) / 2**20
+        print(f"  {stats['workers']:>7} {stats['cores_per_worker']:>7} {stats['prompts_per_second']:>10.2f} "
+              f"{stats['tokens_per_second']:>9.1f} {stats['speedup']:>7.2f}x "
+              f"{stats['scaling_efficiency']:>10.0%} {private_mib:>13.0f} "
+              f"{'✅' if stats['identical_to_first_level'] else '⚠️':>5}")
+
+    with open(args.report, "w") as f:
+        json.dump({"model": args.model, "cores": len(cores), "prompts": len(records),
+                   "max_new_tokens": args.max_new_tokens, "levels": levels}, f, indent=2)
+    print(f"\n💾 Report saved to {args.report}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            for result in results:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        print(f"💾 Results saved to {args.output}")
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Greedy speculative decoding for Qwen2.5-0.5B-Instruct
+Drafts come from n-gram prompt lookup or a cheaper draft model; the full model verifies
+every draft in one forward pass, so the output is the model's own greedy output
+"""
+
+import time
+
+import torch
+from transformers import DynamicCache
+
+
+class PromptLookupDrafter:
+    """Propose the tokens that followed the most recent earlier match of the trailing n-gram
+
+    Costs no model calls, and pays off whenever the response repeats spans
+    of the prompt or of itself (lists, code, restated questions).
+    """
+
+    name = "prompt-lookup"
+
+    def __init__(self, num_tokens=10, max_ngram=3, min_ngram=1):
+        self.num_tokens = num_tokens
+        self.max_ngram = max_ngram
+        self.min_ngram = min_ngram
+
+    def propose(self, context, limit):
+        limit = min(limit, self.num_tokens)
+        for n in range(min(self.max_ngram, len(context) - 1), self.min_ngram - 1, -1):
+            tail = context[-n:]
+            # Latest match first: recent text is the best predictor of what comes next
+            for start in range(len(context) - n - 1, -1, -1):
+                if context[start:start + n] == tail:
+                    return context[start + n:start + n + limit]
+        return []
+
+
+class DraftModelDrafter:
+    """Propose tokens by greedy decoding with a cheaper model sharing the tokenizer
+
+    The draft model keeps its own KV cache; after each verification it is
+    cropped back to the longest prefix still consistent with the accepted text.
+    """
+
+    name = "draft-model"
+
+    def __init__(self, draft_model, num_tokens=4):
+        self.model = draft_model
+        self.num_tokens = num_tokens
+        self.cache = DynamicCache()
+        self.cached_ids = []
+
+    def reset(self):
+        self.cache = DynamicCache()
+        self.cached_ids = []
+
+    def propose(self, context, limit):
+        limit = min(limit, self.num_tokens)
+        if limit <= 0:
+            return []
+
+        common = 0
+        for a, b in zip(self.cached_ids, context):
+            if a != b:
+                break
+            common += 1
+        # Always leave at least the last context token to feed, so there are logits to draft from
+        common = min(common, len(context) - 1)
+        self.cache.crop(common)
+        self.cached_ids = self.cached_ids[:common]
+
+        draft = []
+        feed = context[common:]
+        with torch.no_grad():
+            for _ in range(limit):
+                input_ids = torch.tensor([feed], device=self.model.device)
+                logits = self.model(input_ids=input_ids, past_key_values=self.cache, use_cache=True).logits
+                self.cached_ids.extend(feed)
+                token = int(logits[0, -1].argmax())
+                draft.append(token)
+                feed = [token]
+        return draft
+
+
+def speculative_generate(model, tokenizer, inputs, drafter, max_new_tokens=300, eos_token_id=None):
+    """Greedy-generate with speculative drafts and return ``(token_ids, stats)``
+
+    Each round feeds the last token plus the draft to the full model, keeps
+    the drafted tokens that match its argmax and appends the model's own next
+    token, so every round yields at least one token. ``stats`` counts full
+    model forward passes, drafted and accepted tokens.
+    """
+    eos_token_id = tokenizer.eos_token_id if eos_token_id is None else eos_token_id
+    input_ids = inputs["input_ids"]
+    prompt = input_ids[0].tolist()
+    if hasattr(drafter, "reset"):
+        drafter.reset()
+
+    start = time.perf_counter()
+    cache = DynamicCache()
+    with torch.no_grad():
+        logits = model(input_ids=input_ids, past_key_values=cache, use_cache=True).logits
+    generated = [int(logits[0, -1].argmax())]
+    stats = {"target_forward_passes": 1, "drafted_tokens": 0, "accepted_tokens": 0}
+
+    # Invariant: the cache holds prompt + generated[:-1]; generated[-1] is not fed yet
+    while len(generated) < max_new_tokens and generated[-1] != eos_token_id:
+        context = prompt + generated
+        draft = drafter.propose(context, max_new_tokens - len(generated) - 1)
+
+        verify_ids = torch.tensor([[generated[-1]] + draft], device=input_ids.device)
+        with torch.no_grad():
+            logits = model(input_ids=verify_ids, past_key_values=cache, use_cache=True).logits
+        predictions = logits[0].argmax(dim=-1).tolist()
+        stats["target_forward_passes"] += 1
+
+        accepted = 0
+        while accepted < len(draft) and draft[accepted] == predictions[accepted]:
+            accepted += 1
+        stats["drafted_tokens"] += len(draft)
+        stats["accepted_tokens"] += accepted
+
+        # Drop the cache entries of rejected draft tokens
+        cache.crop(len(context) + accepted)
+        for token in draft[:accepted] + [predictions[accepted]]:
+            generated.append(token)
+            if token == eos_token_id or len(generated) >= max_new_tokens:
+                break
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["completion_tokens"] = len(generated)
+    stats["acceptance_rate"] = (stats["accepted_tokens"] / stats["drafted_tokens"]
+                                if stats["drafted_tokens"] else None)
+    stats["tokens_per_forward_pass"] = len(generated) / stats["target_forward_passes"]
+    return generated, stats
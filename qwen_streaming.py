@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Streaming generation for Qwen2.5-0.5B-Instruct with latency metrics
+Yields text as tokens are produced and records TTFT, prefill time and inter-token latency
+"""
+
+import threading
+import time
+
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+import torch
+
+from perf_stats import summarize
+from qwen_prefix_cache import get_prefix_cache
+
+
+class TimingStreamer(TextIteratorStreamer):
+    """TextIteratorStreamer that timestamps the prompt and every generated token"""
+
+    def __init__(self, tokenizer, **kwargs):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True, **kwargs)
+        self.prompt_time = None
+        self.token_times = []
+        self.last_token_id = None
+
+    def put(self, value):
+        now = time.perf_counter()
+        if self.next_tokens_are_prompt:
+            self.prompt_time = now
+        else:
+            self.token_times.extend([now] * value.numel())
+            if value.numel():
+                self.last_token_id = int(value.reshape(-1)[-1])
+        super().put(value)
+
+
+class StopOnEvent(StoppingCriteria):
+    """Stop generation as soon as a threading.Event is set (e.g. client went away)"""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.event.is_set()
+
+
+def stream_generate(model, tokenizer, inputs, max_new_tokens=300, metrics=None, use_prefix_cache=True,
+                    stop_event=None, **generate_kwargs):
+    """Generate greedily and yield decoded text chunks as they are produced
+
+    ``metrics`` (a dict, if given) is filled in once the stream is exhausted
+    with the values from :func:`summarize_stream`. Setting ``stop_event`` ends
+    generation early; extra keyword arguments override the greedy settings.
+    """
+    streamer = TimingStreamer(tokenizer)
+    generation_kwargs = dict(
+        max_new_tokens=max_new_tokens,
+        do_sample=False,
+        temperature=0.0,
+        pad_token_id=tokenizer.eos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        streamer=streamer
+    )
+    generation_kwargs.update(generate_kwargs)
+    if stop_event is not None:
+        generation_kwargs["stopping_criteria"] = StoppingCriteriaList([StopOnEvent(stop_event)])
+    errors = []
+
+    def run():
+        try:
+            with torch.no_grad():
+                if use_prefix_cache:
+                    get_prefix_cache(model, tokenizer).generate(model, inputs, **generation_kwargs)
+                else:
+                    model.generate(**inputs, **generation_kwargs)
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    start = time.perf_counter()
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+
+    for text in streamer:
+        if text:
+            yield text
+
+    worker.join()
+    end = time.perf_counter()
+    if errors:
+        raise errors[0]
+
+    if metrics is not None:
+        metrics.update(summarize_stream(start, end, streamer))
+        metrics["finish_reason"] = finish_reason(streamer, generation_kwargs["eos_token_id"], max_new_tokens)
+
+
+def finish_reason(streamer, eos_token_id, max_new_tokens):
+    """``"length"`` when generation hit ``max_new_tokens`` without emitting EOS, else ``"stop"``"""
+    eos_ids = eos_token_id if isinstance(eos_token_id, (list, tuple)) else [eos_token_id]
+    if streamer.last_token_id in eos_ids or len(streamer.token_times) < max_new_tokens:
+        return "stop"
+    return "length"
+
+
+def summarize_stream(start, end, streamer):
+    """Turn the timestamps collected by a TimingStreamer into a metrics dict"""
+    token_times = streamer.token_times
+    metrics = {
+        "total_seconds": end - start,
+        "completion_tokens": len(token_times),
+        "ttft_seconds": None,
+        "prefill_seconds": None,
+        "decode_tokens_per_second": None,
+        "inter_token_latency_ms": {"count": 0},
+    }
+    if not token_times:
+        return metrics
+
+    metrics["ttft_seconds"] = token_times[0] - start
+    if streamer.prompt_time is not None:
+        metrics["prefill_seconds"] = token_times[0] - streamer.prompt_time
+
+    gaps = [(b - a) * 1000 for a, b in zip(token_times, token_times[1:])]
+    metrics["inter_token_latency_ms"] = summarize(gaps)
+    decode_seconds = token_times[-1] - token_times[0]
+    if decode_seconds > 0:
+        metrics["decode_tokens_per_second"] = (len(token_times) - 1) / decode_seconds
+
+    return metrics
+
+
+def print_stream_metrics(metrics):
+    """Print a short summary of a streamed generation"""
+    def fmt(value, scale=1.0, unit=""):
+        return "n/a" if value is None else f"{value * scale:.1f}{unit}"
+
+    itl = metrics["inter_token_latency_ms"]
+    print("\n⏱️ Streaming metrics:")
+    print(f"  Time to first token: {fmt(metrics['ttft_seconds'], 1000, ' ms')}")
+    print(f"  Prefill duration:    {fmt(metrics['prefill_seconds'], 1000, ' ms')}")
+    print(f"  Completion tokens:   {metrics['completion_tokens']} in {metrics['total_seconds']:.2f}s")
+    print(f"  Decode throughput:   {fmt(metrics['decode_tokens_per_second'], 1, ' tokens/s')}")
+    if itl["count"]:
+        print(f"  Inter-token latency: p50 {itl['p50']:.1f} ms, p90 {itl['p90']:.1f} ms, "
+              f"p99 {itl['p99']:.1f} ms, max {itl['max']:.1f} ms")
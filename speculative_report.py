@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Speculative decoding report for Qwen2.5-0.5B-Instruct
+Per prompt acceptance rate and speedup of prompt-lookup and draft-model decoding over
+plain greedy generate, and confirmation that the output is token-for-token identical
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+import torch
+
+from qwen_determinism import DETERMINISTIC_PROMPTS, first_divergence
+from qwen_model_loader import MODEL_NAME, QUANTIZATION_MODES, load_model_and_tokenizer
+from qwen_speculative import DraftModelDrafter, PromptLookupDrafter, speculative_generate
+
+DRAFTERS = ("prompt-lookup", "draft-model")
+
+# Tokens generated by the untimed warm-up pass before the first measurement
+WARMUP_TOKENS = 16
+
+
+def greedy_baseline(model, tokenizer, inputs, max_new_tokens):
+    start = time.perf_counter()
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            temperature=0.0,
+            pad_token_id=tokenizer.eos_token_id,
+            eos_token_id=tokenizer.eos_token_id
+        )
+    return outputs[0, inputs["input_ids"].shape[1]:].tolist(), time.perf_counter() - start
+
+
+def build_drafters(names, num_draft_tokens, lookup_tokens, draft_model_name, draft_quantization):
+    drafters = []
+    for name in names:
+        if name == "prompt-lookup":
+            drafters.append(PromptLookupDrafter(num_tokens=lookup_tokens))
+        elif name == "draft-model":
+            # Qwen2.5-0.5B is the smallest Qwen2.5, so by default its int8 copy drafts for it
+            _, draft_model = load_model_and_tokenizer(draft_model_name, quantization=draft_quantization)
+            drafters.append(DraftModelDrafter(draft_model, num_tokens=num_draft_tokens))
+    return drafters
+
+
+def run_report(drafter_names=DRAFTERS, max_new_tokens=300, num_draft_tokens=4, lookup_tokens=10,
+               draft_model_name=MODEL_NAME, draft_quantization="int8", model_name=MODEL_NAME):
+    tokenizer, model = load_model_and_tokenizer(model_name)
+    drafters = build_drafters(drafter_names, num_draft_tokens, lookup_tokens, draft_model_name,
+                              draft_quantization)
+
+    results = []
+    for i, prompt in enumerate(DETERMINISTIC_PROMPTS, 1):
+        formatted_prompt = tokenizer.apply_chat_template(
+            [{"role": "user", "content": prompt}],
+            tokenize=False,
+            add_generation_prompt=True
+        )
+        inputs = tokenizer(formatted_prompt, return_tensors="pt")
+        if torch.cuda.is_available() and hasattr(model, 'device'):
+            inputs = {k: v.to(model.device) for k, v in inputs.items()}
+
+        if i == 1:
+            # One untimed pass of each path, so the first baseline doesn't pay for
+            # thread pool start-up and allocator growth
+            greedy_baseline(model, tokenizer, inputs, WARMUP_TOKENS)
+            for drafter in drafters:
+                speculative_generate(model, tokenizer, inputs, drafter, WARMUP_TOKENS)
+
+        print(f"\n📝 Test {i}: {prompt}")
+        expected, baseline_seconds = greedy_baseline(model, tokenizer, inputs, max_new_tokens)
+        print(f"  Greedy generate: {len(expected)} tokens in {baseline_seconds:.2f}s")
+        entry = {"prompt": prompt, "completion_tokens": len(expected), "baseline_seconds": baseline_seconds,
+                 "drafters": {}}
+
+        for drafter in drafters:
+            token_ids, stats = speculative_generate(model, tokenizer, inputs, drafter, max_new_tokens)
+            divergence = first_divergence(expected, token_ids)
+            stats.update({
+                "identical": divergence is None,
+                "first_divergence": divergence,
+                "speedup": baseline_seconds / stats["seconds"],
+            })
+            entry["drafters"][drafter.name] = stats
+            status = "✅ identical" if divergence is None else f"❌ diverges at token {divergence}"
+            acceptance = stats["acceptance_rate"]
+            print(f"  {drafter.name:<14} {status}, acceptance "
+                  f"{'n/a' if acceptance is None else f'{acceptance:.0%}'}, "
+                  f"{stats['tokens_per_forward_pass']:.2f} tokens/pass, {stats['speedup']:.2f}x")
+        results.append(entry)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure speculative decoding against plain greedy generate")
+    parser.add_argument("--output", default="speculative_report.json")
+    parser.add_argument("--drafters", default=",".join(DRAFTERS),
+                        help="Comma-separated subset of: " + ", ".join(DRAFTERS))
+    parser.add_argument("--max-new-tokens", type=int, default=300)
+    parser.add_argument("--num-draft-tokens", type=int, default=4, help="Tokens per draft-model proposal")
+    parser.add_argument("--lookup-tokens", type=int, default=10, help="Tokens per prompt-lookup proposal")
+    parser.add_argument("--draft-model", default=MODEL_NAME, help="Draft model sharing the tokenizer")
+    parser.add_argument("--draft-quantization", choices=QUANTIZATION_MODES + ("none",), default="int8")
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    print("🎯 Qwen2.5-0.5B-Instruct Speculative Decoding Report")
+    print("=" * 60)
+
+    drafter_names = [name for name in args.drafters.split(",") if name]
+    unknown = [name for name in drafter_names if name not in DRAFTERS]
+    if unknown:
+        print(f"❌ Unknown drafters: {', '.join(unknown)}")
+        return False
+
+    try:
+        results = run_report(
+            drafter_names,
+            max_new_tokens=args.max_new_tokens,
+            num_draft_tokens=args.num_draft_tokens,
+            lookup_tokens=args.lookup_tokens,
+            draft_model_name=args.draft_model,
+            draft_quantization=None if args.draft_quantization == "none" else args.draft_quantization,
+            model_name=args.model
+        )
+    except Exception as e:
+        print(f"❌ Error during speculative decoding report: {str(e)}")
+        return False
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "model": args.model,
+            "draft_model": args.draft_model,
+            "draft_quantization": args.draft_quantization,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "max_new_tokens": args.max_new_tokens,
+            "prompts": results,
+        }, f, indent=2)
+    print(f"\n💾 Report saved to {args.output}")
+
+    identical = all(stats["identical"] for entry in results for stats in entry["drafters"].values())
+    if not identical:
+        print("❌ Speculative output differs from greedy generate")
+    return identical
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
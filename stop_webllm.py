@@ -6,144 +6,248 @@ Python script to stop WebLLM and clean up browser processes
 import psutil
 import os
 import sys
-import time
 from pathlib import Path
 
-def find_browser_processes():
+import cache_manager
+import launcher_state
+
+BROWSER_NAMES = [
+    'chrome.exe', 'msedge.exe', 'firefox.exe', 'opera.exe',
+    'brave.exe', 'vivaldi.exe', 'safari.exe', 'iexplore.exe'
+]
+BROWSER_KEYWORDS = ['webllm', 'qwen']
+SERVER_KEYWORDS = ['http.server', 'socketserver', 'webllm', 'launch_webllm']
+
+# Seconds every target gets to exit after SIGTERM, shared by all of them
+STOP_TIMEOUT = 5
+
+class ProcessSnapshot:
+    """One pass over the process table, indexed by name and cwd and searchable by cmdline
+    
+    Every lookup the stop script makes is answered from the same scan
+    instead of re-running psutil.process_iter. This process and its
+    parent are left out so the script never stops itself.
+    """
+    
+    def __init__(self, processes=None):
+        own_pids = {os.getpid(), os.getppid()}
+        self.processes = []
+        self.by_name = {}
+        self.by_cwd = {}
+        
+        if processes is None:
+            processes = psutil.process_iter(['pid', 'name', 'cmdline', 'cwd', 'create_time'])
+        for proc in processes:
+            try:
+                info = proc.info if hasattr(proc, 'info') else proc.as_dict(
+                    ['pid', 'name', 'cmdline', 'cwd', 'create_time'])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            if info['pid'] in own_pids:
+                continue
+            
+            entry = {
+                'pid': info['pid'],
+                'name': info['name'] or '',
+                'cmdline': ' '.join(info['cmdline'] or []),
+                'cwd': info['cwd'] or '',
+                'create_time': info['create_time'],
+            }
+            entry['cmdline_lower'] = entry['cmdline'].lower()
+            self.processes.append(entry)
+            self.by_name.setdefault(entry['name'].lower(), []).append(entry)
+            if entry['cwd']:
+                self.by_cwd.setdefault(os.path.abspath(entry['cwd']), []).append(entry)
+    
+    def named(self, names):
+        """Processes whose name is one of ``names`` (case-insensitive)"""
+        return [entry for name in names for entry in self.by_name.get(name.lower(), [])]
+    
+    def name_contains(self, fragment):
+        fragment = fragment.lower()
+        return [entry for name, entries in self.by_name.items() if fragment in name for entry in entries]
+    
+    def with_keywords(self, entries, keywords):
+        """Filter ``entries`` to those whose command line contains any keyword"""
+        return [entry for entry in entries
+                if any(keyword in entry['cmdline_lower'] for keyword in keywords)]
+    
+    def in_cwd(self, path):
+        """Processes whose working directory is ``path``"""
+        return list(self.by_cwd.get(os.path.abspath(path), []))
+
+def find_browser_processes(snapshot=None):
     """Find running browser processes that might be running WebLLM"""
-    browser_names = [
-        'chrome.exe', 'msedge.exe', 'firefox.exe', 'opera.exe',
-        'brave.exe', 'vivaldi.exe', 'safari.exe', 'iexplore.exe'
-    ]
+    snapshot = snapshot or ProcessSnapshot()
+    return snapshot.with_keywords(snapshot.named(BROWSER_NAMES), BROWSER_KEYWORDS)
+
+def find_python_server_processes(snapshot=None):
+    """Find Python HTTP server processes that might be serving WebLLM"""
+    snapshot = snapshot or ProcessSnapshot()
+    return snapshot.with_keywords(snapshot.name_contains('python'), SERVER_KEYWORDS)
+
+def stop_processes(targets, timeout=STOP_TIMEOUT):
+    """Stop every target at once: SIGTERM all, wait on all with one shared deadline, then kill
+    
+    ``targets`` are dicts with ``pid`` and ``name`` (and optionally
+    ``create_time``, which guards against a reused PID). Returns True when
+    every target is gone.
+    """
+    procs = []
+    names = {}
+    all_stopped = True
+    for target in targets:
+        name = target['name']
+        try:
+            proc = psutil.Process(target['pid'])
+            if target.get('create_time') is not None and proc.create_time() != target['create_time']:
+                print(f"  ✅ {name} already stopped (PID {target['pid']} was reused)")
+                continue
+            print(f"  🛑 Stopping {name} (PID: {target['pid']})")
+            proc.terminate()
+            names[proc.pid] = name
+            procs.append(proc)
+        except psutil.NoSuchProcess:
+            print(f"  ✅ {name} already stopped")
+        except psutil.AccessDenied:
+            print(f"  ❌ Access denied stopping {name}")
+            all_stopped = False
+        except Exception as e:
+            print(f"  ❌ Error stopping {name}: {e}")
+            all_stopped = False
     
-    browser_processes = []
+    if not procs:
+        return all_stopped
     
-    try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            if proc.info['name'] and proc.info['name'].lower() in browser_names:
-                # Check if the process has WebLLM-related content
-                cmdline = ' '.join(proc.info['cmdline'] or [])
-                if 'webllm' in cmdline.lower() or 'qwen' in cmdline.lower():
-                    browser_processes.append({
-                        'pid': proc.info['pid'],
-                        'name': proc.info['name'],
-                        'cmdline': cmdline
-                    })
-    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-        pass
-    
-    return browser_processes
-
-def find_python_server_processes():
-    """Find Python HTTP server processes that might be serving WebLLM"""
-    python_servers = []
+    gone, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in gone:
+        print(f"  ✅ {names[proc.pid]} stopped gracefully")
     
-    try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'cwd']):
-            if proc.info['name'] and 'python' in proc.info['name'].lower():
-                cmdline = ' '.join(proc.info['cmdline'] or [])
-                cwd = proc.info['cwd'] or ''
-                
-                # Check for HTTP server or WebLLM launcher
-                if any(keyword in cmdline.lower() for keyword in [
-                    'http.server', 'socketserver', 'webllm', 'launch_webllm'
-                ]):
-                    python_servers.append({
-                        'pid': proc.info['pid'],
-                        'name': proc.info['name'],
-                        'cmdline': cmdline,
-                        'cwd': cwd
-                    })
-    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-        pass
-    
-    return python_servers
+    for proc in alive:
+        print(f"  ⚠️ Force killing {names[proc.pid]}")
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied:
+            print(f"  ❌ Access denied killing {names[proc.pid]}")
+            all_stopped = False
+    
+    if alive:
+        _, still_alive = psutil.wait_procs(alive, timeout=timeout)
+        for proc in alive:
+            if proc in still_alive:
+                print(f"  ❌ {names[proc.pid]} is still running")
+                all_stopped = False
+            else:
+                print(f"  ✅ {names[proc.pid]} force stopped")
+    
+    return all_stopped
 
 def stop_process(pid, name):
     """Safely stop a process by PID"""
+    return stop_processes([{'pid': pid, 'name': name}])
+
+def find_launcher(state_path=launcher_state.STATE_FILE):
+    """Return the launcher recorded in the state file, or None
+    
+    A state file whose PID is gone, or now belongs to a process started after
+    the launcher wrote it (PID reuse), is stale and removed.
+    """
+    state = launcher_state.read_state(state_path)
+    if state is None:
+        return None
+    
     try:
-        proc = psutil.Process(pid)
-        print(f"  🛑 Stopping {name} (PID: {pid})")
-        proc.terminate()
-        
-        # Wait for graceful termination
-        try:
-            proc.wait(timeout=5)
-            print(f"  ✅ {name} stopped gracefully")
-            return True
-        except psutil.TimeoutExpired:
-            print(f"  ⚠️ Force killing {name}")
-            proc.kill()
-            proc.wait()
-            print(f"  ✅ {name} force stopped")
-            return True
-            
+        create_time = psutil.Process(state['pid']).create_time()
     except psutil.NoSuchProcess:
-        print(f"  ✅ {name} already stopped")
-        return True
-    except psutil.AccessDenied:
-        print(f"  ❌ Access denied stopping {name}")
-        return False
-    except Exception as e:
-        print(f"  ❌ Error stopping {name}: {e}")
-        return False
+        create_time = None
+    # The launcher process existed before it wrote its state file
+    if create_time is None or create_time > state['started'] + 1:
+        print(f"  🗑️ Removing stale {state_path} (PID {state['pid']} is not the launcher)")
+        launcher_state.remove_state(state_path, pid=state['pid'])
+        return None
+    
+    state['create_time'] = create_time
+    return state
+
+def stop_launcher(state, state_path=launcher_state.STATE_FILE, timeout=STOP_TIMEOUT):
+    """Stop the recorded launcher: control endpoint first, then a signal to its PID"""
+    if launcher_state.request_shutdown(state):
+        print(f"  🛑 Shutdown requested via http://127.0.0.1:{state['port']}{launcher_state.SHUTDOWN_PATH}")
+        if launcher_state.wait_for_exit(state['pid'], timeout):
+            print(f"  ✅ Launcher stopped gracefully (PID: {state['pid']})")
+            return True
+    
+    stopped = stop_processes([{'pid': state['pid'], 'name': 'webllm_python_launcher',
+                               'create_time': state['create_time']}], timeout=timeout)
+    if stopped:
+        # A killed launcher could not remove its own state file
+        launcher_state.remove_state(state_path, pid=state['pid'])
+    return stopped
 
 def clear_browser_cache():
-    """Clear browser cache related to WebLLM (optional)"""
-    print("\n🧹 Browser Cache Cleanup:")
-    
-    # Common browser cache locations for WebLLM content
-    cache_patterns = [
-        "webllm",
-        "qwen",
-        "mlc-ai"
-    ]
+    """Report the model caches and trim them to $WEBLLM_CACHE_BUDGET if one is set
     
-    print("  ℹ️ Cache cleanup is optional and browser-specific")
-    print("  💡 You may manually clear browser cache if needed")
+    Browser-side caches (Cache Storage / IndexedDB) can only be cleared from
+    the browser; the Hugging Face and MLC caches on disk are handled here.
+    """
+    print("\n🧹 Model Cache Cleanup:")
     
+    try:
+        budget = cache_manager.configured_budget()
+        units = cache_manager.inventory()
+        usage = cache_manager.total_usage(units)
+        print(f"  ℹ️ {len(units)} cached model revision(s)/artifact(s), "
+              f"{cache_manager.format_size(usage)} on disk")
+        if budget is None:
+            print(f"  💡 Set {cache_manager.BUDGET_ENV} (e.g. 20G) to evict least-recently-used models")
+        else:
+            cache_manager.enforce_budget(budget)
+    except (OSError, ValueError) as e:
+        print(f"  ❌ Model cache cleanup failed: {e}")
+        return False
+    
+    print("  💡 Browser caches can be cleared with Ctrl+Shift+Del if needed")
     return True
 
 def cleanup_temp_files():
     """Clean up temporary files created by WebLLM"""
     print("\n🗑️ Cleaning temporary files:")
     
+    # .webllm_cache and mlc_cache are model caches: cache_manager.enforce_budget trims
+    # them in clear_browser_cache() instead of deleting them on every stop
     temp_files = [
-        "webllm_results.json",
-        ".webllm_cache",
-        "mlc_cache"
+        "webllm_results.json"
     ]
     
-    cleaned = 0
-    for temp_file in temp_files:
-        file_path = Path(temp_file)
-        if file_path.exists():
-            try:
-                if file_path.is_file():
-                    file_path.unlink()
-                elif file_path.is_dir():
-                    import shutil
-                    shutil.rmtree(file_path)
-                print(f"  ✅ Removed {temp_file}")
-                cleaned += 1
-            except Exception as e:
-                print(f"  ❌ Failed to remove {temp_file}: {e}")
-    
-    if cleaned == 0:
+    existing = [temp_file for temp_file in temp_files if Path(temp_file).exists()]
+    results = cache_manager.delete_paths(existing)
+    for temp_file in existing:
+        if results[temp_file] is None:
+            print(f"  ✅ Removed {temp_file}")
+        else:
+            print(f"  ❌ Failed to remove {temp_file}: {results[temp_file]}")
+    
+    if not existing:
         print("  ℹ️ No temporary files found to clean")
     
     return True
 
-def show_running_status():
-    """Show what WebLLM-related processes are currently running"""
+def show_running_status(snapshot=None):
+    """Show what WebLLM-related processes are currently running
+    
+    Returns ``(browsers, servers)``; both are empty when nothing is running.
+    """
     print("🔍 Checking for running WebLLM processes...")
     
-    browsers = find_browser_processes()
-    servers = find_python_server_processes()
+    snapshot = snapshot or ProcessSnapshot()
+    browsers = find_browser_processes(snapshot)
+    servers = find_python_server_processes(snapshot)
     
     if not browsers and not servers:
         print("  ✅ No WebLLM processes found running")
-        return False
+        return browsers, servers
     
     if browsers:
         print(f"\n🌐 Found {len(browsers)} browser process(es) with WebLLM content:")
@@ -157,18 +261,57 @@ def show_running_status():
             if proc['cwd']:
                 print(f"    Working directory: {proc['cwd']}")
     
-    return True
+    return browsers, servers
 
-def main():
-    """Main function to stop WebLLM"""
+def stop_recorded_launcher(confirm=True):
+    """Fast path: stop the launcher found through its state file, without a process scan
+    
+    Returns None when no launcher is recorded, otherwise whether it stopped.
+    """
+    state = find_launcher()
+    if state is None:
+        return None
+    
+    health = launcher_state.check_health(state)
+    print(f"📄 Launcher recorded in {launcher_state.STATE_FILE}: PID {state['pid']}, port {state['port']} "
+          f"({'healthy' if health else 'control endpoint not answering'})")
+    
+    if confirm:
+        print("\n❓ Do you want to stop it? (y/n): ", end="")
+        try:
+            response = input().lower().strip()
+        except KeyboardInterrupt:
+            response = ''
+        if response not in ['y', 'yes']:
+            print("🚫 Operation cancelled")
+            return False
+    
+    print("\n🛑 Stopping WebLLM launcher...")
+    stopped = stop_launcher(state)
+    cleanup_temp_files()
+    if stopped:
+        print("💡 Browser tabs were left open; use --scan to also look for browser processes")
+    return stopped
+
+def main(scan=False):
+    """Main function to stop WebLLM
+    
+    The launcher's state file is used when present; the process table is
+    only scanned when there is none or ``scan`` is set.
+    """
     
     print("🛑 WebLLM Stop Script")
     print("=" * 40)
     
-    # Check current status
-    has_processes = show_running_status()
+    if not scan:
+        stopped = stop_recorded_launcher(confirm=True)
+        if stopped is not None:
+            return stopped
+    
+    # Check current status (one scan of the process table serves every lookup below)
+    browsers, servers = show_running_status()
     
-    if not has_processes:
+    if not browsers and not servers:
         print("\n🎉 WebLLM is not currently running!")
         return True
     
@@ -184,22 +327,9 @@ def main():
     
     print("\n🛑 Stopping WebLLM processes...")
     
-    # Stop browser processes
-    browsers = find_browser_processes()
-    if browsers:
-        print(f"\n🌐 Stopping {len(browsers)} browser process(es):")
-        for proc in browsers:
-            stop_process(proc['pid'], proc['name'])
-    
-    # Stop Python server processes  
-    servers = find_python_server_processes()
-    if servers:
-        print(f"\n🐍 Stopping {len(servers)} Python server process(es):")
-        for proc in servers:
-            stop_process(proc['pid'], proc['name'])
-    
-    # Wait a moment for processes to stop
-    time.sleep(2)
+    # Stop browsers and servers together; they share one termination deadline
+    print(f"\n🛑 Stopping {len(browsers)} browser and {len(servers)} Python server process(es):")
+    stop_processes(browsers + servers)
     
     # Clean up files
     cleanup_temp_files()
@@ -207,9 +337,9 @@ def main():
     
     # Final check
     print("\n🔍 Final status check...")
-    final_check = show_running_status()
+    final_browsers, final_servers = show_running_status()
     
-    if not final_check:
+    if not final_browsers and not final_servers:
         print("\n✅ WebLLM stopped successfully!")
         print("🎯 All processes terminated and temporary files cleaned")
         return True
@@ -218,18 +348,20 @@ def main():
         print("💡 You may need to manually close browser tabs or restart the browser")
         return False
 
-def force_stop():
+def force_stop(scan=False):
     """Force stop all WebLLM processes without confirmation"""
     print("⚡ Force stopping all WebLLM processes...")
     
-    browsers = find_browser_processes()
-    servers = find_python_server_processes()
+    if not scan:
+        stopped = stop_recorded_launcher(confirm=False)
+        if stopped is not None:
+            return stopped
     
-    all_stopped = True
+    snapshot = ProcessSnapshot()
+    browsers = find_browser_processes(snapshot)
+    servers = find_python_server_processes(snapshot)
     
-    for proc in browsers + servers:
-        if not stop_process(proc['pid'], proc['name']):
-            all_stopped = False
+    all_stopped = stop_processes(browsers + servers)
     
     cleanup_temp_files()
     
@@ -238,11 +370,14 @@ def force_stop():
 if __name__ == "__main__":
     print("🚀 WebLLM Stop Utility")
     
+    # --scan ignores the launcher state file and searches the process table
+    scan = '--scan' in sys.argv
+    
     # Check for force flag
     if len(sys.argv) > 1 and sys.argv[1] in ['--force', '-f']:
-        success = force_stop()
+        success = force_stop(scan=scan)
     else:
-        success = main()
+        success = main(scan=scan)
     
     if success:
         print("\n🎉 WebLLM shutdown completed!")
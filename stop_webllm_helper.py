@@ -3,10 +3,11 @@
 WebLLM Stop Helper - Simple instructions and cleanup
 """
 
-import webbrowser
 import os
 from pathlib import Path
 
+import cache_manager
+
 def show_stop_instructions():
     """Show instructions on how to stop WebLLM"""
     
@@ -33,32 +34,30 @@ def cleanup_webllm_files():
     files_to_check = [
         "webllm_results.json",
         "webllm_cache",
-        ".webllm",
-        "mlc_cache"
+        ".webllm"
     ]
     
-    cleaned_count = 0
+    existing = [file_name for file_name in files_to_check if Path(file_name).exists()]
+    kinds = {file_name: "directory" if Path(file_name).is_dir() else "file" for file_name in existing}
+    results = cache_manager.delete_paths(existing)
     
-    for file_name in files_to_check:
-        file_path = Path(file_name)
-        
-        if file_path.exists():
-            try:
-                if file_path.is_file():
-                    file_path.unlink()
-                    print(f"  ✅ Removed file: {file_name}")
-                elif file_path.is_dir():
-                    import shutil
-                    shutil.rmtree(file_path)
-                    print(f"  ✅ Removed directory: {file_name}")
-                cleaned_count += 1
-            except Exception as e:
-                print(f"  ❌ Failed to remove {file_name}: {e}")
+    cleaned_count = 0
+    for file_name in existing:
+        if results[file_name] is None:
+            print(f"  ✅ Removed {kinds[file_name]}: {file_name}")
+            cleaned_count += 1
+        else:
+            print(f"  ❌ Failed to remove {file_name}: {results[file_name]}")
     
     if cleaned_count == 0:
         print("  ✅ No temporary files found to clean")
     else:
         print(f"  🎯 Cleaned {cleaned_count} file(s)/folder(s)")
+    
+    budget = cache_manager.configured_budget()
+    if budget is not None:
+        print(f"\n🗄️ Model caches ({cache_manager.BUDGET_ENV}={cache_manager.format_size(budget)}):")
+        cache_manager.enforce_budget(budget)
 
 def check_webllm_status():
     """Check if WebLLM files are present"""
@@ -99,6 +98,16 @@ def show_process_info():
     print("  taskkill /PID <process_id> /F")
     print("  taskkill /IM chrome.exe /F")
 
+def status():
+    """Read-only status report: instructions and installation check, nothing is deleted"""
+    
+    print("🚀 WebLLM Stop Helper (status only)")
+    print()
+    
+    show_stop_instructions()
+    check_webllm_status()
+    show_process_info()
+
 def main():
     """Main function"""
     
@@ -1,47 +1,158 @@
 #!/usr/bin/env python3
 """
 Simple WebLLM stop script (no external dependencies)
-Uses Windows taskkill command to stop browser processes
+Reads /proc once on Linux, or makes one bulk tasklist call on Windows, to find processes
 """
 
+import csv
+import io
+import signal
 import subprocess
 import os
 import sys
 from pathlib import Path
 
+import cache_manager
+import launcher_state
+
+BROWSER_NAMES = [
+    'chrome.exe', 'msedge.exe', 'firefox.exe', 'opera.exe',
+    'brave.exe', 'vivaldi.exe', 'safari.exe', 'iexplore.exe'
+]
+# Linux spellings of the same browsers (compared without the .exe suffix)
+LINUX_BROWSER_NAMES = ['chrome', 'google-chrome', 'chromium', 'chromium-browser', 'microsoft-edge', 'msedge']
+SERVER_KEYWORDS = ['http.server', 'socketserver', 'webllm', 'launch_webllm']
+
 def run_command(cmd):
     """Run a command and return success status"""
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        result = subprocess.run(cmd, shell=isinstance(cmd, str), capture_output=True, text=True)
         return result.returncode == 0, result.stdout, result.stderr
     except Exception as e:
         return False, "", str(e)
 
-def find_browser_processes_simple():
-    """Find browser processes using tasklist command"""
-    browser_names = [
-        'chrome.exe', 'msedge.exe', 'firefox.exe', 'opera.exe',
-        'brave.exe', 'vivaldi.exe', 'safari.exe', 'iexplore.exe'
-    ]
+def _base_name(name):
+    name = name.lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+class ProcessTable:
+    """All processes from one pass over the OS process list, indexed by name
+    
+    Linux reads /proc directly (no subprocesses); Windows makes a single
+    ``tasklist /FO CSV /NH`` call. Listening ports are resolved on demand
+    from one read of /proc/net/tcp{,6}.
+    """
+    
+    def __init__(self):
+        self.processes = []
+        self.by_name = {}
+        self._listening_inodes = None
+        
+        if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+            entries = self._scan_proc()
+        elif os.name == 'nt':
+            entries = self._scan_tasklist()
+        else:
+            entries = []
+        
+        own_pid = os.getpid()
+        for entry in entries:
+            if entry['pid'] == own_pid:
+                continue
+            self.processes.append(entry)
+            self.by_name.setdefault(_base_name(entry['name']), []).append(entry)
+    
+    @staticmethod
+    def _scan_proc():
+        entries = []
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    argv = [arg.decode('utf-8', 'replace') for arg in f.read().split(b'\0') if arg]
+                with open(f'/proc/{pid}/comm', encoding='utf-8', errors='replace') as f:
+                    comm = f.read().strip()
+            except OSError:
+                continue  # exited during the scan, or not ours to read
+            # comm is truncated to 15 characters; argv[0] has the full executable name
+            name = os.path.basename(argv[0]) if argv else comm
+            entries.append({'pid': int(pid), 'name': name, 'cmdline': ' '.join(argv)})
+        return entries
+    
+    @staticmethod
+    def _scan_tasklist():
+        success, stdout, _ = run_command(['tasklist', '/FO', 'CSV', '/NH'])
+        if not success:
+            return []
+        entries = []
+        for row in csv.reader(io.StringIO(stdout)):
+            if len(row) >= 2 and row[1].isdigit():
+                # tasklist does not report command lines
+                entries.append({'pid': int(row[1]), 'name': row[0], 'cmdline': ''})
+        return entries
+    
+    def named(self, names):
+        """Processes whose executable is one of ``names`` (.exe optional, case-insensitive)"""
+        return [entry for name in dict.fromkeys(_base_name(n) for n in names)
+                for entry in self.by_name.get(name, [])]
     
-    found_processes = []
-    
-    for browser in browser_names:
-        success, stdout, stderr = run_command(f'tasklist /FI "IMAGENAME eq {browser}"')
-        if success and browser.lower() in stdout.lower():
-            # Extract process info
-            lines = stdout.strip().split('\n')
-            for line in lines:
-                if browser.lower() in line.lower() and 'PID' not in line:
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        try:
-                            pid = parts[1]
-                            found_processes.append({'name': browser, 'pid': pid})
-                        except (IndexError, ValueError):
-                            continue
-    
-    return found_processes
+    def name_contains(self, fragment):
+        return [entry for name, entries in self.by_name.items() if fragment in name for entry in entries]
+    
+    def listening_ports(self, pid):
+        """TCP ports ``pid`` is listening on (Linux only; empty elsewhere or if unreadable)"""
+        if self._listening_inodes is None:
+            self._listening_inodes = {}
+            for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+                try:
+                    with open(table) as f:
+                        next(f)
+                        for line in f:
+                            fields = line.split()
+                            if fields[3] == '0A':  # TCP_LISTEN
+                                self._listening_inodes[fields[9]] = int(fields[1].rsplit(':', 1)[1], 16)
+                except (OSError, StopIteration, IndexError, ValueError):
+                    continue
+        
+        ports = set()
+        try:
+            for fd in os.listdir(f'/proc/{pid}/fd'):
+                target = os.readlink(f'/proc/{pid}/fd/{fd}')
+                if target.startswith('socket:['):
+                    port = self._listening_inodes.get(target[8:-1])
+                    if port is not None:
+                        ports.add(port)
+        except OSError:
+            pass
+        return sorted(ports)
+
+def find_browser_processes_simple(table=None):
+    """Find browser processes from a single process-table scan"""
+    table = table or ProcessTable()
+    return table.named(BROWSER_NAMES + LINUX_BROWSER_NAMES)
+
+def find_python_servers_simple(table=None):
+    """Python processes whose command line looks like a WebLLM server, with their listening ports"""
+    table = table or ProcessTable()
+    servers = []
+    for entry in table.name_contains('python'):
+        if any(keyword in entry['cmdline'].lower() for keyword in SERVER_KEYWORDS):
+            servers.append(dict(entry, ports=table.listening_ports(entry['pid'])))
+    return servers
+
+def terminate_pid(pid):
+    """Stop one process: taskkill on Windows, SIGTERM elsewhere"""
+    if os.name == 'nt':
+        success, _, stderr = run_command(['taskkill', '/PID', str(pid), '/F'])
+        return success, stderr
+    try:
+        os.kill(pid, signal.SIGTERM)
+        return True, ""
+    except ProcessLookupError:
+        return True, ""
+    except OSError as e:
+        return False, str(e)
 
 def kill_browser_processes():
     """Kill browser processes that might be running WebLLM"""
@@ -72,7 +183,7 @@ def kill_browser_processes():
     
     for proc in browsers:
         print(f"  🛑 Stopping {proc['name']} (PID: {proc['pid']})")
-        success, stdout, stderr = run_command(f'taskkill /PID {proc["pid"]} /F')
+        success, stderr = terminate_pid(proc['pid'])
         
         if success:
             print(f"  ✅ {proc['name']} stopped successfully")
@@ -86,14 +197,28 @@ def kill_python_servers():
     """Kill Python HTTP servers"""
     print("\n🐍 Looking for Python server processes...")
     
-    # Look for Python processes with HTTP server keywords
-    success, stdout, stderr = run_command('tasklist /FI "IMAGENAME eq python.exe"')
+    # The launcher records itself in a state file and can be stopped through its control endpoint
+    state = launcher_state.read_state()
+    if state is not None and launcher_state.pid_alive(state['pid']):
+        print(f"  📄 Launcher recorded in {launcher_state.STATE_FILE}: PID {state['pid']}, port {state['port']}")
+        if launcher_state.request_shutdown(state) and launcher_state.wait_for_exit(state['pid']):
+            print("  ✅ Launcher stopped via its control endpoint")
+        else:
+            print("  ⚠️ Launcher did not respond to the shutdown request")
     
-    if not success or 'python.exe' not in stdout.lower():
-        print("  ✅ No Python processes found")
+    table = ProcessTable()
+    servers = find_python_servers_simple(table)
+    if not servers:
+        if not table.name_contains('python'):
+            print("  ✅ No Python processes found")
+        else:
+            print("  ✅ No Python WebLLM server processes found")
         return True
     
-    print("  📋 Found Python processes (may include servers)")
+    print(f"  📋 Found {len(servers)} Python process(es) that may be servers:")
+    for proc in servers:
+        ports = f", listening on {', '.join(map(str, proc['ports']))}" if proc['ports'] else ""
+        print(f"  • {proc['name']} (PID: {proc['pid']}{ports})")
     
     # For safety, we won't auto-kill Python processes as they might be important
     # Instead, we'll show them and let the user decide
@@ -111,24 +236,25 @@ def cleanup_files():
         "webllm_cache"
     ]
     
+    existing = [file_name for file_name in files_to_clean if Path(file_name).exists()]
+    results = cache_manager.delete_paths(existing)
+    
     cleaned = 0
-    for file_name in files_to_clean:
-        file_path = Path(file_name)
-        if file_path.exists():
-            try:
-                if file_path.is_file():
-                    file_path.unlink()
-                else:
-                    import shutil
-                    shutil.rmtree(file_path)
-                print(f"  ✅ Removed {file_name}")
-                cleaned += 1
-            except Exception as e:
-                print(f"  ❌ Failed to remove {file_name}: {e}")
+    for file_name in existing:
+        if results[file_name] is None:
+            print(f"  ✅ Removed {file_name}")
+            cleaned += 1
+        else:
+            print(f"  ❌ Failed to remove {file_name}: {results[file_name]}")
     
     if cleaned == 0:
         print("  ✅ No cleanup files found")
     
+    budget = cache_manager.configured_budget()
+    if budget is not None:
+        print(f"\n🗄️ Trimming model caches to {cache_manager.format_size(budget)}:")
+        cache_manager.enforce_budget(budget)
+    
     return True
 
 def close_webllm_tabs():
@@ -184,9 +310,9 @@ def force_mode():
     
     browsers_to_kill = ['chrome.exe', 'msedge.exe', 'firefox.exe', 'opera.exe']
     
-    for browser in browsers_to_kill:
-        print(f"🛑 Force killing {browser}")
-        run_command(f'taskkill /IM {browser} /F')
+    for proc in ProcessTable().named(browsers_to_kill + LINUX_BROWSER_NAMES):
+        print(f"🛑 Force killing {proc['name']} (PID: {proc['pid']})")
+        terminate_pid(proc['pid'])
     
     cleanup_files()
     print("✅ Force stop completed")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Percentile report of the browser timing beacons collected by webllm_python_launcher.py
+Groups load and generation records per browser and GPU; can also post synthetic beacons
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+import urllib.error
+import urllib.request
+
+import telemetry_store
+from perf_stats import summarize
+
+# (record type, field, unit) reported for every browser/GPU group
+REPORTED_METRICS = [
+    ("load", "download_s", "s"),
+    ("load", "compile_s", "s"),
+    ("load", "load_s", "s"),
+    ("load", "total_s", "s"),
+    ("generation", "ttft_s", "s"),
+    ("generation", "tokens_per_s", "tok/s"),
+    ("generation", "latency_s", "s"),
+    ("generation", "context_tokens", "tok"),
+]
+
+SYNTHETIC_ENVIRONMENTS = [
+    ("Google Chrome 130", "nvidia ampere", 1.0),
+    ("Microsoft Edge 130", "intel gen-12lp", 2.5),
+    ("Firefox 133", "apple metal-3", 1.6),
+]
+
+
+def aggregate(records, since=None, model=None):
+    """Summaries of every reported metric, keyed by ``(browser, gpu)``"""
+    values = {}
+    for record in records:
+        if since is not None and record.get("received", 0) < since:
+            continue
+        if model is not None and record.get("model") != model:
+            continue
+        if record.get("type") == "load" and record.get("ok") is False:
+            continue
+        group_key = (str(record.get("browser") or "unknown"), str(record.get("gpu") or "unknown"))
+        group = values.setdefault(group_key, {})
+        for record_type, field, _ in REPORTED_METRICS:
+            value = record.get(field)
+            if record.get("type") == record_type and isinstance(value, (int, float)) \
+                    and not isinstance(value, bool) and math.isfinite(value):
+                group.setdefault(field, []).append(value)
+
+    return {group: {field: summarize(samples) for field, samples in fields.items()}
+            for group, fields in values.items()}
+
+
+def print_report(report):
+    if not report:
+        print("  ℹ️ No telemetry records found")
+        return
+
+    for (browser, gpu), metrics in sorted(report.items()):
+        print(f"\n🖥️ {browser} / {gpu}")
+        print(f"  {'metric':<16} {'n':>5} {'p50':>9} {'p90':>9} {'p99':>9} {'unit':>6}")
+        for _, field, unit in REPORTED_METRICS:
+            stats = metrics.get(field)
+            if not stats:
+                continue
+            print(f"  {field:<16} {stats['count']:>5} {stats['p50']:>9.2f} {stats['p90']:>9.2f} "
+                  f"{stats['p99']:>9.2f} {unit:>6}")
+
+
+def synthetic_records(sessions, seed=0):
+    """Plausible load and generation records, as webllm_telemetry.js would send them"""
+    rng = random.Random(seed)
+    records = []
+    for index in range(sessions):
+        browser, gpu, slowdown = SYNTHETIC_ENVIRONMENTS[index % len(SYNTHETIC_ENVIRONMENTS)]
+        common = {"v": 1, "page": "webllm_standalone.html", "session": f"synthetic-{index}",
+                  "browser": browser, "gpu": gpu, "model": "Qwen2.5-0.5B-Instruct-q4f16_1-MLC"}
+        cached = rng.random() < 0.7
+        download_s = rng.uniform(0.2, 1.0) if cached else rng.uniform(20, 90)
+        compile_s = rng.uniform(1, 4) * slowdown
+        load_s = rng.uniform(0.5, 2) * slowdown
+        records.append({**common, "type": "load", "ts": int(time.time() * 1000), "ok": True,
+                        "download_s": download_s, "compile_s": compile_s, "load_s": load_s,
+                        "total_s": download_s + compile_s + load_s})
+
+        prompt_tokens = 0
+        for _ in range(rng.randint(1, 4)):
+            prompt_tokens += rng.randint(20, 60)
+            completion_tokens = rng.randint(50, 300)
+            tokens_per_s = rng.gauss(60, 8) / slowdown
+            ttft_s = prompt_tokens / (rng.gauss(900, 100) / slowdown)
+            records.append({**common, "type": "generation", "ts": int(time.time() * 1000),
+                            "streamed": False, "ttft_s": ttft_s, "tokens_per_s": tokens_per_s,
+                            "latency_s": ttft_s + completion_tokens / tokens_per_s,
+                            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                            "context_tokens": prompt_tokens + completion_tokens})
+            prompt_tokens += completion_tokens
+    return records
+
+
+def post_beacons(url, records, batch_size=10):
+    """POST ``records`` in beacon-sized batches exactly like navigator.sendBeacon would"""
+    endpoint = url.rstrip("/") + telemetry_store.TELEMETRY_PATH
+    for start in range(0, len(records), batch_size):
+        body = json.dumps({"records": records[start:start + batch_size]}).encode("utf-8")
+        request = urllib.request.Request(endpoint, data=body, method="POST",
+                                         headers={"Content-Type": "text/plain;charset=UTF-8"})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            if response.status != 204:
+                raise RuntimeError(f"{endpoint} answered {response.status}")
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report on WebLLM browser timing beacons")
+    parser.add_argument("--store", default=telemetry_store.DEFAULT_STORE)
+    subparsers = parser.add_subparsers(dest="command")
+
+    report_parser = subparsers.add_parser("report", help="Percentiles per browser and GPU (default)")
+    report_parser.add_argument("--since-hours", type=float, default=None, help="Only recent records")
+    report_parser.add_argument("--model", default=None, help="Only records for this WebLLM model id")
+    report_parser.add_argument("--json", default=None, help="Also write the report to this JSON file")
+
+    synthetic_parser = subparsers.add_parser("synthetic", help="Post synthetic beacons to a running launcher")
+    synthetic_parser.add_argument("--url", default="http://127.0.0.1:8080")
+    synthetic_parser.add_argument("--sessions", type=int, default=30)
+    synthetic_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("📡 WebLLM Browser Telemetry")
+    print("=" * 50)
+
+    if args.command == "synthetic":
+        try:
+            posted = post_beacons(args.url, synthetic_records(args.sessions, args.seed))
+        except (OSError, RuntimeError, urllib.error.URLError) as e:
+            print(f"❌ Could not post beacons: {e}")
+            return False
+        print(f"  ✅ Posted {posted} synthetic records to {args.url}")
+        return True
+
+    since_hours = getattr(args, "since_hours", None)
+    since = time.time() - since_hours * 3600 if since_hours else None
+    report = aggregate(telemetry_store.read_records(args.store), since, getattr(args, "model", None))
+    print_report(report)
+
+    if getattr(args, "json", None):
+        with open(args.json, "w") as f:
+            json.dump([{"browser": browser, "gpu": gpu, "metrics": metrics}
+                       for (browser, gpu), metrics in sorted(report.items())], f, indent=2)
+        print(f"\n💾 Report saved to {args.json}")
+    return True
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
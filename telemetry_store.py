@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Rotating JSONL store for the browser timing beacons posted by webllm_telemetry.js
+The launcher appends records here; telemetry_report.py reads them back
+"""
+
+import json
+import math
+import os
+import threading
+import time
+
+import launcher_state
+
+TELEMETRY_PATH = launcher_state.CONTROL_PREFIX + "/telemetry"
+
+
+def default_store_path():
+    """``$XDG_CACHE_HOME/webllm/telemetry/beacons.jsonl`` (``~/.cache`` by default)
+
+    Kept outside the directory the launcher serves: the records hold client
+    addresses and GPU adapter strings.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "webllm", "telemetry", "beacons.jsonl")
+
+
+DEFAULT_STORE = default_store_path()
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_BACKUPS = 4
+
+# Limits on what one beacon post may contain
+MAX_BODY_BYTES = 256 * 1024
+MAX_RECORDS_PER_POST = 100
+RECORD_TYPES = ("load", "generation")
+
+# Fields a record may carry, as written by webllm_telemetry.js; anything else is discarded
+MAX_STRING_LENGTH = 200
+STRING_FIELDS = ("browser", "gpu", "model", "page", "session", "error")
+BOOLEAN_FIELDS = ("ok", "streamed")
+NUMBER_FIELDS = (
+    "v", "ts", "download_s", "compile_s", "load_s", "total_s", "latency_s", "ttft_s",
+    "tokens_per_s", "prefill_tokens_per_s", "prompt_tokens", "completion_tokens", "context_tokens",
+)
+
+
+def clean_record(record):
+    """Return the record reduced to its known fields, or None if any of them is malformed
+
+    Strings must be short, numbers finite and booleans real booleans; each
+    may also be null. The beacon endpoint is reachable from any client, so
+    nothing else reaches the store (and the report).
+    """
+    if not isinstance(record, dict) or record.get("type") not in RECORD_TYPES:
+        return None
+    cleaned = {"type": record["type"]}
+    for fields, valid in (
+        (STRING_FIELDS, lambda v: isinstance(v, str) and len(v) <= MAX_STRING_LENGTH),
+        (BOOLEAN_FIELDS, lambda v: isinstance(v, bool)),
+        (NUMBER_FIELDS, lambda v: isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)),
+    ):
+        for field in fields:
+            if field not in record:
+                continue
+            value = record[field]
+            if value is not None and not valid(value):
+                return None
+            cleaned[field] = value
+    return cleaned
+
+
+def parse_beacon(body):
+    """Return the valid records of a beacon body (``{"records": [...]}`` or a bare list)
+
+    Raises ValueError if the body is not JSON of either shape. Records that
+    fail ``clean_record`` are dropped.
+    """
+    payload = json.loads(body)
+    records = payload.get("records") if isinstance(payload, dict) else payload
+    if not isinstance(records, list):
+        raise ValueError("expected a list of records")
+    cleaned = (clean_record(record) for record in records[:MAX_RECORDS_PER_POST])
+    return [record for record in cleaned if record is not None]
+
+
+class TelemetryStore:
+    """Append-only JSONL file rotated like logging.handlers.RotatingFileHandler
+
+    ``beacons.jsonl`` is the live file; once it would exceed ``max_bytes`` it
+    becomes ``beacons.jsonl.1`` (older files shift up and the one past
+    ``backups`` is deleted), so the store never grows past roughly
+    ``max_bytes * (backups + 1)``.
+    """
+
+    def __init__(self, path=DEFAULT_STORE, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+        self.stats = {"posts": 0, "records": 0, "rotations": 0}
+
+    def _rotate(self):
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if self.backups == 0 and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.stats["rotations"] += 1
+
+    def append(self, records, client=None):
+        """Append ``records`` as one JSON line each, stamped with the receive time"""
+        received = time.time()
+        data = "".join(
+            json.dumps({**record, "received": received, "client": client}, ensure_ascii=False) + "\n"
+            for record in records
+        ).encode("utf-8")
+
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size and size + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self.stats["posts"] += 1
+            self.stats["records"] += len(records)
+        return len(records)
+
+    def files(self):
+        """Store files from oldest to newest"""
+        candidates = [f"{self.path}.{index}" for index in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in candidates if os.path.exists(path)]
+
+
+def read_records(path=DEFAULT_STORE, backups=DEFAULT_BACKUPS):
+    """Yield every stored record, oldest first, skipping torn or malformed lines"""
+    for file_path in TelemetryStore(path, backups=backups).files():
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+pytest checks for asset_compression.py and the launcher's compressed responses
+"""
+
+import gzip
+import http.client
+import os
+
+import pytest
+
+import asset_compression
+import webllm_python_launcher
+
+SCRIPT = b"export const answer = 42;\n" * 200
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.1, gzip;q=0.2", "gzip"),
+    ("GZIP;q=bogus, br;q=0.3", "br"),
+])
+def test_negotiate(header, expected):
+    assert asset_compression.negotiate(header, encodings=("br", "gzip")) == expected
+
+
+def test_negotiate_ignores_unavailable_encodings():
+    assert asset_compression.negotiate("br, gzip;q=0.5", encodings=("gzip",)) == "gzip"
+
+
+@pytest.mark.parametrize("name, size, expected", [
+    ("app.js", 4096, True),
+    ("app.js", asset_compression.MIN_COMPRESS_BYTES - 1, False),
+    ("params_shard_0.bin", 4096, False),
+    ("model.WASM", 4096, True),
+])
+def test_is_compressible(name, size, expected):
+    assert asset_compression.is_compressible(name, size) is expected
+
+
+def write_asset(directory, name, data):
+    path = directory / name
+    path.write_bytes(data)
+    return str(path), os.stat(path)
+
+
+def test_variant_is_built_once_then_served_from_memory_and_disk(tmp_path):
+    path, stat_result = write_asset(tmp_path, "app.js", SCRIPT)
+    cache = asset_compression.AssetCompressionCache(str(tmp_path / "cache"))
+
+    data = cache.get(path, stat_result, "gzip")
+    assert gzip.decompress(data) == SCRIPT
+    assert cache.get(path, stat_result, "gzip") == data
+    assert cache.stats["builds"] == 1 and cache.stats["memory_hits"] == 1
+
+    restarted = asset_compression.AssetCompressionCache(str(tmp_path / "cache"))
+    assert restarted.get(path, stat_result, "gzip") == data
+    assert restarted.stats["disk_hits"] == 1 and restarted.stats["builds"] == 0
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    assets = [write_asset(tmp_path, f"app{i}.js", os.urandom(2048)) for i in range(3)]
+    sizes = [len(asset_compression.compress(open(path, "rb").read(), "gzip")) for path, _ in assets]
+    cache = asset_compression.AssetCompressionCache(str(tmp_path / "cache"),
+                                                    memory_budget=sizes[0] + sizes[1] + sizes[2] - 1)
+
+    for path, stat_result in assets[:2]:
+        cache.get(path, stat_result, "gzip")
+    cache.get(*assets[0], "gzip")  # app0 is now more recent than app1
+    cache.get(*assets[2], "gzip")
+
+    assert cache.stats["evictions"] == 1
+    assert cache.memory_bytes <= cache.memory_budget
+    remembered = {os.path.basename(variant).split("-")[0] for variant in cache.memory}
+    assert remembered == {cache._variant_path(assets[i][0], assets[i][1], "gzip")[1] for i in (0, 2)}
+
+
+def test_variant_larger_than_the_budget_is_not_kept_in_memory(tmp_path):
+    path, stat_result = write_asset(tmp_path, "app.js", SCRIPT)
+    cache = asset_compression.AssetCompressionCache(str(tmp_path / "cache"), memory_budget=16)
+
+    cache.get(path, stat_result, "gzip")
+    assert cache.memory_bytes == 0 and not cache.memory
+
+
+@pytest.mark.parametrize("change", ["mtime", "size"])
+def test_changed_source_replaces_the_disk_variant(tmp_path, change):
+    path, old_stat = write_asset(tmp_path, "app.js", SCRIPT)
+    cache = asset_compression.AssetCompressionCache(str(tmp_path / "cache"))
+    old_variant = cache._variant_path(path, old_stat, "gzip")[0]
+    cache.get(path, old_stat, "gzip")
+    assert os.path.exists(old_variant)
+
+    if change == "size":
+        new_data = SCRIPT + b"// edited\n"
+        write_asset(tmp_path, "app.js", new_data)
+    else:
+        new_data = SCRIPT.replace(b"42", b"43")
+        write_asset(tmp_path, "app.js", new_data)
+        os.utime(path, ns=(old_stat.st_atime_ns, old_stat.st_mtime_ns + 1_000_000_000))
+    new_stat = os.stat(path)
+
+    assert gzip.decompress(cache.get(path, new_stat, "gzip")) == new_data
+    assert cache.stats["builds"] == 2
+    assert not os.path.exists(old_variant)
+    new_variant = cache._variant_path(path, new_stat, "gzip")[0]
+    assert os.listdir(os.path.dirname(old_variant)) == [os.path.basename(new_variant)]
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    httpd, port = webllm_python_launcher.start_local_server(
+        0, workers=2, directory=str(tmp_path), telemetry=False)
+    yield port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_launcher_serves_the_negotiated_encoding(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=5)
+    try:
+        conn.request("GET", "/app.js", headers={"Accept-Encoding": "gzip"})
+        response = conn.getresponse()
+        body = response.read()
+        assert response.status == 200
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert response.getheader("Vary") == "Accept-Encoding"
+        assert response.getheader("ETag").endswith('-gzip"')
+        assert gzip.decompress(body) == SCRIPT
+
+        conn.request("GET", "/app.js")
+        response = conn.getresponse()
+        assert response.read() == SCRIPT
+        assert response.getheader("Content-Encoding") is None
+        assert response.getheader("Vary") == "Accept-Encoding"
+
+        # Byte ranges always address the identity representation
+        conn.request("GET", "/app.js", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-5"})
+        response = conn.getresponse()
+        assert response.status == 206 and response.read() == SCRIPT[:6]
+        assert response.getheader("Content-Encoding") is None
+    finally:
+        conn.close()
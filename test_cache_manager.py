@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+pytest checks for cache_manager.py eviction against synthetic hub and mirror caches
+"""
+
+import os
+
+import pytest
+
+import cache_manager
+import webllm_mirror
+
+REPO = "models--org--tiny"
+BLOB_SIZES = {"shared": 4096, "old_weights": 2048, "new_weights": 1024}
+OLD, NEW = "a" * 40, "b" * 40
+
+
+def set_age(path, age):
+    timestamp = 1_700_000_000 - age
+    os.utime(path, (timestamp, timestamp))
+
+
+@pytest.fixture
+def hf_cache(tmp_path):
+    """One hub repo with two revisions that share their config blob"""
+    cache = tmp_path / "hub"
+    repo = cache / REPO
+    (repo / "blobs").mkdir(parents=True)
+    for name, size in BLOB_SIZES.items():
+        (repo / "blobs" / name).write_bytes(b"x" * size)
+    for revision, weights in ((OLD, "old_weights"), (NEW, "new_weights")):
+        snapshot = repo / "snapshots" / revision
+        snapshot.mkdir(parents=True)
+        (snapshot / "config.json").symlink_to(os.path.join("..", "..", "blobs", "shared"))
+        (snapshot / "model.bin").symlink_to(os.path.join("..", "..", "blobs", weights))
+    (repo / "refs").mkdir()
+    (repo / "refs" / "main").write_text(NEW)
+
+    set_age(repo / "blobs" / "shared", 100)
+    set_age(repo / "blobs" / "old_weights", 100)
+    # A revision is as recent as its newest blob, so only NEW looks recently used
+    set_age(repo / "blobs" / "new_weights", 10)
+    return cache
+
+
+def hub_units(hf_cache):
+    return cache_manager.inventory(hf_cache=hf_cache, mirror_dir=hf_cache / "no-mirror",
+                                   local_cache=hf_cache / "no-local")
+
+
+@pytest.fixture(autouse=True)
+def isolated_mlc_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLC_LLM_HOME", str(tmp_path / "no-mlc"))
+    monkeypatch.chdir(tmp_path)
+
+
+def test_shared_blob_is_counted_once(hf_cache):
+    units = hub_units(hf_cache)
+    assert [unit["name"] for unit in units] == [f"org/tiny@{OLD[:12]}", "org/tiny@main"]
+    assert cache_manager.total_usage(units) == sum(BLOB_SIZES.values())
+
+
+def test_evicting_one_revision_keeps_the_shared_blob(hf_cache):
+    units = hub_units(hf_cache)
+    usage = cache_manager.total_usage(units)
+    blobs = hf_cache / REPO / "blobs"
+
+    plan, usage_after = cache_manager.plan_eviction(units, usage - 1)
+    assert [unit["name"] for unit in plan] == [f"org/tiny@{OLD[:12]}"]
+    assert plan[0]["delete_blobs"] == [os.path.realpath(blobs / "old_weights")]
+    assert plan[0]["frees"] == BLOB_SIZES["old_weights"]
+    assert usage_after == usage - BLOB_SIZES["old_weights"]
+
+    cache_manager.evict(plan)
+    assert not (hf_cache / REPO / "snapshots" / OLD).exists()
+    assert not (blobs / "old_weights").exists()
+    assert (blobs / "shared").exists() and (blobs / "new_weights").exists()
+    assert (hf_cache / REPO / "snapshots" / NEW / "config.json").read_bytes() == b"x" * BLOB_SIZES["shared"]
+
+    remaining = hub_units(hf_cache)
+    assert cache_manager.total_usage(remaining) == usage_after
+
+
+def test_evicting_every_revision_frees_the_shared_blob_once(hf_cache):
+    units = hub_units(hf_cache)
+    plan, usage_after = cache_manager.plan_eviction(units, 0)
+
+    assert [unit["frees"] for unit in plan] == [BLOB_SIZES["old_weights"],
+                                                BLOB_SIZES["shared"] + BLOB_SIZES["new_weights"]]
+    assert usage_after == 0
+    cache_manager.evict(plan)
+    assert not (hf_cache / REPO).exists()
+
+
+def test_keep_protects_matching_units(hf_cache):
+    plan, usage_after = cache_manager.plan_eviction(hub_units(hf_cache), 0, keep=("@main",))
+    assert [unit["name"] for unit in plan] == [f"org/tiny@{OLD[:12]}"]
+    assert usage_after == BLOB_SIZES["shared"] + BLOB_SIZES["new_weights"]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """A mirror holding two models that share one model library"""
+    mirror_dir = tmp_path / webllm_mirror.MIRROR_DIR_NAME
+    manifest = webllm_mirror.load_manifest(mirror_dir)
+    (mirror_dir / "libs").mkdir(parents=True)
+    (mirror_dir / "libs" / "model.wasm").write_bytes(b"\0asm")
+    manifest["artifacts"]["libs/model.wasm"] = {"size": 4}
+    for age, model_id in enumerate(("Newer-MLC", "Older-MLC")):
+        model_dir = mirror_dir / "models" / model_id / "resolve" / "main"
+        model_dir.mkdir(parents=True)
+        (model_dir / "params_shard_0.bin").write_bytes(b"\1" * 2048)
+        set_age(model_dir / "params_shard_0.bin", 10 + 100 * age)
+        manifest["artifacts"][f"models/{model_id}/resolve/main/params_shard_0.bin"] = {"size": 2048}
+        manifest["models"][model_id] = {"model": f"models/{model_id}/resolve/main/",
+                                        "model_lib": "libs/model.wasm"}
+    set_age(mirror_dir / "libs" / "model.wasm", 0)
+    webllm_mirror.save_manifest(mirror_dir, manifest)
+    return mirror_dir
+
+
+def mirror_units(mirror):
+    return cache_manager.inventory(mirror_dir=mirror, local_cache=mirror / "no-local", include_hf=False)
+
+
+def test_evicting_a_mirrored_model_drops_it_from_the_manifest(mirror):
+    units = mirror_units(mirror)
+    plan, _ = cache_manager.plan_eviction(units, cache_manager.total_usage(units) - 1)
+    assert [unit["name"] for unit in plan] == ["Older-MLC"]
+
+    cache_manager.evict(plan)
+    manifest = webllm_mirror.load_manifest(mirror)
+    assert list(manifest["models"]) == ["Newer-MLC"]
+    assert not any(relpath.startswith("models/Older-MLC/") for relpath in manifest["artifacts"])
+    assert "models/Newer-MLC/resolve/main/params_shard_0.bin" in manifest["artifacts"]
+    assert not (mirror / "models" / "Older-MLC").exists()
+
+
+def test_evicting_the_shared_library_removes_the_manifest(mirror):
+    units = [unit for unit in mirror_units(mirror) if unit["name"] == "libs"]
+    plan, _ = cache_manager.plan_eviction(units, 0)
+
+    cache_manager.evict(plan)
+    assert not (mirror / webllm_mirror.MANIFEST_NAME).exists()
+    assert not (mirror / "libs").exists()
+    assert (mirror / "models" / "Newer-MLC").exists()
@@ -4,41 +4,144 @@ Deterministic test script for Qwen2.5-0.5B-Instruct model using Transformers lib
 Tests reproducibility with temperature=0.0 and extended max_tokens
 """
 
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import sys
+
 import torch
 
-def test_deterministic_responses():
-    """Test that the model produces identical responses with temperature=0.0"""
+from qwen_accelerated import AcceleratedGenerator
+from qwen_determinism import (
+    DETERMINISTIC_PROMPTS, check_thread_invariance, first_divergence, generate_with_fingerprint,
+    verify_by_replay
+)
+from qwen_golden import DEFAULT_STORE, entry_id, load_store, model_fingerprint
+from qwen_model_loader import MODEL_NAME, load_model_and_tokenizer, print_cache_report
+from qwen_prefix_cache import get_prefix_cache, print_prefix_cache_report
+from qwen_response_cache import get_response_cache, print_response_cache_report
+
+def verify_prompt_by_replay(model, tokenizer, inputs):
+    """Generate once, then confirm it with a single teacher-forced forward pass"""
+    
+    print("  Generate:", end=" ", flush=True)
+    fingerprint = generate_with_fingerprint(model, tokenizer, inputs, max_new_tokens=300)
+    print(f"✅ {len(fingerprint['token_ids'])} tokens (argmax sha256 {fingerprint['argmax_hash'][:12]})")
+    
+    print("  Replay:", end=" ", flush=True)
+    replay = verify_by_replay(model, inputs, fingerprint)
+    if replay["match"]:
+        print(f"✅ argmax identical at all {replay['positions_checked']} positions")
+    else:
+        print(f"❌ first divergence at token {replay['first_divergence']}"
+              f" (expected {replay.get('expected_token')}, got {replay.get('replayed_token')},"
+              f" logit margin {replay.get('logit_margin', 0.0):.4f})")
+    
+    thread_results = check_thread_invariance(model, inputs, fingerprint)
+    for threads, divergence in thread_results.items():
+        status = "✅ identical" if divergence is None else f"❌ diverges at token {divergence}"
+        print(f"  Threads={threads}: {status}")
+    
+    response = tokenizer.decode(fingerprint["token_ids"], skip_special_tokens=True).strip()
+    matched = replay["match"] and all(divergence is None for divergence in thread_results.values())
+    return response, matched
+
+def verify_prompt_from_cache(model, tokenizer, inputs, golden, response_cache, generation_kwargs):
+    """Serve the prompt from the response cache and compare its tokens with the golden
+
+    Misses are generated. A hit checks the stored output, not the generation
+    code: the cache key covers the model, library versions, prompt tokens and
+    parameters only. Returns ``(response, matched)``; a missing golden counts
+    as a mismatch.
+    """
+    
+    hits_before = response_cache.hits
+    with torch.no_grad():
+        outputs = response_cache.generate(model, inputs, **generation_kwargs)
+    hit = response_cache.hits > hits_before
+    token_ids = outputs[0, inputs["input_ids"].shape[1]:].tolist()
+    print(f"  Run 1: ✅ {'cache hit' if hit else 'generated (cache miss)'}")
+    
+    response = tokenizer.decode(token_ids, skip_special_tokens=True).strip()
+    if golden is None:
+        print("  ❌ FAIL: no golden for this model; record one with qwen_golden.py")
+        return response, False
+    position = first_divergence(golden["token_ids"], token_ids)
+    if position is None:
+        print(f"  ✅ PASS: identical to the golden ({len(token_ids)} tokens)")
+    else:
+        print(f"  ❌ FAIL: differs from the golden at token {position}")
+    return response, position is None
+
+def check_cache_exactness(model, tokenizer, inputs, formatted_prompt, reference, response_cache,
+                          generation_kwargs):
+    """Compare the response cache against a plain generate; returns False on a mismatch"""
+    
+    if not response_cache.enabled:
+        print("  ⏭️ Response cache: disabled")
+        return True
+    hits_before = response_cache.hits
+    with torch.no_grad():
+        outputs = response_cache.generate(model, inputs, **generation_kwargs)
+    hit = response_cache.hits > hits_before
+    source = "cached entry from an earlier pass" if hit else "fresh entry"
+    response = tokenizer.decode(outputs[0], skip_special_tokens=True)[len(formatted_prompt):].strip()
+    if response == reference:
+        print(f"  ✅ Response cache ({source}): identical to the plain generation")
+        return True
+    print(f"  ❌ Response cache ({source}): differs from the plain generation")
+    print(f"    Response cache: {response[:100]}...")
+    return False
+
+def test_deterministic_responses(replay=False, accelerated=False, check_caches=False, cached=False):
+    """Test that the model produces identical responses with temperature=0.0
+    
+    With ``replay=True`` each prompt is generated once and verified by a
+    teacher-forced forward pass instead of a second full generation.
+    By default run 1 reuses the prefix KV cache and run 2 is a plain
+    ``model.generate``, so a PASS also confirms the prefix cache is exact.
+    With ``accelerated=True`` both runs go through the static KV cache and
+    compiled decode step, so a PASS also confirms that path is deterministic.
+    With ``check_caches=True`` the response cache is also compared against
+    run 2.
+    With ``cached=True`` run 1 is served from the response cache and checked
+    against the golden store instead of a second generation, so a warm run
+    does no generation at all.
+    """
     
     print("🧪 Deterministic Response Test for Qwen2.5-0.5B-Instruct")
     print("=" * 70)
     
     # Model name on Hugging Face
-    model_name = "Qwen/Qwen2.5-0.5B-Instruct"
+    model_name = MODEL_NAME
     
     try:
-        print(f"Loading tokenizer and model: {model_name}")
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_name,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None
-        )
+        tokenizer, model = load_model_and_tokenizer(model_name)
         
         print("✅ Model loaded successfully!")
         print(f"Model device: {model.device}")
         print(f"Model dtype: {model.dtype}")
         
         # Test prompts
-        test_prompts = [
-            "Explain what artificial intelligence is in simple terms.",
-            "Write a short poem about the ocean.",
-            "What are the benefits of renewable energy?",
-            "Describe the process of photosynthesis.",
-        ]
+        test_prompts = DETERMINISTIC_PROMPTS
         
         print(f"\n🔬 Testing deterministic behavior (temperature=0.0, max_tokens=300)")
-        print("Running each prompt twice to verify identical outputs...\n")
+        failures = 0
+        if replay:
+            print("Generating each prompt once and verifying it by teacher-forced replay...\n")
+        elif cached:
+            print(f"Serving each prompt from the response cache and checking it against {DEFAULT_STORE}...\n")
+            response_cache = get_response_cache()
+            goldens = load_store(DEFAULT_STORE)["entries"]
+            fingerprint = model_fingerprint(model)
+        elif accelerated:
+            print("Running each prompt twice through the static KV cache + compiled decode step...\n")
+            accelerator = AcceleratedGenerator(model, tokenizer, max_new_tokens=300)
+        else:
+            print("Running each prompt with the prefix KV cache, then with plain model.generate, "
+                  "to verify identical outputs...")
+            prefix_cache = get_prefix_cache(model, tokenizer)
+            if check_caches:
+                print("Then checking the response cache against the plain run")
+                response_cache = get_response_cache()
+            print()
         
         for i, test_prompt in enumerate(test_prompts, 1):
             print(f"📝 Test {i}: {test_prompt}")
@@ -57,21 +160,46 @@ def test_deterministic_responses():
             if torch.cuda.is_available() and hasattr(model, 'device'):
                 inputs = {k: v.to(model.device) for k, v in inputs.items()}
             
+            if replay:
+                response, matched = verify_prompt_by_replay(model, tokenizer, inputs)
+                if not matched:
+                    failures += 1
+                print(f"  📤 Response: {response[:150]}{'...' if len(response) > 150 else ''}")
+                print()
+                continue
+            
             responses = []
+            generation_kwargs = dict(
+                max_new_tokens=300,
+                do_sample=False,  # Deterministic
+                temperature=0.0,  # No randomness
+                pad_token_id=tokenizer.eos_token_id,
+                eos_token_id=tokenizer.eos_token_id
+            )
+            
+            if cached:
+                golden = goldens.get(entry_id(test_prompt, {"max_new_tokens": 300}))
+                if golden is not None and golden["model_fingerprint"] != fingerprint:
+                    golden = None
+                response, matched = verify_prompt_from_cache(model, tokenizer, inputs, golden,
+                                                             response_cache, generation_kwargs)
+                if not matched:
+                    failures += 1
+                print(f"  📤 Response: {response[:150]}{'...' if len(response) > 150 else ''}")
+                print()
+                continue
             
             # Generate response twice with same settings
             for run in [1, 2]:
                 print(f"  Run {run}:", end=" ", flush=True)
                 
                 with torch.no_grad():
-                    outputs = model.generate(
-                        **inputs,
-                        max_new_tokens=300,
-                        do_sample=False,  # Deterministic
-                        temperature=0.0,  # No randomness
-                        pad_token_id=tokenizer.eos_token_id,
-                        eos_token_id=tokenizer.eos_token_id
-                    )
+                    if accelerated:
+                        outputs = accelerator.generate(inputs, **generation_kwargs)
+                    elif run == 1:
+                        outputs = prefix_cache.generate(model, inputs, **generation_kwargs)
+                    else:
+                        outputs = model.generate(**inputs, **generation_kwargs)
                 
                 # Decode the response
                 response = tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -85,36 +213,46 @@ def test_deterministic_responses():
                 print("  ✅ PASS: Both responses are identical (deterministic)")
             else:
                 print("  ❌ FAIL: Responses differ (non-deterministic)")
+                failures += 1
                 print(f"    Response 1: {responses[0][:100]}...")
                 print(f"    Response 2: {responses[1][:100]}...")
             
+            if check_caches and not accelerated:
+                if not check_cache_exactness(model, tokenizer, inputs, formatted_prompt, responses[1],
+                                             response_cache, generation_kwargs):
+                    failures += 1
+            
             # Show the response
             print(f"  📤 Response: {responses[0][:150]}{'...' if len(responses[0]) > 150 else ''}")
             print()
         
         print("🎯 Deterministic Testing Complete!")
+        if failures:
+            print(f"❌ {failures} check(s) failed: outputs differed between runs, caches or the golden")
+            return False
         return True
         
     except Exception as e:
         print(f"❌ Error during testing: {str(e)}")
         return False
 
-def run_extended_response_test():
-    """Test the model with extended max_tokens setting"""
+def run_extended_response_test(response_cache=False):
+    """Test the model with extended max_tokens setting
+    
+    The prompt reuses the prefix KV cache built for the deterministic test.
+    With ``response_cache=True`` a repeated run is answered from the
+    persistent response cache instead of running the model.
+    """
     
     print("\n" + "=" * 70)
     print("📏 Extended Response Test (max_tokens=400)")
     print("=" * 70)
     
-    model_name = "Qwen/Qwen2.5-0.5B-Instruct"
+    model_name = MODEL_NAME
     
     try:
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_name,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None
-        )
+        # Reuses the model loaded by test_deterministic_responses()
+        tokenizer, model = load_model_and_tokenizer(model_name)
         
         # Extended response prompt
         extended_prompt = "Write a detailed explanation of machine learning, including its types, applications, and future prospects."
@@ -133,14 +271,22 @@ def run_extended_response_test():
         print(f"📝 Prompt: {extended_prompt}")
         print("🔄 Generating extended response...")
         
+        generation_kwargs = dict(
+            max_new_tokens=400,
+            do_sample=False,
+            temperature=0.0,
+            pad_token_id=tokenizer.eos_token_id
+        )
+        prefix_cache = get_prefix_cache(model, tokenizer)
+        from_cache = False
         with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_new_tokens=400,
-                do_sample=False,
-                temperature=0.0,
-                pad_token_id=tokenizer.eos_token_id
-            )
+            if response_cache:
+                cache = get_response_cache()
+                hits_before = cache.hits
+                outputs = cache.generate(model, inputs, generator=prefix_cache, **generation_kwargs)
+                from_cache = cache.hits > hits_before
+            else:
+                outputs = prefix_cache.generate(model, inputs, **generation_kwargs)
         
         response = tokenizer.decode(outputs[0], skip_special_tokens=True)
         generated_text = response[len(formatted_prompt):].strip()
@@ -149,6 +295,8 @@ def run_extended_response_test():
         print("=" * 50)
         print(generated_text)
         print("=" * 50)
+        if from_cache:
+            print("ℹ️ Served from the response cache: the model did not run")
         
         return True
         
@@ -160,8 +308,19 @@ if __name__ == "__main__":
     print("🚀 Qwen2.5-0.5B-Instruct Deterministic & Extended Testing")
     print("Configuration: temperature=0.0, max_tokens=300-400")
     
-    success1 = test_deterministic_responses()
-    success2 = run_extended_response_test()
+    # --replay verifies with one teacher-forced pass instead of a second generate
+    # --accelerated runs both generations through the static cache + compiled decode step
+    # --check-caches also compares the response cache with the plain run
+    # --cached serves run 1 from the response cache and checks it against the goldens
+    success1 = test_deterministic_responses(replay='--replay' in sys.argv,
+                                            accelerated='--accelerated' in sys.argv,
+                                            check_caches='--check-caches' in sys.argv,
+                                            cached='--cached' in sys.argv)
+    # --response-cache answers a repeated extended test from the persistent response cache
+    success2 = run_extended_response_test(response_cache='--response-cache' in sys.argv)
+    print_cache_report()
+    print_prefix_cache_report()
+    print_response_cache_report()
     
     if success1 and success2:
         print("\n🎉 All tests completed successfully!")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+pytest checks for launcher_metrics.py and the launcher's /metrics endpoint
+"""
+
+import http.client
+import re
+import threading
+
+import pytest
+
+import launcher_metrics
+import webllm_python_launcher
+
+ASSET = b"w" * 3000
+SAMPLE = re.compile(r'^([a-z_]+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse(text):
+    """Return ``{(name, frozenset(labels)): value}`` for every sample, checking the line format"""
+    samples, typed = {}, set()
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            typed.add(line.split()[2])
+            continue
+        if line.startswith("# HELP "):
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"malformed sample line: {line!r}"
+        name, labels, value = match.groups()
+        assert re.sub(r"_(bucket|sum|count)$", "", name) in typed or name in typed
+        pairs = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels or ""))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+
+def test_shards_from_several_threads_are_merged():
+    metrics = launcher_metrics.RequestMetrics()
+
+    def worker():
+        for _ in range(50):
+            metrics.record("GET", "/a.js", 200, 10, 0.002)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.record("GET", "/missing", 404, 0, 0.001)
+
+    assert len(metrics.shards) == 5
+    data = metrics.snapshot()
+    assert data["requests"] == {("GET", "/a.js", 200): 200, ("GET", launcher_metrics.UNMATCHED_PATH, 404): 1}
+    assert data["bytes"]["/a.js"] == 2000
+    histogram = data["latency"]["/a.js"]
+    assert sum(histogram[:-1]) == 200 and histogram[-1] == pytest.approx(0.4)
+
+
+def test_label_values_are_escaped():
+    metrics = launcher_metrics.RequestMetrics()
+    metrics.record("GET", '/odd"\\name', 200, 1, 0.01)
+    samples = parse(metrics.render())
+    assert samples[("webllm_http_response_bytes_total", frozenset({("path", '/odd\\"\\\\name')}))] == 1
+
+
+@pytest.fixture
+def launcher(tmp_path):
+    (tmp_path / "asset.bin").write_bytes(ASSET)
+    httpd, port = webllm_python_launcher.start_local_server(
+        0, workers=4, directory=str(tmp_path), compression=False, telemetry=False)
+    yield httpd, port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_scrape_after_requests(launcher):
+    httpd, port = launcher
+    # Three keep-alive connections held open at once run on three pool threads
+    connections = [http.client.HTTPConnection("127.0.0.1", port, timeout=5) for _ in range(3)]
+    for _ in range(2):
+        for conn in connections:
+            conn.request("GET", "/asset.bin")
+            response = conn.getresponse()
+            assert response.status == 200 and response.read() == ASSET
+    connections[0].request("GET", "/nope-123")
+    connections[0].getresponse().read()
+
+    scrape = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    scrape.request("GET", launcher_metrics.METRICS_PATH)
+    response = scrape.getresponse()
+    text = response.read().decode("utf-8")
+    for conn in connections + [scrape]:
+        conn.close()
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == launcher_metrics.CONTENT_TYPE
+    assert len(httpd.metrics.shards) >= 3
+    samples = parse(text)
+    path = frozenset({("path", "/asset.bin")})
+
+    assert samples[("webllm_http_requests_total",
+                    frozenset({("method", "GET"), ("path", "/asset.bin"), ("status", "200")}))] == 6
+    assert samples[("webllm_http_requests_total",
+                    frozenset({("method", "GET"), ("path", launcher_metrics.UNMATCHED_PATH), ("status", "404")}))] == 1
+    assert samples[("webllm_http_response_bytes_total", path)] == 6 * len(ASSET)
+
+    buckets = [samples[("webllm_http_request_duration_seconds_bucket", path | {("le", str(bound))})]
+               for bound in launcher_metrics.LATENCY_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert samples[("webllm_http_request_duration_seconds_bucket", path | {("le", "+Inf")})] == 6
+    assert samples[("webllm_http_request_duration_seconds_count", path)] == 6
+    assert samples[("webllm_http_request_duration_seconds_sum", path)] > 0
+
+    assert samples[("webllm_launcher_workers", frozenset())] == 4
+    assert samples[("process_start_time_seconds", frozenset())] <= httpd.started
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+pytest checks for openai_server.py's HTTP layer against a stub generator
+"""
+
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+import openai_server  # noqa: E402
+
+
+class StubTokenizer:
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=True):
+        return "".join(message["content"] for message in messages)
+
+    def __call__(self, text, return_tensors=None):
+        return {"input_ids": torch.zeros((1, len(text)), dtype=torch.long)}
+
+
+class StubServer(openai_server.ChatCompletionServer):
+    """Streams a fixed completion; generations wait on ``gate`` while it is cleared"""
+
+    CHUNKS = ["Hello", " there", "!"]
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def load(self, model_name):
+        return StubTokenizer(), None
+
+    def run_generation(self, generation, on_text=None, stop_event=None):
+        self.gate.wait(5)
+        for text in self.CHUNKS:
+            if on_text is not None:
+                on_text(text)
+        completion_tokens = len(self.CHUNKS)
+        return {
+            "content": "".join(self.CHUNKS),
+            "finish_reason": "length" if generation["max_tokens"] <= completion_tokens else "stop",
+            "usage": {
+                "prompt_tokens": generation["prompt_tokens"],
+                "completion_tokens": completion_tokens,
+                "total_tokens": generation["prompt_tokens"] + completion_tokens,
+            },
+        }
+
+
+@pytest.fixture
+def server():
+    stub = StubServer(workers=1, max_queue=0)
+    loop = asyncio.new_event_loop()
+    httpd = loop.run_until_complete(asyncio.start_server(stub.handle_connection, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    stub.port = httpd.sockets[0].getsockname()[1]
+    yield stub
+    stub.gate.set()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    httpd.close()
+    loop.run_until_complete(httpd.wait_closed())
+    stub.executor.shutdown(wait=True)
+    loop.close()
+
+
+def post(port, body, raw=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("POST", "/v1/chat/completions",
+                     body=raw if raw is not None else json.dumps(body),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response, response.read()
+    finally:
+        conn.close()
+
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+def test_completion(server):
+    response, body = post(server.port, {"messages": MESSAGES})
+    assert response.status == 200
+    payload = json.loads(body)
+    assert payload["object"] == "chat.completion"
+    assert payload["choices"][0]["message"] == {"role": "assistant", "content": "Hello there!"}
+    assert payload["choices"][0]["finish_reason"] == "stop"
+    assert payload["usage"] == {"prompt_tokens": 2, "completion_tokens": 3, "total_tokens": 5}
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"messages": []},
+    {"messages": [{"role": "user"}]},
+    {"messages": MESSAGES, "max_tokens": 0},
+    {"messages": MESSAGES, "max_tokens": "10"},
+    {"messages": MESSAGES, "max_tokens": True},
+    {"messages": MESSAGES, "temperature": 2.5},
+    {"messages": MESSAGES, "top_p": -0.1},
+    {"messages": MESSAGES, "seed": "7"},
+])
+def test_invalid_parameters_are_rejected(server, body):
+    response, raw = post(server.port, body)
+    assert response.status == 400
+    assert json.loads(raw)["error"]["type"] == "invalid_request_error"
+    assert server.in_flight == 0
+
+
+@pytest.mark.parametrize("raw", [b"{not json", b"[1, 2]"])
+def test_malformed_body_is_rejected(server, raw):
+    response, body = post(server.port, None, raw=raw)
+    assert response.status == 400
+    assert json.loads(body)["error"]["type"] == "invalid_request_error"
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-1"])
+def test_invalid_content_length_is_rejected(server, length):
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(b"POST /v1/chat/completions HTTP/1.1\r\nHost: x\r\nContent-Length: " + length + b"\r\n\r\n")
+        response = b""
+        while chunk := sock.recv(4096):
+            response += chunk
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Invalid Content-Length" in response
+
+
+def test_over_capacity_gets_429(server):
+    server.gate.clear()
+    first = {}
+    thread = threading.Thread(target=lambda: first.update(zip(("response", "body"),
+                                                              post(server.port, {"messages": MESSAGES}))))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while server.in_flight < server.capacity and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    response, body = post(server.port, {"messages": MESSAGES})
+    assert response.status == 429
+    assert response.getheader("Retry-After") == "1"
+    assert json.loads(body)["error"]["type"] == "rate_limit_error"
+
+    server.gate.set()
+    thread.join(5)
+    assert first["response"].status == 200
+    assert server.stats["rejected"] == 1 and server.stats["completed"] == 1
+
+
+def test_stream_is_framed_as_server_sent_events(server):
+    response, body = post(server.port, {"messages": MESSAGES, "stream": True, "max_tokens": 3,
+                                        "stream_options": {"include_usage": True}})
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "text/event-stream"
+
+    text = body.decode("utf-8")
+    assert text.endswith("\n\n")
+    events = text[:-2].split("\n\n")
+    assert all(event.startswith("data: ") for event in events)
+    assert events[-1] == "data: [DONE]"
+
+    chunks = [json.loads(event[len("data: "):]) for event in events[:-1]]
+    assert all(chunk["object"] == "chat.completion.chunk" for chunk in chunks)
+    assert len({chunk["id"] for chunk in chunks}) == 1
+    assert chunks[0]["choices"][0]["delta"] == {"role": "assistant", "content": ""}
+    assert [chunk["choices"][0]["delta"]["content"] for chunk in chunks[1:4]] == StubServer.CHUNKS
+    assert chunks[4]["choices"][0] == {"index": 0, "delta": {}, "finish_reason": "length"}
+    assert chunks[5]["choices"] == [] and chunks[5]["usage"]["completion_tokens"] == 3
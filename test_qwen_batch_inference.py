@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+pytest checks for resuming qwen_batch_inference.py runs from a partial output file
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("torch")
+
+import qwen_batch_inference  # noqa: E402
+
+
+def result_line(record_id):
+    return json.dumps({"id": record_id, "response": f"answer {record_id}"}) + "\n"
+
+
+def test_missing_output_has_no_completed_ids(tmp_path):
+    assert qwen_batch_inference.load_completed_ids(tmp_path / "results.jsonl") == set()
+
+
+def test_complete_output_is_left_alone(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(result_line(1) + result_line("b"))
+
+    assert qwen_batch_inference.load_completed_ids(output) == {1, "b"}
+    assert output.read_text() == result_line(1) + result_line("b")
+
+
+@pytest.mark.parametrize("tail", [
+    '{"id": 3, "respon',          # crash mid-write: no newline
+    '{"id": 3, "respon\n',        # torn JSON that still ends in a newline
+    '{"response": "no id"}\n',
+])
+def test_torn_tail_is_truncated(tmp_path, tail):
+    output = tmp_path / "results.jsonl"
+    output.write_text(result_line(1) + result_line(2) + tail)
+
+    assert qwen_batch_inference.load_completed_ids(output) == {1, 2}
+    assert output.read_text() == result_line(1) + result_line(2)
+
+
+class StubTokenizer:
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=True):
+        return messages[-1]["content"]
+
+    def __call__(self, text):
+        return {"input_ids": list(range(len(text)))}
+
+
+def test_resume_skips_completed_ids(tmp_path, monkeypatch):
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text("".join(json.dumps({"id": i, "prompt": f"prompt {i}"}) + "\n" for i in range(1, 5)))
+    output = tmp_path / "results.jsonl"
+    output.write_text(result_line(1) + result_line(2) + '{"id": 3, "resp')
+
+    generated = []
+
+    def generate_batch(model, tokenizer, batch, max_new_tokens=300):
+        generated.extend(item["record"]["id"] for item in batch)
+        return [{"id": item["record"]["id"], "response": "new", "completion_tokens": 1} for item in batch]
+
+    monkeypatch.setattr(qwen_batch_inference, "load_model_and_tokenizer", lambda name: (StubTokenizer(), None))
+    monkeypatch.setattr(qwen_batch_inference, "generate_batch", generate_batch)
+    stats = qwen_batch_inference.run_batch_inference(str(prompts), str(output), batch_size=2)
+
+    assert sorted(generated) == [3, 4]
+    assert stats["skipped"] == 2 and stats["prompts"] == 2
+    ids = [json.loads(line)["id"] for line in output.read_text().splitlines()]
+    assert sorted(ids) == [1, 2, 3, 4]
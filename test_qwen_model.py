@@ -3,32 +3,41 @@
 Test script for Qwen2.5-0.5B-Instruct model using Transformers library
 """
 
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import sys
+
 import torch
 
-def download_and_test_qwen_model():
-    """Download and test the Qwen2.5-0.5B-Instruct model"""
+from qwen_accelerated import AcceleratedGenerator
+from qwen_model_loader import MODEL_NAME, load_model_and_tokenizer, print_cache_report
+from qwen_response_cache import get_response_cache, print_response_cache_report
+from qwen_streaming import print_stream_metrics, stream_generate
+
+def download_and_test_qwen_model(stream=False, quantization=None, accelerated=False, response_cache=False):
+    """Download and test the Qwen2.5-0.5B-Instruct model
+    
+    With ``stream=True`` tokens are printed as they are generated and a
+    latency summary (TTFT, prefill, inter-token latency) is shown at the end.
+    ``quantization="int8"`` runs the int8 dynamic-quantized CPU model.
+    ``accelerated=True`` decodes through a static KV cache and a compiled
+    decode step (see qwen_accelerated.py).
+    ``response_cache=True`` answers repeated runs from the persistent
+    response cache, in which case the model may not run at all.
+    """
     
     print("Starting Qwen2.5-0.5B-Instruct model download and test...")
     print("-" * 60)
     
     # Model name on Hugging Face
-    model_name = "Qwen/Qwen2.5-0.5B-Instruct"
+    model_name = MODEL_NAME
     
     try:
-        print(f"Loading tokenizer for {model_name}...")
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        
-        print(f"Loading model {model_name}...")
-        model = AutoModelForCausalLM.from_pretrained(
-            model_name,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None
-        )
+        tokenizer, model = load_model_and_tokenizer(model_name, quantization=quantization)
         
         print("Model and tokenizer loaded successfully!")
         print(f"Model device: {model.device}")
         print(f"Model dtype: {model.dtype}")
+        if quantization:
+            print(f"Quantization: {quantization} (dynamic, nn.Linear layers)")
         
         # Test the model with a simple prompt
         print("\nTesting the model with a simple prompt...")
@@ -56,15 +65,53 @@ def download_and_test_qwen_model():
         if torch.cuda.is_available() and hasattr(model, 'device'):
             inputs = {k: v.to(model.device) for k, v in inputs.items()}
         
+        if stream:
+            print("\nStreaming response...\nModel response: ", end="", flush=True)
+            metrics = {}
+            # A single prompt gains nothing from the prefix KV cache
+            for text in stream_generate(model, tokenizer, inputs, max_new_tokens=300, metrics=metrics,
+                                        use_prefix_cache=False):
+                print(text, end="", flush=True)
+            print()
+            print_stream_metrics(metrics)
+            print("\n" + "="*60)
+            print("✅ Qwen2.5-0.5B-Instruct model test completed successfully!")
+            return True
+        
+        if accelerated:
+            print("\nGenerating response (static KV cache + compiled decode step)...")
+            accelerator = AcceleratedGenerator(model, tokenizer, max_new_tokens=300)
+            # Compile outside the timed call so the throughput below is steady-state
+            warmup_seconds = accelerator.warmup(inputs)
+            metrics = {}
+            outputs = accelerator.generate(inputs, metrics=metrics, temperature=0.0)
+            generated_text = tokenizer.decode(
+                outputs[0, inputs["input_ids"].shape[1]:], skip_special_tokens=True
+            ).strip()
+            print(f"\nModel response: {generated_text}")
+            print(f"\n⏱️ Prefill: {metrics['prefill_seconds']:.2f}s, "
+                  f"decode: {metrics['decode_tokens_per_second'] or 0:.1f} tokens/s "
+                  f"(after a {warmup_seconds:.1f}s warm-up/compile run)")
+            print("\n" + "="*60)
+            print("✅ Qwen2.5-0.5B-Instruct model test completed successfully!")
+            return True
+        
         print("\nGenerating response...")
+        generation_kwargs = dict(
+            max_new_tokens=300,
+            do_sample=False,
+            temperature=0.0,
+            pad_token_id=tokenizer.eos_token_id
+        )
+        from_cache = False
         with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_new_tokens=300,
-                do_sample=False,
-                temperature=0.0,
-                pad_token_id=tokenizer.eos_token_id
-            )
+            if response_cache:
+                cache = get_response_cache()
+                hits_before = cache.hits
+                outputs = cache.generate(model, inputs, **generation_kwargs)
+                from_cache = cache.hits > hits_before
+            else:
+                outputs = model.generate(**inputs, **generation_kwargs)
         
         # Decode the response
         response = tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -73,6 +120,8 @@ def download_and_test_qwen_model():
         generated_text = response[len(formatted_prompt):].strip()
         
         print(f"\nModel response: {generated_text}")
+        if from_cache:
+            print("ℹ️ Served from the response cache: the model did not run (drop --response-cache to test it)")
         print("\n" + "="*60)
         print("✅ Qwen2.5-0.5B-Instruct model test completed successfully!")
         
@@ -98,7 +147,18 @@ if __name__ == "__main__":
     print("=" * 60)
     
     check_system_info()
-    success = download_and_test_qwen_model()
+    # --stream prints tokens live and reports latency metrics
+    # --int8 runs the int8 dynamic-quantized CPU model (see quantization_report.py)
+    success = download_and_test_qwen_model(
+        stream='--stream' in sys.argv,
+        quantization='int8' if '--int8' in sys.argv else None,
+        # --accelerated uses a static KV cache and a torch.compile'd decode step
+        accelerated='--accelerated' in sys.argv,
+        # --response-cache answers repeated runs from the persistent response cache
+        response_cache='--response-cache' in sys.argv
+    )
+    print_cache_report()
+    print_response_cache_report()
     
     if success:
         print("\n🎉 All tests passed! The Qwen2.5-0.5B-Instruct model is working correctly.")
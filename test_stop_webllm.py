@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+pytest checks for stop_webllm.py against a real child process
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import stop_webllm
+
+MARKER = "webllm-stop-test-marker"
+
+# Announces itself once the SIGTERM handler is installed, then ignores SIGTERM
+STUBBORN_CHILD = (
+    "import signal, sys, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+    "print('ready', flush=True); time.sleep(60)"
+)
+
+
+@pytest.fixture
+def sleeper():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)", MARKER])
+    yield child
+    if child.poll() is None:
+        child.kill()
+        child.wait()
+
+
+@pytest.fixture
+def stubborn_children():
+    children = [subprocess.Popen([sys.executable, "-c", STUBBORN_CHILD, MARKER], stdout=subprocess.PIPE)
+                for _ in range(4)]
+    for child in children:
+        assert child.stdout.readline() == b"ready\n"
+    yield children
+    for child in children:
+        if child.poll() is None:
+            child.kill()
+        child.wait()
+        child.stdout.close()
+
+
+def test_snapshot_finds_marked_python_process(sleeper):
+    snapshot = stop_webllm.ProcessSnapshot()
+    pids = [entry["pid"] for entry in snapshot.with_keywords(snapshot.name_contains("python"), [MARKER])]
+    assert sleeper.pid in pids
+    assert sleeper.pid in [entry["pid"] for entry in stop_webllm.find_python_server_processes(snapshot)]
+
+
+def test_stop_processes_terminates_it(sleeper):
+    snapshot = stop_webllm.ProcessSnapshot()
+    targets = [entry for entry in snapshot.with_keywords(snapshot.name_contains("python"), [MARKER])
+               if entry["pid"] == sleeper.pid]
+    assert targets
+
+    assert stop_webllm.stop_processes(targets, timeout=5)
+    assert sleeper.wait(timeout=5) is not None
+
+
+def test_snapshot_indexes_by_cwd(tmp_path):
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)", MARKER], cwd=tmp_path)
+    try:
+        assert child.pid in [entry["pid"] for entry in stop_webllm.ProcessSnapshot().in_cwd(tmp_path)]
+    finally:
+        child.kill()
+        child.wait()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="relies on ignoring SIGTERM")
+def test_stop_processes_shares_one_deadline(stubborn_children, capsys):
+    snapshot = stop_webllm.ProcessSnapshot()
+    pids = {child.pid for child in stubborn_children}
+    targets = [entry for entry in snapshot.with_keywords(snapshot.name_contains("python"), [MARKER])
+               if entry["pid"] in pids]
+    assert len(targets) == len(stubborn_children)
+
+    start = time.perf_counter()
+    assert stop_webllm.stop_processes(targets, timeout=1)
+    elapsed = time.perf_counter() - start
+
+    # One shared 1 s deadline for all four, not 1 s each
+    assert 1 <= elapsed < 2.5
+    # stop_processes reaps the children itself, so their Popen return codes are not meaningful
+    assert capsys.readouterr().out.count("force stopped") == len(stubborn_children)
+    for child in stubborn_children:
+        child.wait(timeout=5)
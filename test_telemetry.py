@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+pytest checks for the telemetry beacon store, its percentile report and the launcher endpoint
+"""
+
+import http.client
+import json
+
+import pytest
+
+import telemetry_report
+import telemetry_store
+import webllm_python_launcher
+
+
+def generation(**fields):
+    return {"type": "generation", "browser": "Firefox 133", "gpu": "apple metal-3", **fields}
+
+
+@pytest.mark.parametrize("field, value", [
+    ("browser", 42),
+    ("browser", "x" * (telemetry_store.MAX_STRING_LENGTH + 1)),
+    ("ok", 1),
+    ("ttft_s", "0.5"),
+    ("ttft_s", True),
+    ("ttft_s", float("nan")),
+    ("tokens_per_s", float("inf")),
+    ("context_tokens", [1, 2]),
+])
+def test_clean_record_rejects_malformed_fields(field, value):
+    assert telemetry_store.clean_record(generation(**{field: value})) is None
+
+
+def test_clean_record_keeps_known_fields_only():
+    record = generation(ttft_s=0.25, ok=None, streamed=True, secret="dropped")
+    assert telemetry_store.clean_record(record) == {
+        "type": "generation", "browser": "Firefox 133", "gpu": "apple metal-3",
+        "ok": None, "streamed": True, "ttft_s": 0.25,
+    }
+    assert telemetry_store.clean_record({"type": "unknown"}) is None
+    assert telemetry_store.clean_record(["generation"]) is None
+
+
+def test_parse_beacon_caps_records_per_post():
+    records = [generation(ttft_s=i) for i in range(telemetry_store.MAX_RECORDS_PER_POST + 20)]
+    parsed = telemetry_store.parse_beacon(json.dumps({"records": records}))
+    assert len(parsed) == telemetry_store.MAX_RECORDS_PER_POST
+    assert parsed[-1]["ttft_s"] == telemetry_store.MAX_RECORDS_PER_POST - 1
+
+    # Bare lists are accepted; invalid records are dropped rather than failing the post
+    assert telemetry_store.parse_beacon(json.dumps([generation(), {"type": "bogus"}])) == [generation()]
+    with pytest.raises(ValueError):
+        telemetry_store.parse_beacon(json.dumps({"records": "nope"}))
+
+
+def test_store_rotates_past_max_bytes(tmp_path):
+    path = str(tmp_path / "beacons.jsonl")
+    store = telemetry_store.TelemetryStore(path, max_bytes=400, backups=2)
+    for i in range(20):
+        store.append([generation(ttft_s=i)], client="127.0.0.1")
+
+    files = store.files()
+    assert files == [f"{path}.2", f"{path}.1", path]
+    assert store.stats["rotations"] > 2
+    for file_path in files:
+        assert (tmp_path / file_path).stat().st_size <= 400
+
+    # Oldest records were dropped with the backup that fell off the end; the newest survive in order
+    ttfts = [record["ttft_s"] for record in telemetry_store.read_records(path, backups=2)]
+    assert ttfts == sorted(ttfts) and ttfts[-1] == 19 and ttfts[0] > 0
+
+
+def test_read_records_skips_torn_lines(tmp_path):
+    path = tmp_path / "beacons.jsonl"
+    path.write_text(
+        json.dumps(generation(ttft_s=0.1)) + "\n"
+        + '{"type": "generation", "ttft' + "\n"
+        + "[1, 2]\n"
+        + json.dumps(generation(ttft_s=0.2)) + "\n"
+        + '{"type": "generation"'
+    )
+    assert [record["ttft_s"] for record in telemetry_store.read_records(str(path))] == [0.1, 0.2]
+
+
+def test_aggregate_groups_by_browser_and_gpu():
+    records = telemetry_report.synthetic_records(30, seed=1)
+    records.append({"type": "load", "browser": "Firefox 133", "gpu": "apple metal-3", "ok": False,
+                    "total_s": 1e6})
+    report = telemetry_report.aggregate(records)
+
+    assert set(report) == {(browser, gpu) for browser, gpu, _ in telemetry_report.SYNTHETIC_ENVIRONMENTS}
+    firefox = report[("Firefox 133", "apple metal-3")]
+    assert firefox["total_s"]["count"] == 10
+    assert firefox["total_s"]["max"] < 1e6
+    assert firefox["tokens_per_s"]["p50"] > 0
+
+    assert telemetry_report.aggregate(records, model="another-model") == {}
+
+
+@pytest.fixture
+def launcher(tmp_path):
+    httpd, port = webllm_python_launcher.start_local_server(
+        0, workers=2, directory=str(tmp_path), compression=False, telemetry=False)
+    httpd.telemetry = telemetry_store.TelemetryStore(str(tmp_path / "store" / "beacons.jsonl"))
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    yield httpd, conn
+    conn.close()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post_beacon(conn, body):
+    conn.request("POST", telemetry_store.TELEMETRY_PATH, body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_launcher_stores_posted_beacons(launcher):
+    httpd, conn = launcher
+    response, body = post_beacon(conn, json.dumps({"records": [generation(ttft_s=0.3), {"type": "bogus"}]}))
+    assert response.status == 204 and body == b""
+
+    stored = list(telemetry_store.read_records(httpd.telemetry.path))
+    assert len(stored) == 1
+    assert stored[0]["ttft_s"] == 0.3 and stored[0]["client"] == "127.0.0.1"
+    assert httpd.telemetry.stats == {"posts": 1, "records": 1, "rotations": 0}
+
+
+@pytest.mark.parametrize("body", [b"{not json", b'{"records": "nope"}'])
+def test_launcher_rejects_malformed_beacons(launcher, body):
+    httpd, conn = launcher
+    response, _ = post_beacon(conn, body)
+    assert response.status == 400
+    assert list(telemetry_store.read_records(httpd.telemetry.path)) == []
@@ -10,6 +10,7 @@ async function testQwenWebLLM() {
         console.log(`Loading model: ${selectedModel}`);
         
         // Create the MLC engine
+        const loadStart = performance.now();
         const engine = await CreateMLCEngine(
             selectedModel,
             { 
@@ -19,6 +20,7 @@ async function testQwenWebLLM() {
             }
         );
         
+        const loadSeconds = (performance.now() - loadStart) / 1000;
         console.log("Model loaded successfully!");
         
         // Test the model with a simple prompt
@@ -33,13 +35,25 @@ async function testQwenWebLLM() {
         ];
         
         console.log("Generating response...");
+        const generateStart = performance.now();
         const reply = await engine.chat.completions.create({
             messages: messages,
             max_tokens: 100,
             temperature: 0.7,
         });
         
+        const latencySeconds = (performance.now() - generateStart) / 1000;
         const response = reply.choices[0]?.message?.content || "No response generated";
+        const usage = reply.usage || {};
+        const completionTokens = usage.completion_tokens ?? null;
+        const ttftSeconds = usage.extra?.time_to_first_token_s ?? null;
+        // Same definitions as throughput() in benchmark_qwen.py: decode counts the
+        // tokens after the first over the time after the first token
+        const decodeSeconds = ttftSeconds === null ? 0 : latencySeconds - ttftSeconds;
+        const decodeTokensPerSecond = completionTokens > 1 && decodeSeconds > 0
+            ? (completionTokens - 1) / decodeSeconds : null;
+        const endToEndTokensPerSecond = completionTokens !== null && latencySeconds > 0
+            ? completionTokens / latencySeconds : null;
         
         console.log(`\n✅ Model Response: ${response}`);
         console.log("\n🎉 WebLLM test completed successfully!");
@@ -50,7 +64,18 @@ async function testQwenWebLLM() {
             model: selectedModel,
             prompt: testPrompt,
             response: response,
-            timestamp: new Date().toISOString()
+            timestamp: new Date().toISOString(),
+            // Same fields benchmark_qwen.py writes for the Transformers backend
+            backend: "webllm",
+            metrics: {
+                load_seconds: loadSeconds,
+                latency_seconds: latencySeconds,
+                ttft_seconds: ttftSeconds,
+                decode_tokens_per_second: decodeTokensPerSecond,
+                end_to_end_tokens_per_second: endToEndTokensPerSecond,
+                prompt_tokens: usage.prompt_tokens ?? null,
+                completion_tokens: completionTokens
+            }
         };
         
         // Write results to JSON file
@@ -64,6 +89,7 @@ async function testQwenWebLLM() {
         // Save error info
         const errorResults = {
             success: false,
+            backend: "webllm",
             error: error.message,
             timestamp: new Date().toISOString()
         };
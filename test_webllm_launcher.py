@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+pytest checks for the launcher's static handler on an ephemeral port
+"""
+
+import http.client
+import threading
+import time
+
+import pytest
+
+import webllm_python_launcher
+
+SHARD = bytes(range(256)) * 16
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "params_shard_0.bin").write_bytes(SHARD)
+    (tmp_path / ".webllm_launcher.json").write_text("{}")
+    (tmp_path / ".webllm_cache").mkdir()
+    (tmp_path / ".webllm_cache" / "entry.json").write_text("{}")
+    httpd, port = webllm_python_launcher.start_local_server(
+        0, workers=4, directory=str(tmp_path), compression=False, telemetry=False)
+    yield port
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def connection(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=5)
+    yield conn
+    conn.close()
+
+
+def get(conn, path, **headers):
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_full_get_has_etag_and_accepts_ranges(connection):
+    response, body = get(connection, "/params_shard_0.bin")
+    assert response.status == 200
+    assert body == SHARD
+    assert response.getheader("Accept-Ranges") == "bytes"
+    assert response.getheader("ETag").startswith('"')
+
+
+def test_keep_alive_reuses_the_connection(connection):
+    for _ in range(3):
+        response, body = get(connection, "/params_shard_0.bin")
+        assert response.status == 200 and body == SHARD
+        assert not response.will_close
+
+
+@pytest.mark.parametrize("range_header, start, end", [
+    ("bytes=10-19", 10, 19),
+    ("bytes=4000-", 4000, len(SHARD) - 1),
+    ("bytes=-5", len(SHARD) - 5, len(SHARD) - 1),
+    ("bytes=4090-99999", 4090, len(SHARD) - 1),
+])
+def test_range_requests(connection, range_header, start, end):
+    response, body = get(connection, "/params_shard_0.bin", Range=range_header)
+    assert response.status == 206
+    assert response.getheader("Content-Range") == f"bytes {start}-{end}/{len(SHARD)}"
+    assert body == SHARD[start:end + 1]
+
+
+@pytest.mark.parametrize("range_header", ["bytes=5000-", "bytes=-0"])
+def test_unsatisfiable_range(connection, range_header):
+    response, body = get(connection, "/params_shard_0.bin", Range=range_header)
+    assert response.status == 416
+    assert response.getheader("Content-Range") == f"bytes */{len(SHARD)}"
+    assert body == b""
+
+
+def test_if_range_only_honours_the_current_etag(connection):
+    etag = get(connection, "/params_shard_0.bin")[0].getheader("ETag")
+
+    response, body = get(connection, "/params_shard_0.bin", Range="bytes=0-9", **{"If-Range": etag})
+    assert response.status == 206 and body == SHARD[:10]
+
+    response, body = get(connection, "/params_shard_0.bin", Range="bytes=0-9", **{"If-Range": '"stale"'})
+    assert response.status == 200 and body == SHARD
+
+
+def test_if_none_match_returns_304(connection):
+    etag = get(connection, "/params_shard_0.bin")[0].getheader("ETag")
+
+    response, body = get(connection, "/params_shard_0.bin", **{"If-None-Match": etag})
+    assert response.status == 304
+    assert response.getheader("ETag") == etag
+    assert body == b""
+
+    response, _ = get(connection, "/params_shard_0.bin", **{"If-None-Match": '"other"'})
+    assert response.status == 200
+
+
+@pytest.mark.parametrize("path", ["/.webllm_launcher.json", "/.webllm_cache/entry.json", "/.webllm_cache/"])
+def test_private_paths_are_not_served(connection, path):
+    response, _ = get(connection, path)
+    assert response.status == 404
+
+
+def test_directory_listing_hides_private_entries(connection):
+    response, body = get(connection, "/")
+    assert response.status == 200
+    assert b"params_shard_0.bin" in body
+    assert b".webllm" not in body
+
+
+def test_server_close_releases_idle_keep_alive_workers(tmp_path):
+    (tmp_path / "index.html").write_text("<html></html>")
+    httpd, port = webllm_python_launcher.start_local_server(
+        0, workers=2, directory=str(tmp_path), compression=False, telemetry=False)
+    conns = [http.client.HTTPConnection("127.0.0.1", port, timeout=5) for _ in range(2)]
+    for conn in conns:
+        response, _ = get(conn, "/index.html")
+        assert response.status == 200 and not response.will_close
+
+    # Both workers are now parked on idle keep-alive connections
+    start = time.monotonic()
+    httpd.shutdown()
+    httpd.server_close()
+    for thread in [t for t in threading.enumerate() if t.name.startswith("http_")]:
+        thread.join(5)
+        assert not thread.is_alive()
+    assert time.monotonic() - start < webllm_python_launcher.KEEP_ALIVE_TIMEOUT / 2
+    for conn in conns:
+        assert conn.sock.recv(1) == b""
+        conn.close()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+pytest checks for webllm_mirror.py against synthetic shards served from file:// URLs
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import webllm_mirror
+
+MODEL_ID = "Synthetic-0.5B-q4f16_1-MLC"
+SHARDS = ["params_shard_0.bin", "params_shard_1.bin"]
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A fake CDN: library, model library, configs and two weight shards on disk"""
+    root = tmp_path / "cdn"
+    model_dir = root / "model"
+    model_dir.mkdir(parents=True)
+    (model_dir / "mlc-chat-config.json").write_text(json.dumps({"tokenizer_files": ["tokenizer.json"]}))
+    (model_dir / "ndarray-cache.json").write_text(json.dumps({"records": [
+        {"dataPath": shard} for shard in SHARDS]}))
+    (model_dir / "tokenizer.json").write_text("{}")
+    for i, shard in enumerate(SHARDS):
+        (model_dir / shard).write_bytes(bytes([i]) * 4096)
+    (root / "model.wasm").write_bytes(b"\0asm" + b"\1" * 1024)
+    (root / "web-llm.js").write_text("export class MLCEngine {}\n")
+    return root
+
+
+def mirror(source, mirror_dir):
+    return webllm_mirror.mirror_model(
+        mirror_dir,
+        model_id=MODEL_ID,
+        model_url=(source / "model").as_uri(),
+        model_lib_url=(source / "model.wasm").as_uri(),
+        library_url=(source / "web-llm.js").as_uri(),
+    )
+
+
+def run_cli(mirror_dir, *args):
+    script = Path(webllm_mirror.__file__).resolve()
+    return subprocess.run([sys.executable, str(script), "--mirror-dir", str(mirror_dir), *args],
+                          capture_output=True, text=True)
+
+
+def test_mirror_records_every_artifact(source, tmp_path):
+    manifest = mirror(source, tmp_path / "mirror")
+
+    model_relpath = f"models/{MODEL_ID}/resolve/main"
+    for name in ["mlc-chat-config.json", "ndarray-cache.json", "tokenizer.json"] + SHARDS:
+        assert f"{model_relpath}/{name}" in manifest["artifacts"]
+    assert manifest["library"] == webllm_mirror.LIBRARY_PATH
+    assert manifest["models"][MODEL_ID] == {"model": model_relpath + "/", "model_lib": "libs/model.wasm"}
+    entry = manifest["artifacts"][f"{model_relpath}/{SHARDS[1]}"]
+    assert entry["sha256"] == webllm_mirror.sha256_file(source / "model" / SHARDS[1])
+
+
+def test_rerun_skips_unchanged_files(source, tmp_path, capsys):
+    mirror(source, tmp_path / "mirror")
+    capsys.readouterr()
+
+    mirror(source, tmp_path / "mirror")
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.strip()]
+    assert lines and all("up to date" in line for line in lines)
+
+    report = webllm_mirror.verify_mirror(tmp_path / "mirror")
+    assert report["ok"] == [] and report["missing"] == [] and report["corrupt"] == []
+    assert len(report["skipped"]) == len(SHARDS) + 5
+
+
+def test_corrupt_shard_fails_verify(source, tmp_path):
+    mirror_dir = tmp_path / "mirror"
+    mirror(source, mirror_dir)
+    assert run_cli(mirror_dir, "verify").returncode == 0
+
+    shard = mirror_dir / "models" / MODEL_ID / "resolve" / "main" / SHARDS[0]
+    shard.write_bytes(b"\xff" * 4096)
+    stat_result = shard.stat()
+    os.utime(shard, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+
+    result = run_cli(mirror_dir, "verify")
+    assert result.returncode != 0
+    assert f"Corrupt: models/{MODEL_ID}/resolve/main/{SHARDS[0]}" in result.stdout
+
+
+def test_pages_are_rewritten_to_the_mirror(source, tmp_path):
+    manifest = mirror(source, tmp_path / "mirror")
+
+    for page in ("webllm_standalone.html", "webllm_test.html"):
+        html = (Path(webllm_mirror.__file__).parent / page).read_text(encoding="utf-8")
+        rewritten = webllm_mirror.rewrite_page(html, manifest)
+
+        assert webllm_mirror.LIBRARY_IMPORT_URL not in rewritten
+        assert f"/webllm_mirror/{webllm_mirror.LIBRARY_PATH}" in rewritten
+        assert "window.WEBLLM_MIRROR = { appConfig:" in rewritten
+        assert f'"model_id": "{MODEL_ID}"' in rewritten
+        assert rewritten.index("window.WEBLLM_MIRROR") < rewritten.index("</head>")
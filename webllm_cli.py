@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the WebLLM / Qwen2.5-0.5B-Instruct tools
+Subcommands import their (heavy) dependencies only when they run
+"""
+
+import time
+
+_CLI_START = time.perf_counter()
+
+import argparse
+import importlib
+import runpy
+import sys
+
+_CLI_IMPORTED = time.perf_counter()
+
+# name -> (script module or "module:function", heavy dependencies imported when it runs, help)
+COMMANDS = {
+    "launch": ("launch_webllm", (), "Open webllm_standalone.html in the browser"),
+    "serve": ("webllm_python_launcher", (), "Serve the WebLLM test page over HTTP and open it"),
+    "api": ("openai_server", ("torch", "transformers"), "Run the OpenAI-compatible chat completions server"),
+    "stop": ("stop_webllm", ("psutil",), "Stop WebLLM browser/server processes"),
+    "stop-simple": ("stop_webllm_simple", (), "Stop WebLLM without third-party dependencies"),
+    "status": ("stop_webllm_helper:status", (), "Show stop instructions and WebLLM status (read-only)"),
+    "bench": ("benchmark_qwen", ("torch", "transformers"), "Run the Transformers CPU benchmark"),
+    "quantize": ("quantization_report", ("torch", "transformers"), "Compare int8 quantization against fp32"),
+    "accelerate": ("acceleration_report", ("torch", "transformers"),
+                   "Compare eager and static-cache + compiled decoding"),
+    "speculative": ("speculative_report", ("torch", "transformers"),
+                    "Measure speculative decoding against greedy generate"),
+    "batch": ("qwen_batch_inference", ("torch", "transformers"), "Bulk JSONL inference"),
+    "shard": ("qwen_sharded_runner", ("torch", "transformers"), "Run prompts across forked, core-pinned workers"),
+    "telemetry": ("telemetry_report", (), "Percentile report of the browser timing beacons"),
+    "cache": ("cache_manager", (), "Inventory the model caches and evict down to a byte budget"),
+    "mirror": ("webllm_mirror", (), "Manage the local WebLLM artifact mirror"),
+    "test": ("test_qwen_model", ("torch", "transformers"), "Run the basic Transformers test"),
+    "golden": ("qwen_golden", ("torch", "transformers"), "Check output against the stored goldens"),
+    "test-deterministic": ("test_deterministic_qwen", ("torch", "transformers"),
+                           "Run the deterministic test suite"),
+}
+
+# Commands whose scripts parse their own arguments with argparse and answer --help themselves
+SELF_DOCUMENTING = {
+    "serve", "api", "bench", "quantize", "accelerate", "speculative", "batch", "shard",
+    "telemetry", "cache", "mirror", "golden",
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="webllm_cli.py",
+        description="WebLLM Qwen2.5-0.5B-Instruct tools",
+        epilog="Arguments after the subcommand are passed to the underlying script "
+               "('<command> --help' describes the command without running it).",
+    )
+    parser.add_argument("--import-times", action="store_true",
+                        help="Report how long the CLI and the subcommand's dependencies took to import")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (_, _, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def import_timed(module_name):
+    """Import a module and return the seconds it took (0 if already imported)"""
+    if module_name in sys.modules:
+        return 0.0
+    start = time.perf_counter()
+    importlib.import_module(module_name)
+    return time.perf_counter() - start
+
+
+def print_import_times(breakdown):
+    print("⏱️ Import times:", file=sys.stderr)
+    for label, seconds in breakdown:
+        print(f"  {label:<28} {seconds * 1000:8.1f} ms", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Everything after the subcommand belongs to the script (except --help, handled below)
+    split = next((i for i, arg in enumerate(argv) if arg in COMMANDS), len(argv))
+    args = parser.parse_args(argv[:split + 1])
+    script_args = argv[split + 1:]
+    target, heavy_dependencies, help_text = COMMANDS[args.command]
+    script, _, function = target.partition(":")
+
+    # The other scripts act as soon as they start (cleanup, model tests) and do not parse
+    # --help themselves, so help is answered here and the script is never run
+    if args.command not in SELF_DOCUMENTING and ("-h" in script_args or "--help" in script_args):
+        print(f"usage: webllm_cli.py {args.command} [arguments for {script}.py]\n")
+        print(help_text)
+        if function:
+            print(f"\nRuns {script}.{function}(); it takes no arguments.")
+        else:
+            print(f"\nRuns {script}.py with the remaining arguments.")
+        return 0
+
+    breakdown = [("webllm_cli (stdlib)", _CLI_IMPORTED - _CLI_START)]
+    if args.import_times:
+        for dependency in heavy_dependencies:
+            try:
+                breakdown.append((dependency, import_timed(dependency)))
+            except ImportError as e:
+                print(f"❌ Missing dependency for '{args.command}': {e}", file=sys.stderr)
+                return 1
+        breakdown.append((script, import_timed(script)))
+        breakdown.append(("total before run", time.perf_counter() - _CLI_START))
+        print_import_times(breakdown)
+
+    if function:
+        getattr(importlib.import_module(script), function)()
+        return 0
+
+    # Run the script exactly as "python <script>.py <args>" would
+    sys.argv = [f"{script}.py"] + script_args
+    try:
+        runpy.run_module(script, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local mirror of the WebLLM library and Qwen2.5-0.5B-Instruct MLC weights
+Keeps a sha256 manifest, verifies shards incrementally and rewrites pages to load locally
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.parse
+from pathlib import Path
+
+MIRROR_DIR_NAME = "webllm_mirror"
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 1024 * 1024
+
+MODEL_ID = "Qwen2.5-0.5B-Instruct-q4f16_1-MLC"
+MODEL_URL = f"https://huggingface.co/mlc-ai/{MODEL_ID}/resolve/main/"
+MODEL_LIB_URL = (
+    "https://raw.githubusercontent.com/mlc-ai/binary-mlc-llm-libs/main/web-llm-models/"
+    "v0_2_48/Qwen2-0.5B-Instruct-q4f16_1-ctx4k_cs1k-webgpu.wasm"
+)
+# The import specifier used by webllm_standalone.html and webllm_test.html
+LIBRARY_IMPORT_URL = "https://esm.run/@mlc-ai/web-llm"
+LIBRARY_URL = "https://cdn.jsdelivr.net/npm/@mlc-ai/web-llm@0.2.79/lib/index.js"
+LIBRARY_PATH = "lib/web-llm.js"
+
+
+def _url_basename(url):
+    return urllib.parse.urlsplit(url).path.rsplit("/", 1)[-1]
+
+
+def sha256_file(path):
+    """Hash a file in fixed-size chunks so multi-hundred-MB shards stay cheap on memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(mirror_dir):
+    path = Path(mirror_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {"version": 1, "artifacts": {}, "models": {}, "library": None}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(mirror_dir, manifest):
+    """Write the manifest atomically so a crash never leaves it half-written"""
+    mirror_dir = Path(mirror_dir)
+    mirror_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=mirror_dir, prefix=".manifest-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, mirror_dir / MANIFEST_NAME)
+
+
+def _stamp(path):
+    stat_result = os.stat(path)
+    return {"size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+
+
+def _record(manifest, relpath, path, sha256, url=None):
+    manifest["artifacts"][relpath] = {
+        "sha256": sha256,
+        "size": os.path.getsize(path),
+        "url": url,
+        "verified": _stamp(path),
+    }
+
+
+def add_artifact(mirror_dir, relpath, source, url=None, manifest=None):
+    """Copy a local file (or bytes) into the mirror and record its hash"""
+    own_manifest = manifest is None
+    manifest = manifest if manifest is not None else load_manifest(mirror_dir)
+    target = Path(mirror_dir) / relpath
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    if isinstance(source, (bytes, bytearray)):
+        target.write_bytes(source)
+    else:
+        shutil.copyfile(source, target)
+
+    _record(manifest, relpath, target, sha256_file(target), url)
+    if own_manifest:
+        save_manifest(mirror_dir, manifest)
+    return manifest["artifacts"][relpath]
+
+
+def download_artifact(mirror_dir, relpath, url, manifest, expected_sha256=None, force=False):
+    """Stream ``url`` into the mirror, hashing while downloading
+
+    Artifacts already present and unchanged since their last verification are
+    skipped. Any ``urllib`` URL works, including ``file://`` for offline use.
+    """
+    # Imported here: urllib.request (and ssl) cost more than the rest of this module
+    import urllib.request
+
+    target = Path(mirror_dir) / relpath
+    entry = manifest["artifacts"].get(relpath)
+    if not force and entry and target.exists() and entry.get("verified") == _stamp(target):
+        if expected_sha256 is None or entry["sha256"] == expected_sha256:
+            return entry, False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".part")
+    digest = hashlib.sha256()
+    with urllib.request.urlopen(url, timeout=60) as response, open(partial, "wb") as out:
+        for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            out.write(chunk)
+
+    sha256 = digest.hexdigest()
+    if expected_sha256 is not None and sha256 != expected_sha256:
+        partial.unlink()
+        raise ValueError(f"sha256 mismatch for {relpath}: expected {expected_sha256}, got {sha256}")
+
+    os.replace(partial, target)
+    _record(manifest, relpath, target, sha256, url)
+    return manifest["artifacts"][relpath], True
+
+
+def verify_mirror(mirror_dir, full=False):
+    """Check every artifact against the manifest
+
+    Shards whose size and mtime match their last successful verification are
+    trusted without rehashing unless ``full`` is set, so a routine check only
+    reads the shards that actually changed.
+    """
+    manifest = load_manifest(mirror_dir)
+    report = {"ok": [], "skipped": [], "missing": [], "corrupt": []}
+
+    for relpath, entry in sorted(manifest["artifacts"].items()):
+        path = Path(mirror_dir) / relpath
+        if not path.exists():
+            report["missing"].append(relpath)
+            continue
+
+        stamp = _stamp(path)
+        if not full and entry.get("verified") == stamp:
+            report["skipped"].append(relpath)
+            continue
+
+        if stamp["size"] == entry["size"] and sha256_file(path) == entry["sha256"]:
+            entry["verified"] = stamp
+            report["ok"].append(relpath)
+        else:
+            entry["verified"] = None
+            report["corrupt"].append(relpath)
+
+    save_manifest(mirror_dir, manifest)
+    return report
+
+
+def model_files(mirror_dir, model_relpath):
+    """List the files WebLLM needs for a model from its mirrored config files"""
+    model_dir = Path(mirror_dir) / model_relpath
+    with open(model_dir / "mlc-chat-config.json", encoding="utf-8") as f:
+        chat_config = json.load(f)
+    with open(model_dir / "ndarray-cache.json", encoding="utf-8") as f:
+        ndarray_cache = json.load(f)
+
+    files = list(chat_config.get("tokenizer_files", []))
+    files += sorted({record["dataPath"] for record in ndarray_cache.get("records", [])})
+    return files
+
+
+def mirror_model(mirror_dir, model_id=MODEL_ID, model_url=MODEL_URL, model_lib_url=MODEL_LIB_URL,
+                 library_url=LIBRARY_URL):
+    """Download the WebLLM library, the model library and every weight shard"""
+    manifest = load_manifest(mirror_dir)
+    model_relpath = f"models/{model_id}/resolve/main"
+    lib_relpath = "libs/" + _url_basename(model_lib_url)
+    model_url = model_url if model_url.endswith("/") else model_url + "/"
+
+    def fetch(relpath, url):
+        start = time.perf_counter()
+        entry, downloaded = download_artifact(mirror_dir, relpath, url, manifest)
+        status = f"downloaded in {time.perf_counter() - start:.1f}s" if downloaded else "up to date"
+        print(f"  ✅ {relpath} ({entry['size'] / 2**20:.1f} MiB, {status})")
+        # Save after every shard so an interrupted mirror resumes where it stopped
+        save_manifest(mirror_dir, manifest)
+
+    fetch(LIBRARY_PATH, library_url)
+    fetch(lib_relpath, model_lib_url)
+    for config_name in ("mlc-chat-config.json", "ndarray-cache.json"):
+        fetch(f"{model_relpath}/{config_name}", model_url + config_name)
+    for file_name in model_files(mirror_dir, model_relpath):
+        fetch(f"{model_relpath}/{file_name}", model_url + file_name)
+
+    manifest["library"] = LIBRARY_PATH
+    manifest["models"][model_id] = {"model": model_relpath + "/", "model_lib": lib_relpath}
+    save_manifest(mirror_dir, manifest)
+    return manifest
+
+
+def forget_paths(mirror_dir, relpaths):
+    """Drop everything under ``relpaths`` (e.g. ``models/<id>``) from the manifest
+
+    Models whose weights or model library are dropped are removed too. When
+    no model is left the manifest itself is deleted, so the launcher stops
+    rewriting pages and WebLLM loads from the CDNs again.
+    """
+    prefixes = [relpath.rstrip("/") + "/" for relpath in relpaths]
+
+    def dropped(relpath):
+        return any((relpath.rstrip("/") + "/").startswith(prefix) for prefix in prefixes)
+
+    if not (Path(mirror_dir) / MANIFEST_NAME).exists():
+        return None
+    manifest = load_manifest(mirror_dir)
+    manifest["artifacts"] = {relpath: entry for relpath, entry in manifest["artifacts"].items()
+                             if not dropped(relpath)}
+    manifest["models"] = {model_id: paths for model_id, paths in manifest.get("models", {}).items()
+                          if not dropped(paths["model"]) and not dropped(paths["model_lib"])}
+
+    if not manifest["models"]:
+        try:
+            os.unlink(Path(mirror_dir) / MANIFEST_NAME)
+        except FileNotFoundError:
+            pass
+        return None
+    save_manifest(mirror_dir, manifest)
+    return manifest
+
+
+def rewrite_page(html, manifest, url_prefix="/" + MIRROR_DIR_NAME):
+    """Point a WebLLM page at the mirror instead of the CDNs
+
+    The library import is replaced with the mirrored copy and a
+    ``window.WEBLLM_MIRROR`` appConfig is injected for ``CreateMLCEngine``.
+    """
+    if manifest.get("library"):
+        html = html.replace(LIBRARY_IMPORT_URL, f"{url_prefix}/{manifest['library']}")
+
+    if manifest.get("models"):
+        model_list = [
+            {"model_id": model_id, "model": f"{url_prefix}/{paths['model']}",
+             "model_lib": f"{url_prefix}/{paths['model_lib']}"}
+            for model_id, paths in manifest["models"].items()
+        ]
+        script = (
+            "<script>\n"
+            "        // Injected by webllm_python_launcher.py: load model files from the local mirror\n"
+            f"        window.WEBLLM_MIRROR = {{ appConfig: {{ model_list: {json.dumps(model_list)}"
+            ".map(m => ({ ...m, model: new URL(m.model, location.href).href, "
+            "model_lib: new URL(m.model_lib, location.href).href })) } };\n"
+            "    </script>\n"
+        )
+        html = html.replace("</head>", f"    {script}</head>", 1)
+
+    return html
+
+
+def print_report(report):
+    print(f"  ✅ Verified: {len(report['ok'])}, unchanged (skipped): {len(report['skipped'])}")
+    for relpath in report["missing"]:
+        print(f"  ❌ Missing: {relpath}")
+    for relpath in report["corrupt"]:
+        print(f"  ❌ Corrupt: {relpath}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local WebLLM artifact mirror")
+    parser.add_argument("--mirror-dir", default=MIRROR_DIR_NAME)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="Download library, model lib and weights")
+    fetch_parser.add_argument("--model-id", default=MODEL_ID)
+    fetch_parser.add_argument("--model-url", default=MODEL_URL)
+    fetch_parser.add_argument("--model-lib-url", default=MODEL_LIB_URL)
+    fetch_parser.add_argument("--library-url", default=LIBRARY_URL)
+
+    verify_parser = subparsers.add_parser("verify", help="Check mirrored files against the manifest")
+    verify_parser.add_argument("--full", action="store_true", help="Rehash every shard")
+
+    add_parser = subparsers.add_parser("add", help="Add a local file to the mirror")
+    add_parser.add_argument("relpath")
+    add_parser.add_argument("source")
+
+    args = parser.parse_args()
+    print("🪞 WebLLM Artifact Mirror")
+    print("=" * 50)
+
+    try:
+        if args.command == "fetch":
+            mirror_model(args.mirror_dir, args.model_id, args.model_url, args.model_lib_url, args.library_url)
+            print(f"\n🎉 Mirror ready in {args.mirror_dir}/")
+            return True
+        if args.command == "add":
+            entry = add_artifact(args.mirror_dir, args.relpath, args.source)
+            print(f"  ✅ Added {args.relpath} (sha256 {entry['sha256'][:12]})")
+            return True
+
+        report = verify_mirror(args.mirror_dir, full=args.full)
+        print_report(report)
+        return not report["missing"] and not report["corrupt"]
+    except Exception as e:
+        print(f"❌ Mirror error: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -5,49 +5,560 @@ Python wrapper to run WebLLM with Qwen2.5-0.5B-Instruct in a web browser
 
 import webbrowser
 import http.server
-import socketserver
 import threading
 import time
 import os
+import argparse
+import functools
+import email.utils
+import hmac
+import html
+import io
+import json
+import secrets
+import socket
+import posixpath
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from pathlib import Path
 
-def start_local_server(port=8080):
-    """Start a local HTTP server to serve the WebLLM HTML file"""
+import asset_compression
+import launcher_metrics
+import launcher_state
+import telemetry_store
+import webllm_mirror
+
+# Connections served at once; further connections wait for a free worker
+DEFAULT_WORKERS = 32
+
+# Seconds an idle keep-alive connection may hold a worker
+KEEP_ALIVE_TIMEOUT = 15
+
+# Pages and scripts are revalidated on every load (cheap with ETags);
+# model shards and other binaries can be reused for a day without asking (not
+# "immutable": mirror paths such as resolve/main/ are not content-hashed)
+REVALIDATE_EXTENSIONS = {'.html', '.htm', '.js', '.mjs', '.json', '.css'}
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+REUSABLE_CACHE_CONTROL = 'public, max-age=86400'
+
+# On-disk home of gzip/brotli variants; kept across runs, a variant is replaced when its source changes
+COMPRESSED_CACHE_DIR = os.path.join('.webllm_cache', 'compressed')
+
+# Launcher state (with the control token) and caches live in the served directory
+# under this prefix; they are never served or listed
+PRIVATE_PREFIX = '.webllm'
+
+def make_etag(stat_result):
+    """Strong ETag from file size and nanosecond mtime"""
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def etag_matches(header_value, etag):
+    """True if an If-None-Match header matches ``etag`` (weak comparison per RFC 9110)"""
+    if not header_value:
+        return False
+    if header_value.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header_value.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+def parse_range(header_value, size):
+    """Parse a single ``bytes=`` range against a file of ``size`` bytes
+
+    Returns ``(start, end)`` (inclusive), ``None`` to serve the whole file
+    (no header, malformed or multi-range), or ``"unsatisfiable"``.
+    """
+    if not header_value or not header_value.startswith('bytes='):
+        return None
+    spec = header_value[len('bytes='):].strip()
+    if ',' in spec or '-' not in spec:
+        return None
+
+    first, last = (part.strip() for part in spec.split('-', 1))
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if start >= size:
+                return 'unsatisfiable'
+            if end < start:
+                return None
+        else:
+            suffix = int(last)
+            if suffix == 0:
+                return 'unsatisfiable'
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        return 'unsatisfiable'
+    return start, min(end, size - 1)
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler with the headers WebLLM needs and HTTP/1.1 keep-alive
+    
+    Files are served with strong ETags (304 on If-None-Match), single byte-range
+    requests for resumable/parallel shard downloads, and bodies sent with
+    socket.sendfile() so large shards never pass through Python buffers.
+    """
+    
+    protocol_version = "HTTP/1.1"
+    timeout = KEEP_ALIVE_TIMEOUT
+    extensions_map = {
+        **http.server.SimpleHTTPRequestHandler.extensions_map,
+        '.wasm': 'application/wasm',
+        '.js': 'text/javascript',
+        '.mjs': 'text/javascript',
+        '.json': 'application/json',
+    }
+    
+    def do_GET(self):
+        if self.path == launcher_state.HEALTH_PATH:
+            return self.serve_health()
+        if self.path == launcher_metrics.METRICS_PATH:
+            return self.serve_metrics()
+        if self.path == launcher_metrics.HEALTHZ_PATH:
+            return self.serve_healthz()
+        self.serve_static(head_only=False)
+    
+    def do_HEAD(self):
+        self.serve_static(head_only=True)
+    
+    def do_POST(self):
+        if self.path == launcher_state.SHUTDOWN_PATH:
+            return self.serve_shutdown()
+        if self.path == telemetry_store.TELEMETRY_PATH:
+            return self.serve_telemetry()
+        self.send_error(HTTPStatus.NOT_IMPLEMENTED, "Unsupported method ('POST')")
+    
+    def is_local_client(self):
+        return self.client_address[0] in ('127.0.0.1', '::1', '::ffff:127.0.0.1')
+    
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def serve_health(self):
+        """Identify this launcher to the stop scripts (loopback clients only)"""
+        if not self.is_local_client():
+            return self.send_error(HTTPStatus.FORBIDDEN)
+        self.send_json(HTTPStatus.OK, {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'port': self.server.server_address[1],
+            'uptime_seconds': round(time.time() - self.server.started, 3),
+        })
+    
+    def serve_shutdown(self):
+        """Stop the launcher when called from loopback with the token from the state file"""
+        # The request has no meaningful body, but drain it to keep the connection in sync
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        token = self.headers.get(launcher_state.TOKEN_HEADER, '')
+        if not self.is_local_client() or not hmac.compare_digest(token, self.server.control_token):
+            return self.send_error(HTTPStatus.FORBIDDEN)
+        self.close_connection = True
+        self.send_json(HTTPStatus.ACCEPTED, {'status': 'shutting down', 'pid': os.getpid()})
+        self.server.shutdown_event.set()
+    
+    def serve_telemetry(self):
+        """Append timing beacons from webllm_telemetry.js to the telemetry store"""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            return self.send_error(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > telemetry_store.MAX_BODY_BYTES:
+            self.close_connection = True  # the oversized body is never read
+            return self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = self.rfile.read(length)
+        
+        store = getattr(self.server, 'telemetry', None)
+        if store is None:
+            return self.send_error(HTTPStatus.NOT_FOUND, "Telemetry is disabled")
+        try:
+            records = telemetry_store.parse_beacon(body)
+        except ValueError:
+            return self.send_error(HTTPStatus.BAD_REQUEST, "Expected JSON beacon records")
+        if records:
+            store.append(records, client=self.client_address[0])
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def serve_metrics(self):
+        """Request counters in Prometheus text format (loopback clients only)"""
+        if not self.is_local_client():
+            return self.send_error(HTTPStatus.FORBIDDEN)
+        metrics = getattr(self.server, 'metrics', None)
+        if metrics is None:
+            return self.send_error(HTTPStatus.NOT_FOUND, "Metrics are disabled")
+        body = metrics.render({
+            'webllm_launcher_workers': self.server.workers,
+            'webllm_launcher_uptime_seconds': round(time.time() - self.server.started, 3),
+        }).encode('utf-8')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', launcher_metrics.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def serve_healthz(self):
+        """Readiness probe: 200 while serving the directory, 503 once shutdown was requested"""
+        shutdown_event = getattr(self.server, 'shutdown_event', None)
+        if shutdown_event is not None and shutdown_event.is_set():
+            return self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {'status': 'shutting down'})
+        if not os.path.isdir(self.directory):
+            return self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {'status': 'directory missing'})
+        self.send_json(HTTPStatus.OK, {'status': 'ok'})
+    
+    def resolve_file(self):
+        """Map the request to a regular file, or None for the stock handling"""
+        path = self.translate_path(self.path)
+        request_path = urllib.parse.urlsplit(self.path).path
+        if os.path.isdir(path):
+            if not request_path.endswith('/'):
+                return None  # stock handler sends the trailing-slash redirect
+            for index in ("index.html", "index.htm"):
+                index_path = os.path.join(path, index)
+                if os.path.isfile(index_path):
+                    return index_path
+            return None  # directory listing
+        if request_path.endswith('/') or not os.path.isfile(path):
+            return None  # stock 404
+        return path
+    
+    def is_private_path(self):
+        """True if the request maps to a ``.webllm*`` file or directory inside the served tree"""
+        relative = os.path.relpath(self.translate_path(self.path), self.directory)
+        return any(part.startswith(PRIVATE_PREFIX) for part in relative.split(os.sep))
+    
+    def list_directory(self, path):
+        """Directory listing like the stock handler's, without the private ``.webllm*`` entries
+        
+        They could not be fetched anyway, but listing them would advertise the
+        launcher's state file (which holds the control token) and caches.
+        """
+        try:
+            names = sorted((name for name in os.listdir(path) if not name.startswith(PRIVATE_PREFIX)),
+                           key=str.lower)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "No permission to list directory")
+            return None
+        
+        title = html.escape(f"Directory listing for {urllib.parse.unquote(self.path)}", quote=False)
+        items = []
+        for name in names:
+            link = name + '/' if os.path.isdir(os.path.join(path, name)) else name
+            display = name + '@' if os.path.islink(os.path.join(path, name)) else link
+            items.append(f'<li><a href="{urllib.parse.quote(link)}">{html.escape(display, quote=False)}</a></li>')
+        body = (
+            f'<!DOCTYPE HTML>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+            f'</head>\n<body>\n<h1>{title}</h1>\n<hr>\n<ul>\n' + '\n'.join(items) + '\n</ul>\n<hr>\n</body>\n</html>\n'
+        ).encode('utf-8', 'surrogateescape')
+        
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+    
+    def serve_static(self, head_only):
+        if self.is_private_path():
+            return self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+        path = self.resolve_file()
+        if path is None:
+            return super().do_HEAD() if head_only else super().do_GET()
+        
+        mirror_dir = getattr(self.server, 'mirror_dir', None)
+        if mirror_dir and posixpath.splitext(path)[1].lower() in ('.html', '.htm'):
+            manifest_path = os.path.join(mirror_dir, webllm_mirror.MANIFEST_NAME)
+            if os.path.isfile(manifest_path):
+                return self.serve_mirrored_page(path, manifest_path, head_only)
+        
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        
+        with f:
+            stat_result = os.fstat(f.fileno())
+            size = stat_result.st_size
+            etag = make_etag(stat_result)
+            extension = posixpath.splitext(path)[1].lower()
+            cache_control = (REVALIDATE_CACHE_CONTROL if extension in REVALIDATE_EXTENSIONS
+                             else REUSABLE_CACHE_CONTROL)
+            
+            # Compressible assets get a gzip/brotli variant unless a byte range was asked for
+            asset_cache = getattr(self.server, 'asset_cache', None)
+            compressible = asset_cache is not None and asset_compression.is_compressible(path, size)
+            encoding = None
+            if compressible and not self.headers.get('Range'):
+                encoding = asset_compression.negotiate(self.headers.get('Accept-Encoding'))
+                if encoding:
+                    etag = f'{etag[:-1]}-{encoding}"'
+            
+            if self.not_modified(etag, stat_result.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', cache_control)
+                if compressible:
+                    self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                return
+            
+            if encoding:
+                body = asset_cache.get(path, stat_result, encoding)
+                self.send_response(HTTPStatus.OK)
+                self.send_header('Content-Type', self.guess_type(path))
+                self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Last-Modified', self.date_time_string(stat_result.st_mtime))
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', cache_control)
+                self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                if not head_only:
+                    self.wfile.write(body)
+                return
+            
+            byte_range = parse_range(self.headers.get('Range'), size)
+            if_range = self.headers.get('If-Range')
+            if byte_range is not None and if_range and if_range.strip() != etag:
+                byte_range = None  # representation changed: send it whole
+            
+            if byte_range == 'unsatisfiable':
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            
+            if byte_range is None:
+                start, length = 0, size
+                self.send_response(HTTPStatus.OK)
+            else:
+                start, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-Range', f'bytes {byte_range[0]}-{byte_range[1]}/{size}')
+            
+            self.send_header('Content-Type', self.guess_type(path))
+            self.send_header('Content-Length', str(length))
+            self.send_header('Last-Modified', self.date_time_string(stat_result.st_mtime))
+            self.send_header('ETag', etag)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Cache-Control', cache_control)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            
+            if not head_only and length:
+                self.connection.sendfile(f, start, length)
     
-    class Handler(http.server.SimpleHTTPRequestHandler):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, directory=os.getcwd(), **kwargs)
+    def serve_mirrored_page(self, path, manifest_path, head_only):
+        """Serve an HTML page rewritten to load WebLLM from the local mirror"""
+        page_stat = os.stat(path)
+        manifest_stat = os.stat(manifest_path)
+        etag = f'"{page_stat.st_size:x}-{page_stat.st_mtime_ns:x}-m{manifest_stat.st_mtime_ns:x}"'
+        
+        if self.not_modified(etag, max(page_stat.st_mtime, manifest_stat.st_mtime)):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', REVALIDATE_CACHE_CONTROL)
+            self.end_headers()
+            return
         
-        def end_headers(self):
-            # Add CORS headers to allow WebLLM to load
-            self.send_header('Cross-Origin-Embedder-Policy', 'require-corp')
-            self.send_header('Cross-Origin-Opener-Policy', 'same-origin')
-            super().end_headers()
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        mirror_prefix = '/' + os.path.relpath(self.server.mirror_dir, self.directory).replace(os.sep, '/')
+        body = webllm_mirror.rewrite_page(
+            html, webllm_mirror.load_manifest(self.server.mirror_dir), mirror_prefix
+        ).encode('utf-8')
+        
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', REVALIDATE_CACHE_CONTROL)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+    
+    def not_modified(self, etag, mtime):
+        """Evaluate If-None-Match (preferred) or If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
         
-        def log_message(self, format, *args):
-            # Suppress default logging
-            pass
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if not if_modified_since:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        return int(mtime) <= since
+    
+    def parse_request(self):
+        # Latency is measured from here so idle keep-alive time is not counted
+        self.request_started = time.perf_counter()
+        return super().parse_request()
+    
+    def send_response_only(self, code, message=None):
+        self.response_status = code
+        super().send_response_only(code, message)
+    
+    def send_header(self, keyword, value):
+        if keyword == 'Content-Length':
+            self.response_length = int(value)
+        super().send_header(keyword, value)
+    
+    def handle_one_request(self):
+        self.response_status = None
+        self.response_length = 0
+        self.request_started = time.perf_counter()
+        super().handle_one_request()
+        metrics = getattr(self.server, 'metrics', None)
+        if metrics is None or self.response_status is None:
+            return  # idle keep-alive timeout or closed connection: nothing was served
+        # A malformed request line is rejected before the method and path are parsed
+        command = self.command or '-'
+        has_body = command != 'HEAD' and self.response_status not in (204, 304)
+        metrics.record(
+            command,
+            urllib.parse.urlsplit(getattr(self, 'path', '')).path,
+            self.response_status,
+            self.response_length if has_body else 0,
+            time.perf_counter() - self.request_started,
+        )
+    
+    def end_headers(self):
+        # Add CORS headers to allow WebLLM to load
+        self.send_header('Cross-Origin-Embedder-Policy', 'require-corp')
+        self.send_header('Cross-Origin-Opener-Policy', 'same-origin')
+        super().end_headers()
     
-    # Find an available port
+    def log_message(self, format, *args):
+        # Suppress default logging
+        pass
+
+class BoundedThreadingHTTPServer(http.server.ThreadingHTTPServer):
+    """HTTP server that handles each connection on a fixed-size thread pool
+    
+    Open connections are tracked so ``server_close`` can shut their sockets
+    down: pool threads are not daemonic, and a worker parked on an idle
+    keep-alive connection would otherwise hold up interpreter exit for up to
+    ``KEEP_ALIVE_TIMEOUT``.
+    """
+    
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self.connections = {}
+        self.connections_lock = threading.Lock()
+        self.closing = False
+        try:
+            super().__init__(server_address, handler_class)
+        except OSError:
+            self.executor.shutdown(wait=False)
+            raise
+    
+    def process_request(self, request, client_address):
+        with self.connections_lock:
+            self.connections[request] = None
+        future = self.executor.submit(self.process_request_thread, request, client_address)
+        with self.connections_lock:
+            if request in self.connections:
+                self.connections[request] = future
+    
+    def shutdown_request(self, request):
+        with self.connections_lock:
+            self.connections.pop(request, None)
+        super().shutdown_request(request)
+    
+    def handle_error(self, request, client_address):
+        if not self.closing:
+            super().handle_error(request, client_address)
+    
+    def server_close(self):
+        self.closing = True
+        super().server_close()
+        with self.connections_lock:
+            connections = list(self.connections.items())
+        for request, _ in connections:
+            try:
+                # Wakes workers blocked in recv() or sendfile() on this connection
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for request, future in connections:
+            if future is not None and future.cancelled():
+                # Queued connections never reach a worker, so nothing else closes them
+                self.close_request(request)
+
+def start_local_server(port=8080, workers=DEFAULT_WORKERS, directory=None, mirror_dir=None,
+                       compression=True, compression_memory=asset_compression.DEFAULT_MEMORY_BUDGET,
+                       telemetry=True):
+    """Start a local HTTP server to serve the WebLLM HTML file
+    
+    If ``mirror_dir`` (inside ``directory``) holds a webllm_mirror manifest,
+    HTML pages are rewritten to load the library and weights from it.
+    Compressed variants are cached under ``.webllm_cache/compressed`` and
+    browser timing beacons are appended to the telemetry store in the user's
+    cache directory.
+    """
+    
+    directory = directory or os.getcwd()
+    if mirror_dir is None:
+        mirror_dir = os.path.join(directory, webllm_mirror.MIRROR_DIR_NAME)
+    handler = functools.partial(Handler, directory=directory)
+    
+    # Find an available port (port 0 lets the OS pick one)
     for port_attempt in range(port, port + 100):
         try:
-            with socketserver.TCPServer(("", port_attempt), Handler) as httpd:
-                print(f"🌐 Starting local server on port {port_attempt}")
-                print(f"📂 Serving files from: {os.getcwd()}")
-                
-                # Start server in a separate thread
-                server_thread = threading.Thread(target=httpd.serve_forever)
-                server_thread.daemon = True
-                server_thread.start()
-                
-                return httpd, port_attempt
-                
+            httpd = BoundedThreadingHTTPServer(("", port_attempt), handler, workers=workers)
         except OSError:
             continue
+        httpd.mirror_dir = os.path.abspath(mirror_dir)
+        httpd.started = time.time()
+        httpd.control_token = secrets.token_urlsafe(32)
+        httpd.shutdown_event = threading.Event()
+        httpd.metrics = launcher_metrics.RequestMetrics()
+        httpd.telemetry = None
+        if telemetry:
+            httpd.telemetry = telemetry_store.TelemetryStore()
+        httpd.asset_cache = None
+        if compression:
+            httpd.asset_cache = asset_compression.AssetCompressionCache(
+                os.path.join(directory, COMPRESSED_CACHE_DIR), memory_budget=compression_memory
+            )
+        
+        port_attempt = httpd.server_address[1]
+        print(f"🌐 Starting local server on port {port_attempt} ({workers} workers, keep-alive)")
+        print(f"📂 Serving files from: {directory}")
+        if os.path.isfile(os.path.join(httpd.mirror_dir, webllm_mirror.MANIFEST_NAME)):
+            print(f"🪞 Loading WebLLM from local mirror: {httpd.mirror_dir}")
+        
+        # Start server in a separate thread
+        server_thread = threading.Thread(target=httpd.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        
+        return httpd, port_attempt
     
     raise RuntimeError("Could not find an available port")
 
-def main():
+def main(port=8080, workers=DEFAULT_WORKERS, mirror_dir=None, compression=True, telemetry=True):
     """Main function to run WebLLM test"""
     
     print("🚀 WebLLM Qwen2.5-0.5B-Instruct Test Launcher")
@@ -62,44 +573,68 @@ def main():
     
     try:
         # Start local server
-        httpd, port = start_local_server()
-        
-        # Construct URL
-        url = f"http://localhost:{port}/webllm_test.html"
-        
-        print(f"🌍 WebLLM test page will open at: {url}")
-        print("\n📋 Instructions:")
-        print("1. The browser will open automatically")
-        print("2. Wait for the model to load (this may take a few minutes)")
-        print("3. Once loaded, you can interact with Qwen2.5-0.5B-Instruct")
-        print("4. The model will automatically run an initial test")
-        print("5. You can then type your own messages and press Enter or click Send")
-        print("\n⚠️  Note: Keep this terminal window open while using WebLLM")
-        print("❌ Press Ctrl+C to stop the server and close the application")
-        
-        # Open browser
-        print(f"\n🔗 Opening browser...")
-        webbrowser.open(url)
-        
-        print("✅ Browser launched! Check your browser for the WebLLM interface.")
-        print("🔄 Server is running... (Press Ctrl+C to stop)")
+        httpd, port = start_local_server(port, workers=workers, mirror_dir=mirror_dir,
+                                         compression=compression, telemetry=telemetry)
         
         try:
-            # Keep the server running
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n🛑 Shutting down server...")
+            # Let the stop scripts find this process without scanning the process table
+            launcher_state.write_state(launcher_state.STATE_FILE, port, httpd.control_token, os.getcwd())
+            
+            # Construct URL
+            url = f"http://localhost:{port}/webllm_test.html"
+            
+            print(f"🌍 WebLLM test page will open at: {url}")
+            print("\n📋 Instructions:")
+            print("1. The browser will open automatically")
+            print("2. Wait for the model to load (this may take a few minutes)")
+            print("3. Once loaded, you can interact with Qwen2.5-0.5B-Instruct")
+            print("4. The model will automatically run an initial test")
+            print("5. You can then type your own messages and press Enter or click Send")
+            print("\n⚠️  Note: Keep this terminal window open while using WebLLM")
+            print("❌ Press Ctrl+C to stop the server and close the application")
+            
+            # Open browser
+            print(f"\n🔗 Opening browser...")
+            webbrowser.open(url)
+            
+            print("✅ Browser launched! Check your browser for the WebLLM interface.")
+            print("🔄 Server is running... (Press Ctrl+C to stop)")
+            
+            try:
+                # Keep the server running until Ctrl+C or a shutdown request from the stop scripts
+                while not httpd.shutdown_event.wait(1):
+                    pass
+                print("\n🛑 Shutdown requested via control endpoint...")
+            except KeyboardInterrupt:
+                print("\n🛑 Shutting down server...")
+        finally:
+            # Also runs when anything after start_local_server fails, so neither
+            # the state file nor the serving thread outlives this call
+            launcher_state.remove_state(launcher_state.STATE_FILE)
             httpd.shutdown()
-            print("✅ Server stopped successfully!")
-            return True
+            httpd.server_close()
+        print("✅ Server stopped successfully!")
+        return True
             
     except Exception as e:
         print(f"❌ Error starting server: {e}")
         return False
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Serve and open the WebLLM test page")
+    parser.add_argument("--port", type=int, default=8080, help="First port to try")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Maximum connections served concurrently")
+    parser.add_argument("--mirror", default=None,
+                        help="Local artifact mirror directory (default: ./webllm_mirror if present)")
+    parser.add_argument("--no-compression", action="store_true",
+                        help="Serve assets uncompressed (no gzip/brotli variants)")
+    parser.add_argument("--no-telemetry", action="store_true",
+                        help="Ignore the timing beacons posted by the pages")
+    args = parser.parse_args()
+    
+    success = main(args.port, args.workers, args.mirror, compression=not args.no_compression,
+                   telemetry=not args.no_telemetry)
     if success:
         print("\n🎉 WebLLM test completed successfully!")
     else:
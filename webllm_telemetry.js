@@ -0,0 +1,156 @@
+// Performance telemetry for the WebLLM pages
+// Records load phases and per-response timings and posts them in batches to the launcher
+// (webllm_python_launcher.py) with navigator.sendBeacon. Does nothing unless the page is
+// served over http(s), or when the URL contains ?telemetry=off.
+(function () {
+    const ENDPOINT = '/__webllm/telemetry';
+    const SCHEMA_VERSION = 1;
+    const BATCH_SIZE = 10;
+    const FLUSH_DELAY_MS = 5000;
+
+    const enabled = location.protocol.startsWith('http')
+        && new URLSearchParams(location.search).get('telemetry') !== 'off';
+
+    const session = Math.random().toString(36).slice(2, 10);
+    const page = location.pathname.split('/').pop() || 'index.html';
+    let queue = [];
+    let flushTimer = null;
+
+    function detectBrowser() {
+        const brands = navigator.userAgentData?.brands || [];
+        const brand = brands.find(b => !/Not.?A.?Brand|Chromium/i.test(b.brand))
+            || brands.find(b => /Chromium/i.test(b.brand));
+        if (brand) return `${brand.brand} ${brand.version}`;
+
+        const ua = navigator.userAgent;
+        for (const [name, pattern] of [['Edge', /Edg\/(\d+)/], ['Firefox', /Firefox\/(\d+)/],
+                                       ['Chrome', /Chrome\/(\d+)/], ['Safari', /Version\/(\d+).*Safari/]]) {
+            const match = ua.match(pattern);
+            if (match) return `${name} ${match[1]}`;
+        }
+        return 'unknown';
+    }
+
+    async function detectGpu() {
+        try {
+            const adapter = await navigator.gpu?.requestAdapter();
+            if (!adapter) return 'no-webgpu';
+            const info = adapter.info || await adapter.requestAdapterInfo?.() || {};
+            return [info.vendor, info.architecture, info.device || info.description]
+                .filter(Boolean).join(' ') || 'unknown';
+        } catch (error) {
+            return 'unknown';
+        }
+    }
+
+    const environment = enabled
+        ? detectGpu().then(gpu => ({ browser: detectBrowser(), gpu }))
+        : Promise.resolve({});
+
+    function send(records) {
+        const body = JSON.stringify({ records });
+        // text/plain keeps sendBeacon a "simple" request (no preflight)
+        const blob = new Blob([body], { type: 'text/plain' });
+        if (navigator.sendBeacon && navigator.sendBeacon(ENDPOINT, blob)) return;
+        fetch(ENDPOINT, { method: 'POST', body, keepalive: true }).catch(() => {});
+    }
+
+    function flush() {
+        clearTimeout(flushTimer);
+        flushTimer = null;
+        if (queue.length) {
+            send(queue);
+            queue = [];
+        }
+    }
+
+    async function record(type, fields) {
+        if (!enabled) return;
+        queue.push({
+            v: SCHEMA_VERSION,
+            type,
+            page,
+            session,
+            ts: Date.now(),
+            ...(await environment),
+            ...fields,
+        });
+        if (queue.length >= BATCH_SIZE) {
+            flush();
+        } else if (!flushTimer) {
+            flushTimer = setTimeout(flush, FLUSH_DELAY_MS);
+        }
+    }
+
+    // Classify initProgressCallback texts ("Fetching param cache[..]", "Loading model from
+    // cache[..]", "Loading GPU shader modules[..]") into phases and time each one
+    function phaseOf(text) {
+        if (/shader|compil/i.test(text)) return 'compile';
+        if (/fetch|download/i.test(text)) return 'download';
+        if (/load/i.test(text)) return 'load';
+        return null;
+    }
+
+    function loadTracker(model) {
+        const started = performance.now();
+        const durations = { download: 0, compile: 0, load: 0 };
+        let phase = null;
+        let phaseStarted = started;
+
+        function enter(next) {
+            const now = performance.now();
+            if (phase) durations[phase] += now - phaseStarted;
+            phase = next;
+            phaseStarted = now;
+        }
+
+        return {
+            progress(report) {
+                const next = phaseOf(report.text || '');
+                if (next && next !== phase) enter(next);
+            },
+            done(error) {
+                enter(null);
+                record('load', {
+                    model,
+                    ok: !error,
+                    error: error ? String(error.message || error).slice(0, 200) : undefined,
+                    download_s: durations.download / 1000,
+                    compile_s: durations.compile / 1000,
+                    load_s: durations.load / 1000,
+                    total_s: (performance.now() - started) / 1000,
+                });
+            },
+        };
+    }
+
+    // One record per chat completion; ``usage.extra`` carries WebLLM's own timings when present
+    function generation(model, { latencyMs, ttftMs = null, usage = null, streamed = false }) {
+        const extra = usage?.extra || {};
+        const completionTokens = usage?.completion_tokens ?? null;
+        const ttftSeconds = ttftMs !== null ? ttftMs / 1000 : (extra.time_to_first_token_s ?? null);
+        // Decode rate excludes prefill when the first-token time is known
+        const decodeSeconds = latencyMs / 1000 - (ttftSeconds || 0);
+        record('generation', {
+            model,
+            streamed,
+            latency_s: latencyMs / 1000,
+            ttft_s: ttftSeconds,
+            tokens_per_s: extra.decode_tokens_per_s
+                ?? (completionTokens && decodeSeconds > 0 ? completionTokens / decodeSeconds : null),
+            prefill_tokens_per_s: extra.prefill_tokens_per_s ?? null,
+            prompt_tokens: usage?.prompt_tokens ?? null,
+            completion_tokens: completionTokens,
+            context_tokens: usage ? (usage.prompt_tokens || 0) + (completionTokens || 0) : null,
+        });
+    }
+
+    if (enabled) {
+        addEventListener('pagehide', flush);
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') flush();
+        });
+    }
+
+    window.WebLLMTelemetry = { enabled, loadTracker, generation, flush };
+})();